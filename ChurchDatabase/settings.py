@@ -54,6 +54,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.RequestMetricsMiddleware",
 ]
 
 ROOT_URLCONF = "ChurchDatabase.urls"
@@ -70,6 +71,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "core.context_processors.admin_context",
+                "core.context_processors.reference_data",
             ],
         },
     },
@@ -89,6 +91,35 @@ DATABASES = {
 }
 
 
+# Cache
+# Dashboard statistics and lookup data are cached here. Use a shared backend
+# (Redis, Memcached or the database cache) when running several processes so
+# that signal-based invalidation reaches all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "church-database",
+    }
+}
+
+
+# Request metrics
+# Per-view query counts and timings (Server-Timing headers plus the
+# superadmin-only /metrics/requests/ endpoint). Views issuing more queries
+# than their budget are logged as warnings by core.middleware.
+
+REQUEST_METRICS_ENABLED = os.environ.get("REQUEST_METRICS_ENABLED", "") == "1"
+REQUEST_METRICS_WINDOW = 500
+DEFAULT_QUERY_BUDGET = 30
+QUERY_BUDGETS = {
+    "dashboard": 15,
+    "member_list": 15,
+    "committee-detail": 20,
+    "inventory_dashboard": 12,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -128,6 +159,21 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
+# Background job files (member exports, uploaded import spreadsheets) hold
+# personal data: keep them outside MEDIA_ROOT, which is served publicly.
+# They are only downloaded through the job_download view.
+JOB_FILES_ROOT = os.environ.get("JOB_FILES_ROOT", os.path.join(BASE_DIR, "private", "jobs"))
+
+# Sermon audio (see core.sermons)
+# The audio endpoint answers range requests itself unless SENDFILE_BACKEND
+# hands the file to the web server: "nginx" (X-Accel-Redirect to an
+# internal location at SENDFILE_URL_PREFIX aliased to MEDIA_ROOT) or
+# "apache" (X-Sendfile, mod_xsendfile).
+SENDFILE_BACKEND = os.environ.get("SENDFILE_BACKEND", "")
+SENDFILE_URL_PREFIX = "/protected-media/"
+SERMON_AUDIO_MAX_SIZE = 500 * 1024 * 1024
+SERMON_AUDIO_CHUNK_SIZE = 5 * 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -0,0 +1,90 @@
+"""
+Conditional GET for API viewsets.
+
+``ConditionalGetMixin`` adds ``ETag`` and ``Last-Modified`` to list and
+detail responses and answers a matching ``If-None-Match`` or
+``If-Modified-Since`` with 304 before anything is serialized.
+
+For a list, the validators come from one aggregate over the filtered
+queryset: the row count and the newest ``updated_at``, of the rows and of
+the related rows named in ``related_last_modified`` whose fields (such as
+``assembly_name``) are serialized with them, so renaming an assembly
+changes the validators of its sermons. The ETag also covers the query
+string (filters, ordering, page) and the response format. A
+delete lowers the count, so it changes the ETag but not ``Last-Modified``;
+clients should prefer ``If-None-Match``, which Django checks first.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8'))
+    return quote_etag(digest.hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response if the client's copy is current, else None"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def _latest(*moments):
+    moments = [moment for moment in moments if moment is not None]
+    return max(moments) if moments else None
+
+
+class ConditionalGetMixin:
+    last_modified_field = 'updated_at'
+    # Relations serialized with each row, e.g. ('assembly',)
+    related_last_modified = ()
+
+    def _format(self, request):
+        return getattr(request.accepted_renderer, 'format', '')
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        related = {
+            f'related_{index}': Max(f'{relation}__{self.last_modified_field}')
+            for index, relation in enumerate(self.related_last_modified)
+        }
+        state = queryset.order_by().aggregate(
+            count=Count('pk'), last_modified=Max(self.last_modified_field), **related
+        )
+        last_modified = _latest(state['last_modified'], *(state[key] for key in related))
+        etag = make_etag(
+            request.get_full_path(), self._format(request), state['count'],
+            state['last_modified'], *(state[key] for key in related)
+        )
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        moments = [getattr(instance, self.last_modified_field)]
+        for relation in self.related_last_modified:
+            related = getattr(instance, relation)
+            moments.append(getattr(related, self.last_modified_field) if related else None)
+        last_modified = _latest(*moments)
+        etag = make_etag(instance.pk, self._format(request), *moments)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
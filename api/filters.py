@@ -0,0 +1,48 @@
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from core.pagination import MAX_PAGE_SIZE
+from core.sermons import search_sermons
+
+IDS_LIMIT = MAX_PAGE_SIZE
+MAX_ID = 2 ** 63 - 1
+
+
+class IdsFilter(filters.BaseFilterBackend):
+    """``?ids=1,2,3`` fetches a batch of rows by primary key"""
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get('ids')
+        if not value:
+            return queryset
+        try:
+            ids = {int(part) for part in value.split(',') if part.strip()}
+        except ValueError:
+            ids = None
+        # Larger ids overflow the database's integer parameters
+        if ids is None or any(not 0 < pk <= MAX_ID for pk in ids):
+            raise ValidationError({'ids': 'Expected a comma-separated list of ids'})
+        if len(ids) > IDS_LIMIT:
+            raise ValidationError({'ids': f'At most {IDS_LIMIT} ids per request'})
+        return queryset.filter(pk__in=ids)
+
+
+class SermonSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` through the sermon search indexes: scripture references
+    ("John 3") match the passage index and other words the full-text index.
+    Without an explicit ``?ordering=`` the best matches come first, so this
+    runs after OrderingFilter. Databases without a full-text index fall back
+    to SearchFilter's icontains over ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        ordering_param = filters.OrderingFilter.ordering_param
+        rank = not request.query_params.get(ordering_param)
+        result = search_sermons(queryset, query, rank=rank)
+        if result is None:
+            return super().filter_queryset(request, queryset, view)
+        return result
@@ -0,0 +1,48 @@
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.pagination import MAX_PAGE_SIZE, keyset_paginate, parse_page_size
+
+
+class SermonPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination through ``core.pagination.keyset_paginate``: the view's
+    ``keyset_ordering`` (ending in a unique field) is walked with ``?cursor=``
+    tokens from the ``next`` and ``previous`` links, so deep pages cost the
+    same as the first. A batch ``?ids=`` lookup comes back as one page.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if request.query_params.get('ids'):
+            page_size = MAX_PAGE_SIZE
+        else:
+            page_size = parse_page_size(request.query_params.get(self.page_size_query_param))
+        self.page = keyset_paginate(
+            queryset,
+            view.keyset_ordering,
+            cursor=request.query_params.get(self.cursor_query_param),
+            page_size=page_size,
+        )
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
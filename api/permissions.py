@@ -0,0 +1,36 @@
+from rest_framework.permissions import BasePermission
+
+from core.models import Assembly, Cell, Member, Sermon, Unit
+
+
+class IsChurchAdmin(BasePermission):
+    """Only users with an Admin profile; what they see is scoped by its level"""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and hasattr(user, 'admin_account'))
+
+
+def scoped_queryset(model, admin):
+    """
+    Rows of ``model`` an admin may read, following Admin.get_managed_members:
+    super admins and moderators see their assembly, cell admins their cell,
+    and inventory admins no member data. Sermons are those of the assembly.
+    """
+    if model is Member:
+        return admin.get_managed_members()
+    if model is Assembly:
+        return Assembly.objects.filter(pk=admin.assembly_id)
+    if model is Cell:
+        if admin.is_superadmin or admin.is_moderator:
+            return Cell.objects.all()
+        if admin.is_cell_admin and admin.cell_id:
+            return Cell.objects.filter(pk=admin.cell_id)
+        return Cell.objects.none()
+    if model is Unit:
+        if admin.is_superadmin or admin.is_moderator or admin.is_cell_admin:
+            return Unit.objects.all()
+        return Unit.objects.none()
+    if model is Sermon:
+        return Sermon.objects.filter(assembly_id=admin.assembly_id)
+    raise ValueError(f'No admin scope for {model.__name__}')
@@ -1,8 +1,142 @@
+from django.urls import reverse
 from rest_framework import serializers
-from core.models import Sermon
+from core.models import Assembly, Cell, Member, Sermon, Unit
+from core.sermons import validate_audio
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    Read-only ModelSerializer that ``?fields=a,b`` cuts down to the fields a
+    client asked for. ``field_columns`` maps fields that do not read a column
+    of the same name to the columns they need, e.g. ``assembly_name`` ->
+    ``assembly__name``; ``optimize`` turns the chosen fields into ``only()``
+    and ``select_related()`` so no other column or join is fetched.
+    """
+    field_columns = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Field names from a ``fields`` query parameter, or None for all"""
+        if not value:
+            return None
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in cls.Meta.fields]
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f"Unknown fields: {', '.join(unknown)}"}
+            )
+        return names
+
+    @classmethod
+    def optimize(cls, queryset, fields=None, extra_columns=()):
+        columns = {'id', *extra_columns}
+        for name in fields or cls.Meta.fields:
+            columns.update(cls.field_columns.get(name, [name]))
+        relations = sorted({column.split('__')[0] for column in columns if '__' in column})
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
+
+
+class MemberSerializer(SparseFieldsetSerializer):
+    full_name = serializers.CharField(source='get_full_name', read_only=True)
+    age = serializers.IntegerField(read_only=True)
+    assembly_name = serializers.CharField(source='assembly.name', read_only=True, allow_null=True)
+    cell_name = serializers.CharField(source='cell.name', read_only=True, allow_null=True)
+    unit_name = serializers.CharField(source='unit.name', read_only=True, allow_null=True)
+
+    field_columns = {
+        'full_name': ['first_name', 'middle_name', 'last_name'],
+        'age': ['date_of_birth'],
+        'assembly_name': ['assembly__name'],
+        'cell_name': ['cell__name'],
+        'unit_name': ['unit__name'],
+    }
+
+    class Meta:
+        model = Member
+        fields = [
+            'id',
+            'first_name',
+            'middle_name',
+            'last_name',
+            'full_name',
+            'gender',
+            'marital_status',
+            'date_of_birth',
+            'age',
+            'email',
+            'phone',
+            'address',
+            'membership_status',
+            'membership_date',
+            'baptism_date',
+            'assembly',
+            'assembly_name',
+            'cell',
+            'cell_name',
+            'unit',
+            'unit_name',
+            'other_unit',
+            'photo',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class AssemblySerializer(SparseFieldsetSerializer):
+    class Meta:
+        model = Assembly
+        fields = [
+            'id',
+            'name',
+            'email',
+            'phone',
+            'street_address',
+            'city',
+            'state',
+            'country',
+            'is_active',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class CellSerializer(SparseFieldsetSerializer):
+    class Meta:
+        model = Cell
+        fields = ['id', 'name', 'created_at']
+        read_only_fields = fields
+
+
+class UnitSerializer(SparseFieldsetSerializer):
+    leader_name = serializers.SerializerMethodField()
+
+    field_columns = {
+        'leader_name': ['leader__first_name', 'leader__last_name'],
+    }
+
+    class Meta:
+        model = Unit
+        fields = ['id', 'name', 'description', 'leader', 'leader_name', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+    def get_leader_name(self, unit):
+        return str(unit.leader) if unit.leader_id else None
+
 
 class SermonSerializer(serializers.ModelSerializer):
     assembly_name = serializers.CharField(source='assembly.name', read_only=True)
+    audio_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Sermon
@@ -15,9 +149,26 @@ class SermonSerializer(serializers.ModelSerializer):
             'bible_passage',
             'sermon_date',
             'audio_file',
+            'audio_url',
             'video_url',
             'notes',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['created_at', 'updated_at']
+
+    def get_audio_url(self, sermon):
+        """Streaming endpoint for the audio, with seeking support"""
+        if not sermon.audio_file:
+            return None
+        url = reverse('sermon-audio', args=[sermon.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def validate_audio_file(self, value):
+        if value:
+            try:
+                validate_audio(value.name, value.size)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
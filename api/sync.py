@@ -0,0 +1,202 @@
+"""
+Delta sync for offline clients.
+
+A client sends the ``watermark`` from its last completed sync as ``?since=``
+and gets back the members, cells, units and sermons in its admin scope whose
+``updated_at`` moved after it, plus the ids deleted or moved out of scope
+since then (``core.tombstones``). Rows are arrays in the order of their
+kind's ``fields`` so the payload does not repeat key names.
+
+Each kind is walked in batches of ``SYNC_BATCH_SIZE`` along (updated_at, id)
+within a fixed window ending when the sync started. While more remains the
+response has a ``next`` link carrying that window; the last batch carries
+the new ``watermark``. It is set ``SYNC_OVERLAP`` before the window end, so
+rows committed by transactions still open at the time are not missed; a
+client applies rows as upserts by id, so seeing one twice is harmless.
+
+Without ``since``, or when it is older than tombstones are kept, the
+response is a full download marked ``reset``: the client replaces what it
+holds instead of merging. Deleting a cell or unit clears references to it
+without touching the members, so clients should null references to
+tombstoned cells, units and members themselves.
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import Cell, Member, Sermon, Tombstone, Unit
+from core.pagination import decode_cursor, encode_cursor, keyset_paginate
+from core.tombstones import TOMBSTONE_RETENTION
+
+from .permissions import scoped_queryset
+
+SYNC_BATCH_SIZE = 500
+SYNC_OVERLAP = timedelta(seconds=60)
+SYNC_ORDERING = ('updated_at', 'id')
+
+SYNC_KINDS = {
+    'members': (Member, 'member', (
+        'id', 'first_name', 'middle_name', 'last_name', 'gender', 'date_of_birth',
+        'email', 'phone', 'membership_status', 'assembly_id', 'cell_id', 'unit_id',
+        'updated_at',
+    )),
+    'cells': (Cell, 'cell', ('id', 'name', 'updated_at')),
+    'units': (Unit, 'unit', ('id', 'name', 'description', 'leader_id', 'updated_at')),
+    'sermons': (Sermon, 'sermon', (
+        'id', 'assembly_id', 'title', 'preacher', 'bible_passage', 'sermon_date',
+        'video_url', 'updated_at',
+    )),
+}
+
+# Tombstones are paged as one more stream under this key
+DELETED = 'deleted'
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def encode_watermark(moment):
+    return encode_cursor([moment.isoformat()])
+
+
+def _parse_moment(value):
+    moment = parse_datetime(value) if isinstance(value, str) else None
+    if moment is None:
+        raise InvalidToken('Invalid sync token')
+    return moment
+
+
+def decode_watermark(token):
+    values, _ = decode_cursor(token)
+    if not values or len(values) != 1:
+        raise InvalidToken('Invalid sync watermark')
+    return _parse_moment(values[0])
+
+
+def tombstone_scope(kind, admin):
+    """Q for the tombstones of ``kind`` an admin's clients need, or None"""
+    managers = admin.is_superadmin or admin.is_moderator
+    if kind == 'member':
+        if managers:
+            return Q(assembly_id=admin.assembly_id)
+        if admin.is_cell_admin and admin.cell_id:
+            return Q(assembly_id=admin.assembly_id, cell_id=admin.cell_id)
+        return None
+    if kind == 'cell':
+        if managers:
+            return Q()
+        if admin.is_cell_admin and admin.cell_id:
+            return Q(object_id=admin.cell_id)
+        return None
+    if kind == 'unit':
+        return Q() if managers or admin.is_cell_admin else None
+    if kind == 'sermon':
+        return Q(assembly_id=admin.assembly_id)
+    raise ValueError(f'No tombstone scope for {kind}')
+
+
+class SyncBatch:
+    """
+    One response of a sync. ``since`` is None for a full download; ``state``
+    maps each stream still to walk to its keyset cursor (None to start).
+    """
+
+    def __init__(self, admin, since=None, until=None, state=None):
+        self.admin = admin
+        self.until = until or timezone.now()
+        self.reset = since is None or since < self.until - TOMBSTONE_RETENTION
+        self.since = None if self.reset else since
+        if state is None:
+            state = {name: None for name in SYNC_KINDS}
+            if not self.reset:
+                state[DELETED] = None
+        self.state = state
+
+    @classmethod
+    def from_cursor(cls, admin, token):
+        values, _ = decode_cursor(token)
+        if not values or len(values) != 3 or not isinstance(values[2], dict):
+            raise InvalidToken('Invalid sync cursor')
+        since = _parse_moment(values[0]) if values[0] is not None else None
+        return cls(admin, since, _parse_moment(values[1]), values[2])
+
+    def _window(self, field):
+        window = Q(**{f'{field}__lte': self.until})
+        if self.since is not None:
+            window &= Q(**{f'{field}__gt': self.since})
+        return window
+
+    def _rows(self, name, cursor):
+        model, _, fields = SYNC_KINDS[name]
+        columns = [model._meta.get_field(field).name for field in fields]
+        queryset = scoped_queryset(model, self.admin).filter(self._window('updated_at'))
+        page = keyset_paginate(
+            queryset.only(*columns), SYNC_ORDERING, cursor=cursor, page_size=SYNC_BATCH_SIZE
+        )
+        rows = [[getattr(obj, field) for field in fields] for obj in page]
+        return rows, page.next_cursor
+
+    def _deleted(self, cursor):
+        scopes = Q()
+        scoped = False
+        for _, kind, _ in SYNC_KINDS.values():
+            scope = tombstone_scope(kind, self.admin)
+            if scope is not None:
+                scopes |= Q(kind=kind) & scope
+                scoped = True
+        if not scoped:
+            return {}, None
+
+        queryset = Tombstone.objects.filter(scopes, self._window('deleted_at'))
+        page = keyset_paginate(
+            queryset.only('kind', 'object_id', 'deleted_at'),
+            ('deleted_at', 'id'),
+            cursor=cursor,
+            page_size=SYNC_BATCH_SIZE,
+        )
+        deleted = {}
+        for tombstone in page:
+            deleted.setdefault(tombstone.kind, set()).add(tombstone.object_id)
+
+        # A member that moved out and back again is still ours
+        for name, (model, kind, _) in SYNC_KINDS.items():
+            if deleted.get(kind):
+                present = scoped_queryset(model, self.admin).filter(pk__in=deleted[kind])
+                deleted[kind] -= set(present.values_list('pk', flat=True))
+        return deleted, page.next_cursor
+
+    def payload(self):
+        """The response body, less the ``next`` link (see ``next_cursor``)"""
+        remaining = {}
+        data = {'reset': self.reset}
+
+        deleted = {}
+        if DELETED in self.state:
+            deleted, cursor = self._deleted(self.state[DELETED])
+            if cursor is not None:
+                remaining[DELETED] = cursor
+
+        for name, (_, kind, fields) in SYNC_KINDS.items():
+            rows = []
+            if name in self.state:
+                rows, cursor = self._rows(name, self.state[name])
+                if cursor is not None:
+                    remaining[name] = cursor
+            data[name] = {
+                'fields': list(fields),
+                'rows': rows,
+                'deleted': sorted(deleted.get(kind, ())),
+            }
+
+        self.remaining = remaining
+        data['watermark'] = None if remaining else encode_watermark(self.until - SYNC_OVERLAP)
+        return data
+
+    def next_cursor(self):
+        if not self.remaining:
+            return None
+        since = self.since.isoformat() if self.since is not None else None
+        return encode_cursor([since, self.until.isoformat(), self.remaining])
@@ -1,3 +1,427 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.db import connection
+from rest_framework.test import APIClient
+
+from api.sync import encode_watermark
+from core.utils.csv_import import import_members_from_csv
+
+from core.models import Admin, Assembly, Cell, Member, Sermon, SermonAudioUpload, Tombstone, Unit
+
+
+class SermonApiTests(TestCase):
+    def setUp(self):
+        self.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        Sermon.objects.bulk_create(
+            Sermon(assembly=self.assembly, title=f'Sermon {index}', preacher='Pastor Ade',
+                   sermon_date=date(2024, 1, 1) + timedelta(days=index))
+            for index in range(45)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('reader', password='x'))
+
+    def test_list_is_paginated(self):
+        response = self.client.get('/api/api/sermons/', {'page_size': 10})
+        self.assertEqual(response.data['count'], 45)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['title'], 'Sermon 44')
+        self.assertEqual(len(self.client.get('/api/api/sermons/').data['results']), 20)
+
+    def test_unchanged_list_returns_304_until_a_sermon_changes(self):
+        response = self.client.get('/api/api/sermons/')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/api/sermons/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.client.get('/api/api/sermons/', {'page': 2},
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        Sermon.objects.filter(title='Sermon 3').delete()
+        self.assertEqual(self.client.get('/api/api/sermons/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_honours_if_modified_since(self):
+        sermon = Sermon.objects.get(title='Sermon 1')
+        response = self.client.get(f'/api/api/sermons/{sermon.pk}/')
+        self.assertEqual(self.client.get(
+            f'/api/api/sermons/{sermon.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        ).status_code, 304)
+
+    def test_renaming_the_assembly_changes_the_etags(self):
+        sermon = Sermon.objects.get(title='Sermon 1')
+        list_etag = self.client.get('/api/api/sermons/')['ETag']
+        detail_etag = self.client.get(f'/api/api/sermons/{sermon.pk}/')['ETag']
+
+        self.assembly.name = 'Main Assembly'
+        self.assembly.save()
+        response = self.client.get('/api/api/sermons/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['assembly_name'], 'Main Assembly')
+        self.assertEqual(self.client.get(f'/api/api/sermons/{sermon.pk}/',
+                                         HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+    def test_public_feed_is_cached_until_a_write(self):
+        anonymous = APIClient()
+        first = anonymous.get('/api/api/sermons/public/')
+        self.assertEqual([s['title'] for s in first.data], [f'Sermon {n}' for n in range(44, 39, -1)])
+
+        with CaptureQueriesContext(connection) as queries:
+            again = anonymous.get('/api/api/sermons/public/')
+            cached = anonymous.get('/api/api/sermons/public/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(again.data, first.data)
+        self.assertEqual(cached.status_code, 304)
+
+        Sermon.objects.create(assembly=self.assembly, title='New', preacher='Pastor Ade',
+                              sermon_date=date(2025, 1, 1))
+        fresh = anonymous.get('/api/api/sermons/public/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.data[0]['title'], 'New')
+
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ALLOWED_HOSTS=['a.example', 'b.example'])
+    def test_cached_feed_links_point_at_each_callers_host(self):
+        sermon = Sermon.objects.create(assembly=self.assembly, title='Audio', preacher='Pastor Ade',
+                                       sermon_date=date(2025, 1, 1))
+        sermon.audio_file.save('grace.mp3', ContentFile(b'ID3'))
+        anonymous = APIClient()
+        first = anonymous.get('/api/api/sermons/public/', HTTP_HOST='a.example')
+        second = anonymous.get('/api/api/sermons/public/', HTTP_HOST='b.example',
+                               HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        for response, host in ((first, 'a.example'), (second, 'b.example')):
+            self.assertEqual(response.data[0]['audio_url'],
+                             f'http://{host}/api/api/sermons/{sermon.pk}/audio/')
+            self.assertTrue(response.data[0]['audio_file'].startswith(f'http://{host}/'))
+        self.assertIsNone(second.data[1]['audio_url'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SermonAudioTests(TestCase):
+    AUDIO = bytes(range(256)) * 40
+
+    def setUp(self):
+        assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        self.sermon = Sermon.objects.create(assembly=assembly, title='Grace', preacher='Pastor Ade',
+                                            sermon_date=date(2024, 1, 7))
+        self.url = f'/api/api/sermons/{self.sermon.pk}/audio/'
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('reader', password='x'))
+
+    def attach_audio(self):
+        self.sermon.audio_file.save('grace.mp3', ContentFile(self.AUDIO))
+
+    def test_ranges_let_players_seek(self):
+        self.attach_audio()
+        full = self.client.get(self.url, HTTP_ACCEPT='audio/mpeg')
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+        self.assertEqual(full['Content-Type'], 'audio/mpeg')
+        self.assertEqual(b''.join(full.streaming_content), self.AUDIO)
+
+        part = self.client.get(self.url, HTTP_RANGE='bytes=1000-1999')
+        self.assertEqual(part.status_code, 206)
+        self.assertEqual(part['Content-Range'], f'bytes 1000-1999/{len(self.AUDIO)}')
+        self.assertEqual(part['Content-Length'], '1000')
+        self.assertEqual(b''.join(part.streaming_content), self.AUDIO[1000:2000])
+
+        tail = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(tail.streaming_content), self.AUDIO[-10:])
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=99999-').status_code, 416)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=full['ETag']).status_code, 304)
+
+    def test_sendfile_offloading(self):
+        self.attach_audio()
+        with self.settings(SENDFILE_BACKEND='nginx'):
+            response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.sermon.audio_file.name}')
+        with self.settings(SENDFILE_BACKEND='apache'):
+            self.assertEqual(self.client.get(self.url)['X-Sendfile'], self.sermon.audio_file.path)
+
+    def test_missing_audio_is_404(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def put_chunk(self, upload_id, start, end):
+        return self.client.generic(
+            'PUT', f'{self.url}uploads/{upload_id}/', self.AUDIO[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.AUDIO)}',
+        )
+
+    @override_settings(SERMON_AUDIO_CHUNK_SIZE=4096)
+    def test_chunked_upload_resumes_from_the_server_offset(self):
+        response = self.client.post(f'{self.url}uploads/', {'filename': 'grace.mp3', 'size': len(self.AUDIO)})
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+
+        self.assertEqual(self.put_chunk(upload_id, 0, 4095).data['offset'], 4096)
+        # A retried or out-of-order chunk is refused with the offset to resume from
+        conflict = self.put_chunk(upload_id, 0, 4095)
+        self.assertEqual((conflict.status_code, conflict.data['offset']), (409, 4096))
+        self.assertEqual(self.put_chunk(upload_id, 4096, 9999).status_code, 413)
+        self.assertEqual(self.client.get(f'{self.url}uploads/{upload_id}/').data['offset'], 4096)
+
+        self.put_chunk(upload_id, 4096, 8191)
+        done = self.put_chunk(upload_id, 8192, len(self.AUDIO) - 1)
+        self.assertTrue(done.data['complete'])
+        self.sermon.refresh_from_db()
+        with self.sermon.audio_file.open('rb') as audio:
+            self.assertEqual(audio.read(), self.AUDIO)
+        self.assertFalse(SermonAudioUpload.objects.exists())
+        self.assertFalse(os.listdir(os.path.join(self.sermon.audio_file.storage.location, 'sermons', 'uploads')))
+
+    @override_settings(SERMON_AUDIO_MAX_SIZE=1000)
+    def test_upload_size_and_type_are_validated(self):
+        start = self.client.post(f'{self.url}uploads/', {'filename': 'grace.mp3', 'size': 5000})
+        self.assertEqual(start.status_code, 400)
+        start = self.client.post(f'{self.url}uploads/', {'filename': 'grace.exe', 'size': 10})
+        self.assertEqual(start.status_code, 400)
+        response = self.client.patch(
+            f'/api/api/sermons/{self.sermon.pk}/',
+            {'audio_file': ContentFile(self.AUDIO, name='grace.mp3')}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class SermonSearchTests(TestCase):
+    def setUp(self):
+        assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        sermons = [
+            ('Born again', 'Pastor Ade', 'John 3:16', 'God so loved the world'),
+            ('New birth', 'Pastor John Okon', 'John 3:1-8', 'Nicodemus at night'),
+            ('Love never fails', 'Pastor Ade', '1 Cor 13', 'Faith, hope and love'),
+            ('Heroes of faith', 'Pastor Bola', 'Hebrews 11:1-6; 12:1-2', 'Faith is the substance'),
+            ('The vine', 'Pastor Bola', 'John 15:1-8', 'Abide in me'),
+        ]
+        for index, (title, preacher, passage, notes) in enumerate(sermons):
+            Sermon.objects.create(assembly=assembly, title=title, preacher=preacher, bible_passage=passage,
+                                  notes=notes, sermon_date=date(2024, 1, 1) + timedelta(days=index))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('reader', password='x'))
+
+    def titles(self, query, **params):
+        response = self.client.get('/api/api/sermons/', {'search': query, **params})
+        return [sermon['title'] for sermon in response.data['results']]
+
+    def test_chapter_matches_verses_in_it(self):
+        self.assertEqual(self.titles('John 3'), ['New birth', 'Born again'])
+        self.assertEqual(self.titles('John 3:5'), ['New birth'])
+        self.assertEqual(self.titles('Heb 12'), ['Heroes of faith'])
+
+    def test_words_are_ranked(self):
+        titles = self.titles('faith')
+        self.assertEqual(titles[0], 'Heroes of faith')
+        self.assertEqual(set(titles), {'Heroes of faith', 'Love never fails'})
+        self.assertEqual(self.titles('faith', ordering='sermon_date'), ['Love never fails', 'Heroes of faith'])
+        # Book names are indexed in full, so abbreviations in the passage still match
+        self.assertEqual(self.titles('corinthians'), ['Love never fails'])
+        self.assertEqual(set(self.titles('john')), {'New birth', 'Born again', 'The vine'})
+
+    def test_references_and_words_combine(self):
+        self.assertEqual(self.titles('John 3 Okon'), ['New birth'])
+        self.assertEqual(self.titles('abide John 3'), [])
+
+    def test_passage_index_follows_edits(self):
+        sermon = Sermon.objects.get(title='The vine')
+        sermon.bible_passage = 'Psalm 23'
+        sermon.save()
+        self.assertEqual(self.titles('Ps 23:1'), ['The vine'])
+        self.assertEqual(self.titles('John 15'), [])
+
+
+class MemberApiTests(TestCase):
+    def setUp(self):
+        self.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        other = Assembly.objects.create(name='Other', street_address='x', city='Ondo', state='Ondo')
+        self.cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+        self.unit = Unit.objects.create(name='Choir')
+        Member.objects.bulk_create(
+            Member(assembly=self.assembly, cell=self.cell if index % 2 else None, unit=self.unit,
+                   first_name=f'Bola{index:02}', last_name='Ajayi', gender='F')
+            for index in range(30)
+        )
+        Member.objects.create(assembly=other, first_name='Elsewhere', last_name='Ajayi', gender='M')
+        self.superadmin = self.make_admin('SUPERADMIN')
+        self.client = APIClient()
+        self.client.force_authenticate(self.superadmin.user_account)
+
+    def make_admin(self, level, cell=None):
+        member = Member.objects.create(assembly=self.assembly, first_name=level, last_name='Admin', gender='M')
+        admin = Admin(member=member, assembly=self.assembly, level=level, cell=cell)
+        admin.save()
+        return admin
+
+    def test_sparse_fields_select_only_what_is_asked(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/api/members/', {'fields': 'id,full_name,cell_name', 'page_size': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'full_name', 'cell_name'})
+        member_query = queries.captured_queries[-1]['sql']
+        self.assertIn('JOIN "core_cell"', member_query)
+        self.assertNotIn('"core_member"."email"', member_query)
+        self.assertNotIn('core_unit', member_query)
+        self.assertEqual(self.client.get('/api/api/members/', {'fields': 'id,password'}).status_code, 400)
+
+    def test_cursor_pages_cover_every_member_once(self):
+        seen = []
+        url = '/api/api/members/?page_size=7&fields=id'
+        while url:
+            data = self.client.get(url).data
+            seen.extend(member['id'] for member in data['results'])
+            url = data['next']
+        expected = self.superadmin.get_managed_members().values_list('id', flat=True)
+        self.assertEqual(sorted(seen), sorted(expected))
+        self.assertEqual(len(seen), 31)
+
+    def test_batch_lookup_by_ids(self):
+        ids = list(Member.objects.values_list('id', flat=True)[:3])
+        elsewhere = Member.objects.get(first_name='Elsewhere').pk
+        response = self.client.get('/api/api/members/', {'ids': ','.join(map(str, ids + [elsewhere]))})
+        self.assertEqual(sorted(m['id'] for m in response.data['results']), sorted(ids))
+        for bad in ('1,x', '0', '-3', '99999999999999999999999'):
+            self.assertEqual(self.client.get('/api/api/members/', {'ids': bad}).status_code, 400)
+
+    def test_cell_admin_sees_only_their_cell(self):
+        self.client.force_authenticate(self.make_admin('Cell', cell=self.cell).user_account)
+        members = self.client.get('/api/api/members/', {'page_size': 100}).data['results']
+        self.assertTrue(members)
+        self.assertEqual({m['cell'] for m in members}, {self.cell.pk})
+        self.assertEqual([c['id'] for c in self.client.get('/api/api/cells/').data['results']], [self.cell.pk])
+        self.assertEqual(len(self.client.get('/api/api/units/').data['results']), 1)
+        self.assertEqual([a['name'] for a in self.client.get('/api/api/assemblies/').data['results']], ['Main'])
+
+    def test_requires_an_admin_profile(self):
+        self.client.force_authenticate(User.objects.create_user('reader', password='x'))
+        self.assertEqual(self.client.get('/api/api/members/').status_code, 403)
+
+
+class SyncApiTests(TestCase):
+    def setUp(self):
+        self.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        self.cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+        self.other_cell = Cell.objects.create(name='Oba Ile', created_at='2024-01-01')
+        Unit.objects.create(name='Choir')
+        for index in range(5):
+            Member.objects.create(assembly=self.assembly, cell=self.cell, first_name=f'Tola{index}',
+                                  last_name='Bello', gender='F')
+        Sermon.objects.create(assembly=self.assembly, title='Faith', preacher='Pastor Ade',
+                              sermon_date=date(2024, 1, 7))
+        member = Member.objects.create(assembly=self.assembly, first_name='Super', last_name='Admin', gender='M')
+        self.superadmin = Admin(member=member, assembly=self.assembly, level='SUPERADMIN')
+        self.superadmin.save()
+        yesterday = timezone.now() - timedelta(days=1)
+        for model in (Member, Cell, Unit, Sermon):
+            model.objects.update(updated_at=yesterday)
+        self.client = APIClient()
+        self.client.force_authenticate(self.superadmin.user_account)
+
+    def sync(self, **params):
+        response = self.client.get('/api/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_download_then_only_changes(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['members']['rows']), 6)
+        self.assertEqual(len(data['cells']['rows']), 2)
+        self.assertEqual(len(data['sermons']['rows']), 1)
+        self.assertIsNone(data['next'])
+
+        member = Member.objects.get(first_name='Tola0')
+        member.phone = '0800'
+        member.save()
+        delta = self.sync(since=data['watermark'])
+        self.assertFalse(delta['reset'])
+        fields = delta['members']['fields']
+        self.assertEqual([row[fields.index('id')] for row in delta['members']['rows']], [member.pk])
+        self.assertEqual(delta['members']['rows'][0][fields.index('phone')], '0800')
+        self.assertEqual(delta['cells']['rows'], [])
+
+    def test_deletions_come_back_as_tombstones(self):
+        watermark = self.sync()['watermark']
+        member = Member.objects.get(first_name='Tola1')
+        member_id = member.pk
+        cell_id = self.other_cell.pk
+        member.delete()
+        self.other_cell.delete()
+        data = self.sync(since=watermark)
+        self.assertEqual(data['members']['deleted'], [member_id])
+        self.assertEqual(data['cells']['deleted'], [cell_id])
+
+    def test_member_leaving_a_cell_is_removed_for_that_cell(self):
+        member = Member.objects.create(assembly=self.assembly, first_name='Cell', last_name='Leader', gender='M')
+        leader = Admin(member=member, assembly=self.assembly, level='Cell', cell=self.cell)
+        leader.save()
+        self.client.force_authenticate(leader.user_account)
+        watermark = self.sync()['watermark']
+
+        mover = Member.objects.get(first_name='Tola2')
+        mover.cell = self.other_cell
+        mover.save()
+        self.assertEqual(self.sync(since=watermark)['members']['deleted'], [mover.pk])
+
+        # Still in the superadmin's assembly, so not a deletion there
+        self.client.force_authenticate(self.superadmin.user_account)
+        self.assertEqual(self.sync(since=watermark)['members']['deleted'], [])
+
+    def test_member_moved_by_a_csv_reimport_is_removed_for_the_old_cell(self):
+        Assembly.objects.filter(pk=self.assembly.pk).update(name='Ifelodun Assembly')
+        Member.objects.filter(first_name='Tola3').update(phone='0803')
+        member = Member.objects.create(assembly=self.assembly, first_name='Cell', last_name='Leader', gender='M')
+        leader = Admin(member=member, assembly=self.assembly, level='Cell', cell=self.cell)
+        leader.save()
+        self.client.force_authenticate(leader.user_account)
+        watermark = self.sync()['watermark']
+
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='', encoding='utf-8') as file:
+            file.write('Surname,Other Names 1,Gender,Phone,Cell\nBello,Tola3,F,0803,Oba-Ile\n')
+        self.addCleanup(os.remove, path)
+        self.assertEqual(import_members_from_csv(path), (0, 1))
+
+        mover = Member.objects.get(first_name='Tola3')
+        self.assertEqual(mover.cell.name, 'Oba-Ile')
+        self.assertEqual(self.sync(since=watermark)['members']['deleted'], [mover.pk])
+
+    def test_pruning_keeps_what_incremental_clients_can_still_ask_for(self):
+        from django.core.management import call_command
+
+        watermark = encode_watermark(timezone.now() - timedelta(days=80))
+        Tombstone.objects.create(kind='member', object_id=998, assembly_id=self.assembly.pk,
+                                 deleted_at=timezone.now() - timedelta(days=100))
+        Tombstone.objects.create(kind='member', object_id=999, assembly_id=self.assembly.pk,
+                                 deleted_at=timezone.now() - timedelta(days=70))
+        call_command('prune_tombstones', stdout=io.StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [999])
+        self.assertEqual(self.sync(since=watermark)['members']['deleted'], [999])
+
+    def test_large_syncs_come_in_batches(self):
+        seen = []
+        url = '/api/api/sync/'
+        with mock.patch('api.sync.SYNC_BATCH_SIZE', 2):
+            while url:
+                data = self.client.get(url).data
+                seen.extend(row[0] for row in data['members']['rows'])
+                self.assertEqual(data['watermark'] is None, data['next'] is not None)
+                url = data['next']
+        self.assertEqual(sorted(seen), sorted(Member.objects.values_list('id', flat=True)))
+
+    def test_expired_or_invalid_watermarks(self):
+        expired = encode_watermark(timezone.now() - timedelta(days=365))
+        self.assertTrue(self.sync(since=expired)['reset'])
+        self.assertEqual(self.client.get('/api/api/sync/', {'since': 'nonsense'}).status_code, 400)
@@ -4,8 +4,13 @@ from . import views
 
 router = DefaultRouter()
 router.register(r"sermons", views.SermonViewSet)
+router.register(r"members", views.MemberViewSet, basename="member")
+router.register(r"assemblies", views.AssemblyViewSet, basename="assembly")
+router.register(r"cells", views.CellViewSet, basename="cell")
+router.register(r"units", views.UnitViewSet, basename="unit")
 
 urlpatterns = [
+    path("api/sync/", views.sync, name="api_sync"),
     path("api/", include(router.urls)),
     path("auth/register/", views.register_user, name="api_register"),
     path("auth/login/", views.login_user, name="api_login"),
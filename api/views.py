@@ -1,3 +1,5 @@
+import json
+
 from django.shortcuts import render
 
 from rest_framework.authtoken.models import Token
@@ -7,10 +9,37 @@ from rest_framework.response import Response
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from rest_framework import viewsets, filters, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.cache import cache
 from core.models import Sermon
-from .serializers import SermonSerializer
+from core.sermons import (
+    SERMON_CACHE_TIMEOUT, ChunkTooLarge, OffsetMismatch, append_chunk, audio_response,
+    get_sermon_version, start_upload, upload_chunk_size,
+)
+from .conditional import ConditionalGetMixin, make_etag, not_modified, set_validators
+from .filters import IdsFilter, SermonSearchFilter
+from .pagination import KeysetCursorPagination, SermonPagination
+from .permissions import IsChurchAdmin, scoped_queryset
+from .serializers import (
+    AssemblySerializer, CellSerializer, MemberSerializer, SermonSerializer, UnitSerializer,
+)
+from .sync import InvalidToken, SyncBatch, decode_watermark
+
+PUBLIC_FEED_SIZE = 5
+RECENT_FEED_SIZE = 10
+# Cached feeds store these relative to the host
+FEED_URL_FIELDS = ('audio_file', 'audio_url')
+
+UPLOAD_ID_PATTERN = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+
+
+class AnyMediaRenderer(JSONRenderer):
+    """Lets audio players that do not accept JSON through content negotiation"""
+    media_type = '*/*'
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -113,16 +142,20 @@ def logout_user(request):
 
 
 
-class SermonViewSet(viewsets.ModelViewSet):
+class SermonViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Sermon.objects.all().select_related('assembly')
     serializer_class = SermonSerializer
+    pagination_class = SermonPagination
     permission_classes = [IsAuthenticated]  # Require authentication for all actions
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, SermonSearchFilter]
     filterset_fields = ['assembly', 'preacher', 'sermon_date']
     search_fields = ['title', 'preacher', 'bible_passage', 'notes']
     ordering_fields = ['sermon_date', 'created_at', 'title']
-    ordering = ['-sermon_date']
+    # id breaks ties so pages do not overlap
+    ordering = ['-sermon_date', '-id']
+    # assembly_name is part of every sermon
+    related_last_modified = ('assembly',)
     
     # Optional: Allow read-only access for unauthenticated users
     # permission_classes = [IsAuthenticatedOrReadOnly]
@@ -130,17 +163,187 @@ class SermonViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         # You can add custom logic here, like setting the user who created the sermon
         serializer.save()
+
+    def _feed(self, request, name, size):
+        """
+        The newest ``size`` sermons, serialized once per sermon version and
+        shared by every caller until a sermon or assembly is written.
+
+        The cached copy holds relative URLs, so that the host of whoever
+        filled the cache is not served to everyone else; each response
+        makes them absolute for its own host.
+        """
+        cache_key = f'sermons:{name}:{get_sermon_version()}'
+        cached = cache.get(cache_key)
+        if cached is None:
+            sermons = self.get_queryset().order_by('-sermon_date', '-id')[:size]
+            data = list(SermonSerializer(sermons, many=True, context={'request': None}).data)
+            digest = make_etag(json.dumps(data, sort_keys=True, default=str))
+            cached = (digest, data)
+            cache.set(cache_key, cached, SERMON_CACHE_TIMEOUT)
+
+        digest, data = cached
+        etag = make_etag(digest, self._format(request), request.build_absolute_uri('/'))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        data = [
+            {
+                **sermon,
+                **{field: request.build_absolute_uri(sermon[field])
+                   for field in FEED_URL_FIELDS if sermon.get(field)},
+            }
+            for sermon in data
+        ]
+        return set_validators(Response(data), etag)
     
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def public(self, request):
         """Public endpoint that doesn't require authentication"""
-        recent_sermons = Sermon.objects.all().order_by('-sermon_date')[:5]
-        serializer = self.get_serializer(recent_sermons, many=True)
-        return Response(serializer.data)
+        return self._feed(request, 'public', PUBLIC_FEED_SIZE)
     
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Protected endpoint - requires authentication"""
-        recent_sermons = Sermon.objects.all().order_by('-sermon_date')[:10]
-        serializer = self.get_serializer(recent_sermons, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return self._feed(request, 'recent', RECENT_FEED_SIZE)
+
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, AnyMediaRenderer])
+    def audio(self, request, pk=None):
+        """Stream the sermon's audio; Range requests let players seek"""
+        sermon = self.get_object()
+        try:
+            return audio_response(request._request, sermon)
+        except FileNotFoundError:
+            return Response(
+                {'error': 'This sermon has no audio'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+    def _upload_payload(self, upload):
+        return {
+            'id': str(upload.pk),
+            'filename': upload.filename,
+            'size': upload.size,
+            'offset': upload.received,
+            'chunk_size': upload_chunk_size(),
+        }
+
+    @action(detail=True, methods=['post'], url_path='audio/uploads')
+    def start_audio_upload(self, request, pk=None):
+        """
+        Begin a chunked audio upload. Send {"filename", "size"}; then PUT
+        each chunk to audio/uploads/<id>/ with a Content-Range header.
+        """
+        sermon = self.get_object()
+        try:
+            size = int(request.data.get('size') or 0)
+            upload = start_upload(
+                sermon, request.data.get('filename') or '', size, user=request.user
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self._upload_payload(upload), status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get', 'put'], url_path=f'audio/uploads/(?P<upload_id>{UPLOAD_ID_PATTERN})')
+    def audio_upload(self, request, pk=None, upload_id=None):
+        """
+        GET: the offset to resume from. PUT: one chunk as the raw body.
+        The last chunk attaches the file to the sermon and ends the upload.
+        """
+        sermon = self.get_object()
+        upload = sermon.audio_uploads.filter(pk=upload_id).first()
+        if upload is None:
+            return Response(
+                {'error': 'Upload not found; it may have finished or expired'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if request.method == 'GET':
+            return Response(self._upload_payload(upload))
+
+        try:
+            offset = append_chunk(upload, request.headers.get('Content-Range'), request._request)
+        except OffsetMismatch as e:
+            return Response({'error': str(e), 'offset': e.expected}, status=status.HTTP_409_CONFLICT)
+        except ChunkTooLarge as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if offset < upload.size:
+            return Response(self._upload_payload(upload))
+        sermon.refresh_from_db()
+        return Response({'complete': True, 'sermon': self.get_serializer(sermon).data})
+
+
+class ChurchDataViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only API over one table, scoped to the caller's Admin profile.
+    ``?fields=`` picks the fields returned, and with them the columns and
+    joins queried; ``?ids=`` fetches a batch by id; lists page by cursor.
+    """
+    permission_classes = [IsChurchAdmin]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [DjangoFilterBackend, IdsFilter]
+    # Cursor order; must end in a unique field
+    keyset_ordering = ('name', 'id')
+
+    def requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = self.get_serializer_class().parse_fields(
+                self.request.query_params.get('fields')
+            )
+        return self._requested_fields
+
+    def get_queryset(self):
+        serializer_class = self.get_serializer_class()
+        queryset = scoped_queryset(serializer_class.Meta.model, self.request.user.admin_account)
+        return serializer_class.optimize(queryset, self.requested_fields(), self.keyset_ordering)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class MemberViewSet(ChurchDataViewSet):
+    serializer_class = MemberSerializer
+    filterset_fields = ['assembly', 'cell', 'unit', 'gender', 'membership_status']
+    keyset_ordering = ('last_name', 'first_name', 'id')
+
+
+class AssemblyViewSet(ChurchDataViewSet):
+    serializer_class = AssemblySerializer
+
+
+class CellViewSet(ChurchDataViewSet):
+    serializer_class = CellSerializer
+
+
+class UnitViewSet(ChurchDataViewSet):
+    serializer_class = UnitSerializer
+
+
+@api_view(['GET'])
+@permission_classes([IsChurchAdmin])
+def sync(request):
+    """
+    Members, cells, units and sermons changed since ``?since=<watermark>``,
+    with the ids deleted since then; see ``api.sync``. Follow ``next`` until
+    it is null, then keep ``watermark`` for the next sync.
+    """
+    admin = request.user.admin_account
+    try:
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            batch = SyncBatch.from_cursor(admin, cursor)
+        else:
+            since = request.query_params.get('since')
+            batch = SyncBatch(admin, decode_watermark(since) if since else None)
+    except InvalidToken as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = batch.payload()
+    next_cursor = batch.next_cursor()
+    data['next'] = None
+    if next_cursor is not None:
+        data['next'] = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+    return Response(data)
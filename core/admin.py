@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.db.models import Count
+from django.utils import timezone
 from .models import Assembly, Unit, Member, Cell, Admin
 
 class UnitMemberInline(admin.TabularInline):
@@ -398,11 +399,11 @@ def make_inactive(modeladmin, request, queryset):
 make_inactive.short_description = "Mark selected as inactive"
 
 def mark_as_active_members(modeladmin, request, queryset):
-    queryset.update(membership_status='ACTIVE')
+    queryset.update(membership_status='ACTIVE', updated_at=timezone.now())
 mark_as_active_members.short_description = "Mark selected members as ACTIVE"
 
 def mark_as_inactive_members(modeladmin, request, queryset):
-    queryset.update(membership_status='INACTIVE')
+    queryset.update(membership_status='INACTIVE', updated_at=timezone.now())
 mark_as_inactive_members.short_description = "Mark selected members as INACTIVE"
 
 # Add custom actions to models
@@ -1,4 +1,6 @@
 from django import forms
+from . import lookups
+from .forms import MemberAutocompleteSelect
 from .models import Admin, Member, Assembly, Cell
 
 
@@ -12,22 +14,27 @@ class AdminForm(forms.ModelForm):
             "level": forms.Select(choices=Admin.ADMIN_TYPE_CHOICES),
             "assembly": forms.Select(attrs={"class": "form-control"}),
             "cell": forms.Select(attrs={"class": "form-control"}),
-            "member": forms.Select(attrs={"class": "form-control"}),
+            "member": MemberAutocompleteSelect(
+                attrs={"class": "form-control"}, exclude_admins=True
+            ),
         }
 
     def __init__(self, *args, **kwargs):
         self.current_user = kwargs.pop("current_user", None)
         super().__init__(*args, **kwargs)
 
-        # Set up querysets - remove invalid select_related
+        # Set up querysets; member options come from the autocomplete endpoint
         self.fields["member"].queryset = Member.objects.all()
         self.fields["assembly"].queryset = Assembly.objects.all()
         self.fields["cell"].queryset = Cell.objects.all()
+        lookups.use_cached_choices(self.fields["assembly"], "assembly")
+        lookups.use_cached_choices(self.fields["cell"], "cell")
 
         # Add CSS classes to all fields
         for field_name, field in self.fields.items():
             if field_name != "level":  # level already has choices
                 field.widget.attrs["class"] = "form-control"
+        self.fields["member"].widget.attrs["class"] += " member-autocomplete"
 
     def clean(self):
         cleaned_data = super().clean()
@@ -106,3 +113,7 @@ class AdminFilterForm(forms.Form):
             attrs={"class": "form-control", "placeholder": "Search by name..."}
         ),
     )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        lookups.use_cached_choices(self.fields["cell"], "cell")
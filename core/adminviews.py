@@ -7,6 +7,7 @@ from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 from .models import Admin, Member, Assembly, Cell
+from . import lookups
 from .adminforms import AdminForm, AdminLevelChangeForm, AdminFilterForm
 
 
@@ -68,7 +69,7 @@ class AdminListView(SuperAdminRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context["filter_form"] = AdminFilterForm(self.request.GET)
         context["total_count"] = self.get_queryset().count()
-        context["assemblies"] = Assembly.objects.all()  # Add assemblies for filter
+        context["assemblies"] = lookups.options("assembly")  # Add assemblies for filter
         return context
 
 
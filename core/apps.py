@@ -6,3 +6,6 @@ class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
     verbose_name = "Church Management"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,90 @@
+"""
+Latency and query-count benchmark for the main views.
+
+``measure_views`` drives each scenario through the Django test client
+against whatever is in the database and reports p50/p95 latency and query
+counts. The ``benchmark_views`` command runs it on a throwaway test database
+filled by ``core.utils.fakedata`` at several member counts.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .metrics import percentile
+from .models import Admin, Assembly, Cell, Committee, Member, Unit
+
+
+def scenarios():
+    """(name, url) pairs covering the main views and each member_list filter"""
+    assembly = Assembly.objects.order_by('id').first()
+    cell = Cell.objects.order_by('id').first()
+    unit = Unit.objects.order_by('id').first()
+    committee = Committee.objects.order_by('id').first()
+    member = Member.objects.order_by('id').first()
+    member_list = reverse('member_list')
+
+    urls = [
+        ('dashboard', reverse('dashboard')),
+        ('member_list', member_list),
+        ('member_list paging=keyset', f'{member_list}?paging=keyset'),
+        ('member_list gender', f'{member_list}?gender=F'),
+        ('member_list status', f'{member_list}?status=ACTIVE'),
+        ('member_list month', f'{member_list}?month=3'),
+        ('member_list unit=None', f'{member_list}?unit=None'),
+        ('member_list cell=None', f'{member_list}?cell=None'),
+        ('inventory_dashboard', reverse('inventory_dashboard')),
+        ('sermon api list', reverse('sermon-list')),
+        ('sermon api public', reverse('sermon-public')),
+    ]
+    if assembly:
+        urls.append(('member_list assembly', f'{member_list}?assembly={assembly.id}'))
+    if unit:
+        urls.append(('member_list unit', f'{member_list}?unit={unit.id}'))
+    if cell:
+        urls.append(('member_list cell', f'{member_list}?cell={cell.id}'))
+    if member:
+        urls.append(('member_list search', f'{member_list}?search={member.last_name}'))
+        urls.append(('ajax_search', f'{reverse("ajax_search")}?q={member.first_name[:3]}'))
+    if committee:
+        urls.append(('committee_detail', reverse('committee-detail', args=[committee.id])))
+    return urls
+
+
+def measure_views(repeat=5, client=None):
+    """
+    Request every scenario ``repeat`` times as a superadmin and return
+    ``{name: {"status", "p50_ms", "p95_ms", "queries"}}``.
+    """
+    if client is None:
+        admin = Admin.objects.filter(level='SUPERADMIN').select_related('user_account').first()
+        if admin is None:
+            raise ValueError('A superadmin is needed to benchmark the views.')
+        client = Client()
+        client.force_login(admin.user_account)
+
+    # Start cold so the first request pays for the statistics snapshot
+    cache.clear()
+    results = {}
+    for name, url in scenarios():
+        timings = []
+        queries = 0
+        status = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            status = response.status_code
+            queries = max(queries, len(captured))
+        timings.sort()
+        results[name] = {
+            'status': status,
+            'p50_ms': round(percentile(timings, 0.50), 1),
+            'p95_ms': round(percentile(timings, 0.95), 1),
+            'queries': queries,
+        }
+    return results
@@ -0,0 +1,99 @@
+"""
+Birthday lookups on the denormalized ``Member.birth_month`` / ``birth_day``
+columns.
+
+"The next N days" is a window of (month, day) pairs. It becomes one range
+over the (birth_month, birth_day) indexes, or two ranges joined with OR when
+the window runs past 31 December. That way the database reads only the
+matching index entries and never calls strftime on every row.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.db.models import Q
+
+MAX_DAYS = 366
+BACKFILL_BATCH_SIZE = 2000
+
+
+def _from(month, day):
+    return Q(birth_month__gt=month) | Q(birth_month=month, birth_day__gte=day)
+
+
+def _until(month, day):
+    return Q(birth_month__lt=month) | Q(birth_month=month, birth_day__lte=day)
+
+
+def window_filter(start, days):
+    """Q matching birthdays from ``start`` through ``days`` days later"""
+    days = max(0, min(days, MAX_DAYS))
+    end = start + timedelta(days=days)
+    if days >= 365:
+        return Q(birth_month__isnull=False)
+    end_month, end_day = end.month, end.day
+    if (end_month, end_day) == (2, 28) and not calendar.isleap(end.year):
+        # 29 February birthdays fall on the 28th in other years (next_birthday)
+        end_day = 29
+    if (end_month, end_day) >= (start.month, start.day):
+        return _from(start.month, start.day) & _until(end_month, end_day)
+    # The window crosses the new year
+    return _from(start.month, start.day) | _until(end_month, end_day)
+
+
+def next_birthday(member, today):
+    """Date of the member's next birthday on or after today"""
+    for year in (today.year, today.year + 1):
+        try:
+            birthday = date(year, member.birth_month, member.birth_day)
+        except ValueError:
+            # 29 February outside a leap year
+            birthday = date(year, 2, 28)
+        if birthday >= today:
+            return birthday
+    return birthday
+
+
+def upcoming_birthdays(queryset, days, today=None):
+    """
+    Members of ``queryset`` with a birthday in the next ``days`` days, as
+    (member, next_birthday) pairs ordered by date.
+    """
+    today = today or date.today()
+    members = queryset.filter(window_filter(today, days)).order_by(
+        "birth_month", "birth_day", "first_name", "last_name"
+    )
+    found = [(member, next_birthday(member, today)) for member in members]
+    found.sort(key=lambda pair: pair[1])
+    return found
+
+
+def backfill_birthdays(model, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Fill birth_month/birth_day from date_of_birth where they disagree and
+    return the number of rows changed. ``model`` may be a historical model.
+    """
+    changed = model._default_manager.filter(date_of_birth__isnull=True).exclude(
+        birth_month__isnull=True, birth_day__isnull=True
+    ).update(birth_month=None, birth_day=None)
+
+    rows = (
+        model._default_manager.filter(date_of_birth__isnull=False)
+        .only("id", "date_of_birth", "birth_month", "birth_day")
+        .order_by("id")
+        .iterator(chunk_size=batch_size)
+    )
+    batch = []
+    for member in rows:
+        month, day = member.date_of_birth.month, member.date_of_birth.day
+        if (member.birth_month, member.birth_day) == (month, day):
+            continue
+        member.birth_month, member.birth_day = month, day
+        batch.append(member)
+        if len(batch) >= batch_size:
+            model._default_manager.bulk_update(batch, ["birth_month", "birth_day"])
+            changed += len(batch)
+            batch = []
+    if batch:
+        model._default_manager.bulk_update(batch, ["birth_month", "birth_day"])
+        changed += len(batch)
+    return changed
@@ -1,29 +1,73 @@
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.http import JsonResponse
+from django.db import transaction
 from django.views.decorators.http import require_http_methods
 from .models import Committee, CommitteeMembership, Member
 from .forms import CommitteeForm, CommitteeMembershipForm
-from django.db.models import Q
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from . import search as search_index
+
+COMMITTEE_PAGE_SIZE = 20
+ROLE_PREVIEW_SIZE = 3
+
+
+def _role_previews(committees):
+    """
+    Map committee id -> up to ROLE_PREVIEW_SIZE memberships that have a role,
+    fetched for the whole page in one windowed query.
+    """
+    ranked = CommitteeMembership.objects.filter(
+        committee__in=committees
+    ).exclude(role__isnull=True).exclude(role='').annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('committee_id')],
+            order_by=[F('role').asc(), F('id').asc()],
+        )
+    ).filter(position__lte=ROLE_PREVIEW_SIZE).select_related('member').only(
+        'committee_id', 'role', 'member__first_name', 'member__middle_name', 'member__last_name'
+    ).order_by('committee_id', 'position')
+
+    previews = {}
+    for membership in ranked:
+        previews.setdefault(membership.committee_id, []).append(membership)
+    return previews
+
 
 def committee_list(request):
-    committees = Committee.objects.all().prefetch_related('memberships__member')
-    
+    # Counts come from an annotation, so memberships are never loaded here
+    committees = Committee.objects.select_related('leader').only(
+        'id', 'name', 'description',
+        'leader__first_name', 'leader__middle_name', 'leader__last_name',
+    ).annotate(member_count=Count('memberships')).order_by('name', 'id')
+
     # Search
     search_query = request.GET.get('search')
     if search_query:
-        committees = committees.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
+        matching_ids = search_index.matching_ids(search_query, 'committee')
+        if matching_ids is not None:
+            committees = committees.filter(id__in=matching_ids)
+        else:
+            committees = committees.filter(
+                Q(name__icontains=search_query) |
+                Q(description__icontains=search_query)
+            )
+
     # Pagination
-    paginator = Paginator(committees, 20)
+    paginator = Paginator(committees, COMMITTEE_PAGE_SIZE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    
+
+    previews = _role_previews([committee.id for committee in page_obj])
+    for committee in page_obj:
+        committee.role_preview = previews.get(committee.id, [])
+
     context = {
         'page_obj': page_obj,
         'search_query': search_query or '',
@@ -33,14 +77,15 @@ def committee_list(request):
 def committee_detail(request, pk):
     committee = get_object_or_404(Committee, pk=pk)
     memberships = committee.memberships.all().select_related('member').order_by('member__last_name', 'member__first_name')
-    non_members = Member.objects.exclude(
-        id__in=committee.memberships.values_list('member__id', flat=True)).order_by('last_name', 'first_name'
-    )
-    
+    # Candidates are fetched through member_autocomplete; only check that some exist
+    has_candidates = Member.objects.exclude(
+        id__in=committee.memberships.values_list('member__id', flat=True)
+    ).exists()
+
     context = {
         'committee': committee,
         'memberships': memberships,
-        'non_members': non_members,
+        'has_candidates': has_candidates,
     }
     return render(request, 'committees/committee_detail.html', context)
 
@@ -139,7 +184,9 @@ def add_committee_member(request, committee_id):
 @require_http_methods(["POST"])
 def remove_committee_member(request, committee_id, membership_id):
     try:
-        membership = CommitteeMembership.objects.get(id=membership_id, committee_id=committee_id)
+        membership = CommitteeMembership.objects.select_related('member').get(
+            id=membership_id, committee_id=committee_id
+        )
         member_name = membership.member.get_full_name()
         membership.delete()
         
@@ -157,7 +204,9 @@ def remove_committee_member(request, committee_id, membership_id):
 @require_http_methods(["POST"])
 def update_member_role(request, committee_id, membership_id):
     try:
-        membership = CommitteeMembership.objects.get(id=membership_id, committee_id=committee_id)
+        membership = CommitteeMembership.objects.select_related('member').get(
+            id=membership_id, committee_id=committee_id
+        )
         role = request.POST.get('role', '')
         
         membership.role = role
@@ -173,6 +222,151 @@ def update_member_role(request, committee_id, membership_id):
             'message': 'Membership not found'
         }, status=404)
 
+BULK_MEMBERSHIP_LIMIT = 500
+ROLE_MAX_LENGTH = CommitteeMembership._meta.get_field('role').max_length
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_committee_members(request, committee_id):
+    """
+    Apply many membership changes to one committee in a single request.
+
+    The JSON body may contain:
+
+        {"add": [{"member_id": 1, "role": "Secretary"}, ...],
+         "remove": [<membership_id>, ...],
+         "roles": [{"membership_id": 4, "role": "Treasurer"}, ...]}
+
+    Every item is checked against the committee's memberships, which are
+    loaded once. The valid ones are then written in one transaction with a
+    bulk insert, a bulk update and a single delete. The response lists a
+    status for each item in request order.
+    """
+    try:
+        committee = Committee.objects.only('id').get(id=committee_id)
+    except Committee.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'message': 'Committee not found'
+        }, status=404)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict) or not all(
+        isinstance(payload.get(key, []), list) for key in ('add', 'remove', 'roles')
+    ):
+        return JsonResponse({
+            'success': False,
+            'message': 'Expected a JSON object with "add", "remove" and "roles" lists'
+        }, status=400)
+
+    adds = payload.get('add', [])
+    removes = payload.get('remove', [])
+    role_changes = payload.get('roles', [])
+    if len(adds) + len(removes) + len(role_changes) > BULK_MEMBERSHIP_LIMIT:
+        return JsonResponse({
+            'success': False,
+            'message': f'At most {BULK_MEMBERSHIP_LIMIT} changes can be sent at once'
+        }, status=400)
+
+    memberships = {
+        membership.id: membership
+        for membership in CommitteeMembership.objects.filter(committee=committee).only('id', 'member_id', 'role')
+    }
+    current_members = {membership.member_id for membership in memberships.values()}
+
+    # Removals
+    remove_results = []
+    remove_ids = set()
+    for item in removes:
+        membership_id = _as_id(item)
+        if membership_id in remove_ids:
+            status = 'duplicate'
+        elif membership_id not in memberships:
+            status = 'not_found'
+        else:
+            status = 'removed'
+            remove_ids.add(membership_id)
+        remove_results.append({'membership_id': item, 'status': status})
+    removed_members = {memberships[membership_id].member_id for membership_id in remove_ids}
+
+    # Additions; a member removed in the same batch may be added back
+    requested = {_as_id(item.get('member_id')) for item in adds if isinstance(item, dict)}
+    known_members = set(
+        Member.objects.filter(id__in=requested - {None}).values_list('id', flat=True)
+    )
+    add_results = []
+    new_memberships = []
+    seen = set()
+    for item in adds:
+        item = item if isinstance(item, dict) else {'member_id': item}
+        member_id = _as_id(item.get('member_id'))
+        role = item.get('role') or ''
+        if member_id is None or not isinstance(role, str) or len(role) > ROLE_MAX_LENGTH:
+            status = 'invalid'
+        elif member_id in seen:
+            status = 'duplicate'
+        elif member_id not in known_members:
+            status = 'not_found'
+        elif member_id in current_members - removed_members:
+            status = 'exists'
+        else:
+            status = 'added'
+            new_memberships.append(CommitteeMembership(committee=committee, member_id=member_id, role=role))
+        if member_id is not None:
+            seen.add(member_id)
+        add_results.append({'member_id': item.get('member_id'), 'status': status})
+
+    # Role changes
+    role_results = []
+    changed = {}
+    for item in role_changes:
+        item = item if isinstance(item, dict) else {}
+        membership_id = _as_id(item.get('membership_id'))
+        role = item.get('role') or ''
+        if membership_id is None or not isinstance(role, str) or len(role) > ROLE_MAX_LENGTH:
+            status = 'invalid'
+        elif membership_id in changed:
+            status = 'duplicate'
+        elif membership_id not in memberships:
+            status = 'not_found'
+        elif membership_id in remove_ids:
+            status = 'conflict'
+        else:
+            status = 'updated'
+            membership = memberships[membership_id]
+            membership.role = role
+            changed[membership_id] = membership
+        role_results.append({'membership_id': item.get('membership_id'), 'status': status})
+
+    with transaction.atomic():
+        if remove_ids:
+            CommitteeMembership.objects.filter(committee=committee, id__in=remove_ids).delete()
+        if new_memberships:
+            CommitteeMembership.objects.bulk_create(new_memberships, ignore_conflicts=True)
+        if changed:
+            CommitteeMembership.objects.bulk_update(changed.values(), ['role'])
+
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(new_memberships)} added, {len(remove_ids)} removed, {len(changed)} roles updated',
+        'results': {
+            'add': add_results,
+            'remove': remove_results,
+            'roles': role_results,
+        },
+    })
+
 @login_required
 @require_http_methods(["POST"])
 def set_committee_leader(request, committee_id):
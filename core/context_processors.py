@@ -1,28 +1,70 @@
-from .models import Member
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import SimpleLazyObject
+
+from . import lookups
+from .stats import get_stats
+
+
+def _admin_profile(request):
+    """Resolve the admin profile at most once per request"""
+    if not hasattr(request, "_admin_profile"):
+        try:
+            # Shares the instance (and its cached cell) with the view
+            request._admin_profile = request.user.admin_account
+        except ObjectDoesNotExist:
+            request._admin_profile = None
+    return request._admin_profile
+
+
 def admin_context(request):
-    """Add admin information to all templates"""
-    context = {}
-    
-    if request.user.is_authenticated:
-        
-        if hasattr(request.user, 'admin_account'):
-            admin_profile = request.user.admin_account
-
-            # Count members in the admin's cell if they are a cell admin
-            if admin_profile.is_cell_admin:
-                members_count = Member.objects.filter(cell=admin_profile.cell).count()
-            
-            context.update({
-                'admin_profile': admin_profile,
-                'is_superadmin': admin_profile.is_superadmin,
-                'is_cell_admin': admin_profile.is_cell_admin,
-                'is_moderator': admin_profile.is_moderator,
-                'is_inventory_admin':admin_profile.is_inventory_admin,
-                'has_cell_assignment': admin_profile.cell is not None,  # Add this
-                'admin_cell_name': admin_profile.cell.name if admin_profile.cell else 'No Cell Assigned',
-                'members_count': members_count if admin_profile.is_cell_admin else Member.objects.count(),
-            })
-        else:
-            print(f"DEBUG: No admin_account found for user {request.user.username}")  # Debug line
-    
-    return context
\ No newline at end of file
+    """
+    Add admin information to all templates.
+
+    Every value is lazy: nothing is queried until a template reads it, and the
+    context is built once per request so AJAX partials rendered with
+    ``render_to_string(..., request=request)`` reuse it. ``members_count``
+    comes from the cached statistics snapshot.
+    """
+    if not request.user.is_authenticated:
+        return {}
+
+    context = getattr(request, "_admin_context", None)
+    if context is not None:
+        return context
+
+    def profile():
+        return _admin_profile(request)
+
+    def flag(name):
+        return SimpleLazyObject(lambda: bool(profile() and getattr(profile(), name)))
+
+    def cell_name():
+        if profile() is None:
+            return ""
+        return profile().cell.name if profile().cell else "No Cell Assigned"
+
+    context = {
+        "admin_profile": SimpleLazyObject(profile),
+        "is_superadmin": flag("is_superadmin"),
+        "is_cell_admin": flag("is_cell_admin"),
+        "is_moderator": flag("is_moderator"),
+        "is_inventory_admin": flag("is_inventory_admin"),
+        "has_cell_assignment": SimpleLazyObject(
+            lambda: bool(profile() and profile().cell_id is not None)
+        ),
+        "admin_cell_name": SimpleLazyObject(cell_name),
+        "members_count": SimpleLazyObject(
+            lambda: get_stats(profile())["total_members"] if profile() else 0
+        ),
+    }
+    request._admin_context = context
+    return context
+
+
+def reference_data(request):
+    """
+    ``reference``: id -> name maps of assemblies, units and cells for the
+    request, e.g. ``{{ reference.assembly }}``. Each map is built from the
+    lookup cache the first time a template reads it.
+    """
+    return {"reference": lookups.for_request(request)}
@@ -1,24 +1,132 @@
 import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+from core import search
+from core.lookups import invalidate_lookups
+from core.stats import invalidate_stats
 from core.models import Assembly, Cell, Member
 
-def import_data_from_excel(file_path):
-    # Read the Excel file
-    df = pd.read_excel(file_path)
-
-    for index, row in df.iterrows():
-        # Create or get Assembly
-        assembly, created = Assembly.objects.get_or_create(name=row['Assembly'])
-        
-        # Create or get Cell
-        cell, created = Cell.objects.get_or_create(name=row['Cell'], assembly=assembly)
-        
-        # Create Member
-        member = Member(
-            first_name=row['First Name'],
-            last_name=row['Last Name'],
-            email=row['Email'],
-            phone=row['Phone'],
-            assembly=assembly,
-            cell=cell
+# Spreadsheet column -> normalized column
+EXCEL_COLUMNS = {
+    'First Name': 'first_name',
+    'Last Name': 'last_name',
+    'Email': 'email',
+    'Phone': 'phone',
+    'Assembly': 'assembly',
+    'Cell': 'cell',
+}
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def load_members_frame(file_path, sheet_name=0):
+    """Read the sheet and normalize every column with vectorized operations"""
+    df = pd.read_excel(file_path, sheet_name=sheet_name, dtype=str)
+    df.columns = [str(column).strip() for column in df.columns]
+
+    missing = [column for column in EXCEL_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    df = df[list(EXCEL_COLUMNS)].rename(columns=EXCEL_COLUMNS).fillna('')
+    for column in df.columns:
+        # Trim and collapse inner whitespace
+        df[column] = df[column].str.strip().str.replace(r'\s+', ' ', regex=True)
+
+    df['email'] = df['email'].str.lower()
+    # Numeric phone cells may come back as "8031234567.0"
+    df['phone'] = (
+        df['phone']
+        .str.replace(r'\.0$', '', regex=True)
+        .str.replace(r'[^\d+]', '', regex=True)
+    )
+    df['first_name'] = df['first_name'].str.slice(0, 100)
+    df['last_name'] = df['last_name'].str.slice(0, 100)
+    df['phone'] = df['phone'].str.slice(0, 20)
+
+    # Rows without any name are blank lines in the sheet
+    return df[(df['first_name'] != '') | (df['last_name'] != '')]
+
+
+def resolve_assemblies(names):
+    """Map assembly names to ids, creating the missing ones in one insert"""
+    ids = dict(Assembly.objects.values_list('name', 'id'))
+    missing = [Assembly(name=name) for name in names if name not in ids]
+    if missing:
+        Assembly.objects.bulk_create(missing)
+        search.index_objects(missing)
+        ids = dict(Assembly.objects.values_list('name', 'id'))
+    return ids, len(missing)
+
+
+def resolve_cells(names):
+    """Map cell names to ids, creating the missing ones in one insert"""
+    ids = dict(Cell.objects.values_list('name', 'id'))
+    today = timezone.now().date()
+    missing = [Cell(name=name, created_at=today) for name in names if name not in ids]
+    if missing:
+        Cell.objects.bulk_create(missing)
+        search.index_objects(missing)
+        ids = dict(Cell.objects.values_list('name', 'id'))
+    return ids, len(missing)
+
+
+def _insert_members(batch):
+    Member.objects.bulk_create(batch)
+    # bulk_create skips the save signals that maintain the search index
+    search.index_objects(batch)
+    return len(batch)
+
+
+def import_data_from_excel(file_path, batch_size=DEFAULT_BATCH_SIZE, sheet_name=0):
+    """
+    Import members from an Excel sheet.
+
+    Distinct assemblies and cells are resolved once per file, the foreign keys
+    are mapped onto the frame column-wise and members are bulk-inserted in
+    batches inside a single transaction. Rows without an assembly are skipped.
+    """
+    df = load_members_frame(file_path, sheet_name=sheet_name)
+
+    with transaction.atomic():
+        assembly_names = df.loc[df['assembly'] != '', 'assembly'].unique()
+        cell_names = df.loc[df['cell'] != '', 'cell'].unique()
+        assembly_ids, assemblies_created = resolve_assemblies(assembly_names)
+        cell_ids, cells_created = resolve_cells(cell_names)
+
+        df = df.assign(
+            assembly_id=df['assembly'].map(assembly_ids),
+            cell_id=df['cell'].map(cell_ids),
         )
-        member.save()
\ No newline at end of file
+        skipped = int(df['assembly_id'].isna().sum())
+        df = df[df['assembly_id'].notna()]
+
+        members = (
+            Member(
+                first_name=row.first_name,
+                last_name=row.last_name,
+                email=row.email,
+                phone=row.phone,
+                assembly_id=int(row.assembly_id),
+                cell_id=None if pd.isna(row.cell_id) else int(row.cell_id),
+            )
+            for row in df.itertuples(index=False)
+        )
+        members_created = 0
+        batch = []
+        for member in members:
+            batch.append(member)
+            if len(batch) >= batch_size:
+                members_created += _insert_members(batch)
+                batch = []
+        if batch:
+            members_created += _insert_members(batch)
+
+    invalidate_stats()
+    invalidate_lookups()
+    return {
+        'members_created': members_created,
+        'assemblies_created': assemblies_created,
+        'cells_created': cells_created,
+        'rows_skipped': skipped,
+    }
@@ -0,0 +1,158 @@
+"""
+Member filtering and export rows shared by member_list, member_export and
+the export background job.
+"""
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+from . import search as search_index
+from .models import Member
+from .utils.export import stream_csv, stream_xlsx
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = [
+    ("id", "ID"),
+    ("first_name", "First Name"),
+    ("middle_name", "Middle Name"),
+    ("last_name", "Last Name"),
+    ("gender", "Gender"),
+    ("marital_status", "Marital Status"),
+    ("date_of_birth", "Date of Birth"),
+    ("email", "Email"),
+    ("phone", "Phone"),
+    ("address", "Address"),
+    ("assembly_id", "Assembly"),
+    ("unit_id", "Unit"),
+    ("cell_id", "Cell"),
+    ("membership_status", "Membership Status"),
+    ("membership_date", "Membership Date"),
+    ("created_at", "Created At"),
+]
+
+# format -> (writer, content type)
+FORMATS = {
+    "csv": (stream_csv, "text/csv; charset=utf-8"),
+    "xlsx": (stream_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def can_export(admin_profile):
+    """Levels with member access; inventory admins have none"""
+    return (
+        admin_profile.is_superadmin
+        or admin_profile.is_moderator
+        or admin_profile.is_cell_admin
+    )
+
+
+def filter_members(params, admin_profile):
+    """
+    Members visible to the admin, narrowed by member_list's filters.
+    ``params`` is ``request.GET`` or any mapping with the same keys.
+    """
+    if admin_profile.is_superadmin:
+        members = (
+            Member.objects.all()
+            .select_related("assembly", "unit", "cell")
+            .order_by("first_name", "last_name")
+        )
+    elif admin_profile.is_cell_admin:
+        members = Member.objects.filter(cell=admin_profile.cell).order_by(
+            "first_name", "last_name"
+        )
+    elif admin_profile.is_moderator:
+        members = admin_profile.get_managed_members().order_by("first_name", "last_name")
+    else:
+        # Inventory admins have no member access
+        members = Member.objects.none()
+
+    # Filtering
+    assembly_id = params.get("assembly")
+    unit_id = params.get("unit")
+    gender = params.get("gender")
+    cell_id = params.get("cell")
+    status = params.get("status")
+    search = params.get("search")
+    month = params.get("month")
+
+    if assembly_id:
+        members = members.filter(assembly_id=assembly_id)
+    if unit_id:
+        if unit_id == "None":
+            members = members.filter(unit__isnull=True)
+        else:
+            members = members.filter(unit_id=unit_id)
+
+    if gender:
+        if gender == "all":
+            pass
+        else:
+            members = members.filter(gender=gender)
+
+    if cell_id and (admin_profile.is_superadmin or admin_profile.is_moderator):
+        if cell_id == "None":
+            members = members.filter(cell__isnull=True)
+        else:
+            members = members.filter(cell_id=cell_id)
+    if status:
+        members = members.filter(membership_status=status)
+    if search:
+        matching_ids = search_index.matching_ids(search, "member")
+        if matching_ids is not None:
+            members = members.filter(id__in=matching_ids)
+        else:
+            members = members.filter(
+                Q(first_name__icontains=search)
+                | Q(last_name__icontains=search)
+                | Q(email__icontains=search)
+                | Q(phone__icontains=search)
+            )
+    if month:
+        members = members.filter(birth_month=month).order_by(
+            "birth_day", "first_name", "last_name"
+        )
+    return members
+
+
+def member_rows(members, reference):
+    """
+    Export rows for a member queryset, read with ``values_list`` in chunks.
+    Choice codes and assembly/unit/cell ids are written as display names
+    from ``reference`` (a ``lookups.ReferenceData``).
+    """
+    labels = {
+        "gender": dict(Member.GENDER_CHOICES),
+        "marital_status": dict(Member.MARITAL_STATUS_CHOICES),
+        "membership_status": dict(Member.MEMBERSHIP_STATUS_CHOICES),
+        "assembly_id": reference["assembly"],
+        "unit_id": reference["unit"],
+        "cell_id": reference["cell"],
+    }
+    fields = [field for field, _ in EXPORT_COLUMNS]
+    mappings = [labels.get(field) for field in fields]
+
+    def export_value(mapping, value):
+        if mapping is not None:
+            return mapping.get(value, "" if value is None else value)
+        if isinstance(value, datetime) and timezone.is_aware(value):
+            return timezone.localtime(value)
+        return value
+
+    for row in members.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [export_value(mapping, value) for mapping, value in zip(mappings, row)]
+
+
+def encode(rows, file_format):
+    """Byte chunks of an export file holding the header and ``rows``"""
+    writer, _ = FORMATS[file_format]
+    header = [label for _, label in EXPORT_COLUMNS]
+    if file_format == "xlsx":
+        return writer(header, rows, sheet_name="Members")
+    return writer(header, rows)
+
+
+def stream_members(members, file_format, reference):
+    """Return (byte chunk generator, content type) for an export"""
+    return encode(member_rows(members, reference), file_format), FORMATS[file_format][1]
@@ -1,9 +1,38 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 from django.utils import timezone
+from . import lookups
 from .models import Assembly, Unit, Member, Cell, Committee, CommitteeMembership, Inventory, Admin
 
 
+class MemberAutocompleteSelect(forms.Select):
+    """
+    Member <select> that renders only the selected member. The other options
+    are fetched from the member_autocomplete endpoint as the user types, so
+    the page no longer grows with the member table.
+    """
+
+    def __init__(self, attrs=None, exclude_admins=False):
+        attrs = dict(attrs or {})
+        attrs['class'] = 'member-autocomplete ' + attrs.get('class', 'form-select')
+        attrs['data-autocomplete-url'] = reverse_lazy('member_autocomplete')
+        if exclude_admins:
+            attrs['data-exclude-admins'] = '1'
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        options = [self.create_option(name, '', '---------', False, 0)]
+        ids = [pk for pk in value if str(pk).isdigit()]
+        members = Member.objects.filter(pk__in=ids) if ids else []
+        for index, member in enumerate(members, start=1):
+            options.append(self.create_option(
+                name, member.pk, member.get_full_name(), True, index,
+                attrs={'data-email': member.email, 'data-phone': member.phone},
+            ))
+        return [(None, options, 0)]
+
+
 class AssemblyForm(forms.ModelForm):
     class Meta:
         model = Assembly
@@ -446,6 +475,11 @@ class MemberFilterForm(forms.Form):
         })
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in ('assembly', 'unit', 'cell'):
+            lookups.use_cached_choices(self.fields[name], name)
+
 
 class BulkMemberUploadForm(forms.Form):
     """Form for bulk uploading members via CSV"""
@@ -466,6 +500,10 @@ class BulkMemberUploadForm(forms.Form):
         help_text='Select the assembly for all members in this upload'
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        lookups.use_cached_choices(self.fields['assembly'], 'assembly')
+
     def clean_csv_file(self):
         csv_file = self.cleaned_data.get('csv_file')
         if csv_file:
@@ -541,6 +579,10 @@ class MemberReportForm(DateRangeFilterForm):
         label='Include Inactive Members'
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        lookups.use_cached_choices(self.fields['assembly'], 'assembly')
+
 
 # Custom form for quick member creation (simplified version)
 class QuickMemberForm(forms.ModelForm):
@@ -604,13 +646,13 @@ class CommitteeForm(forms.ModelForm):
         fields = ['name', 'description', 'leader']
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4}),
-            'leader': forms.Select(attrs={'class': 'select2-single'}),
+            'leader': MemberAutocompleteSelect(attrs={'class': 'select2-single'}),
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Customize leader choices
+        # Only the submitted leader is looked up; choices come from autocomplete
         self.fields['leader'].queryset = Member.objects.all()
         self.fields['leader'].required = False
         self.fields['leader'].label = "Committee Leader (Optional)"
@@ -620,7 +662,7 @@ class CommitteeMembershipForm(forms.ModelForm):
         model = CommitteeMembership
         fields = ['member', 'role']
         widgets = {
-            'member': forms.Select(attrs={'class': 'form-select'}),
+            'member': MemberAutocompleteSelect(),
             'role': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter role (optional)'}),
         }
 
@@ -7,7 +7,10 @@ from django.core.paginator import Paginator
 from django.template.loader import render_to_string
 from django.db import models
 from .models import Inventory, Assembly
+from . import lookups
 from .forms import InventoryForm
+from .pagination import cached_aggregate, keyset_paginate, parse_page_size
+from .stats import get_inventory_version, inventory_breakdown
 
 
 @login_required
@@ -59,21 +62,40 @@ def inventory_list(request):
     else:
         inventory_items = inventory_items.order_by("name")
 
-    # Statistics for the current filtered view
-    total_items = inventory_items.count()
-    total_value = inventory_items.aggregate(total=Sum("total_price"))["total"] or 0
-    low_stock_count = inventory_items.filter(quantity__lt=0).count()
+    # Statistics for the current filtered view, in one query
+    statistics = {
+        "total_items": Count("id"),
+        "total_value": Sum("total_price"),
+        "low_stock_count": Count("id", filter=Q(quantity__lt=0)),
+    }
+    cursor = request.GET.get("cursor")
+    keyset = (request.GET.get("paging") == "keyset" or cursor) and order_by == "name"
+    if keyset:
+        # Constant cost per page: no OFFSET, statistics served from cache
+        totals = cached_aggregate(inventory_items, get_inventory_version(), **statistics)
+        page_obj = keyset_paginate(
+            inventory_items,
+            ["name", "id"],
+            cursor=cursor,
+            page_size=parse_page_size(request.GET.get("page_size")),
+            count=totals["total_items"],
+        )
+    else:
+        totals = inventory_items.aggregate(**statistics)
+        paginator = Paginator(inventory_items, 25)
+        page_number = request.GET.get("page")
+        page_obj = paginator.get_page(page_number)
 
-    # Pagination
-    paginator = Paginator(inventory_items, 25)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    total_items = totals["total_items"]
+    total_value = totals["total_value"] or 0
+    low_stock_count = totals["low_stock_count"]
 
     # Get available assemblies for filter
-    assemblies = Assembly.objects.all()
+    assemblies = lookups.options("assembly")
 
     context = {
         "page_obj": page_obj,
+        "keyset": keyset,
         "search_query": search_query,
         "status_filter": status_filter,
         "condition_filter": condition_filter,
@@ -205,32 +227,8 @@ def inventory_dashboard(request):
     """
     Dashboard view showing inventory statistics and overview
     """
-    # Basic statistics
-    total_items = Inventory.objects.count()
-    total_value = Inventory.objects.aggregate(total=Sum("total_price"))["total"] or 0
-
-    # Status counts
-    status_counts = {}
-    for status_code, status_name in Inventory.STATUS_CHOICES:
-        count = Inventory.objects.filter(status=status_code).count()
-        status_counts[status_name] = {
-            "count": count,
-            "percentage": (count / total_items * 100) if total_items > 0 else 0,
-        }
-
-    # Condition counts
-    condition_counts = {}
-    for condition_code, condition_name in Inventory.CONDITION_CHOICES:
-        count = Inventory.objects.filter(condition=condition_code).count()
-        condition_counts[condition_name] = {
-            "count": count,
-            "percentage": (count / total_items * 100) if total_items > 0 else 0,
-        }
-
-    # Assembly-wise distribution
-    assembly_stats = Assembly.objects.annotate(
-        item_count=Count("inventories"), total_value=Sum("inventories__total_price")
-    ).order_by("-item_count")[:10]
+    # Totals, status/condition distributions and per-assembly breakdown
+    breakdown = inventory_breakdown()
 
     # Low stock items (quantity less than 5)
     low_stock_items = Inventory.objects.filter(quantity__lt=0).select_related(
@@ -256,11 +254,12 @@ def inventory_dashboard(request):
     )
 
     context = {
-        "total_items": total_items,
-        "total_value": total_value,
-        "status_counts": status_counts,
-        "condition_counts": condition_counts,
-        "assembly_stats": assembly_stats,
+        "total_items": breakdown["total_items"],
+        "total_value": breakdown["total_value"],
+        "status_counts": breakdown["status_counts"],
+        "condition_counts": breakdown["condition_counts"],
+        "assembly_stats": breakdown["assembly_stats"],
+        "inventory_matrix": breakdown["matrix"],
         "low_stock_items": low_stock_items,
         "recent_items": recent_items,
         "attention_items": attention_items,
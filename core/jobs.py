@@ -0,0 +1,353 @@
+"""
+Database-backed background jobs.
+
+A job is a ``core.models.Job`` row naming a registered task and its JSON
+parameters. ``enqueue`` inserts one. The ``run_jobs`` command starts a
+``Worker`` that claims queued jobs oldest first and runs them in
+``--concurrency`` threads. There is no broker: claiming is a conditional
+UPDATE from QUEUED to RUNNING, so two workers never run the same job.
+
+Tasks are registered with ``@task(kind)`` and called as ``func(ctx,
+**params)``. They report progress through ``ctx.progress(done, total)``.
+While a task runs, a heartbeat thread touches its job every
+``HEARTBEAT_INTERVAL`` on its own connection, so a task that reports no
+progress (or reports it inside a transaction) still looks alive. A RUNNING
+job whose heartbeat is older than ``STALE_AFTER`` belonged to a worker that
+died; it is queued again, or failed after ``MAX_ATTEMPTS`` tries. Workers
+look for such jobs when they start and then on idle polls, at most once
+per ``STALE_AFTER``.
+"""
+import csv
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 1.0  # seconds between progress writes
+HEARTBEAT_INTERVAL = 60.0  # seconds; well under STALE_AFTER
+STALE_AFTER = timedelta(minutes=10)
+MAX_ATTEMPTS = 3
+
+UPLOAD_DIR = "job_uploads"
+EXPORT_DIR = "exports"
+
+TASKS = {}
+
+
+def task(kind):
+    """Register a function as the task run for jobs of ``kind``"""
+
+    def register(func):
+        TASKS[kind] = func
+        return func
+
+    return register
+
+
+def enqueue(kind, params=None, user=None, message="Waiting for a worker"):
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(kind=kind, params=params or {}, created_by=user, message=message)
+
+
+def job_file_path(relative_path):
+    """Absolute path of a file under JOB_FILES_ROOT, which is never served directly"""
+    return os.path.join(settings.JOB_FILES_ROOT, relative_path)
+
+
+def _private_directory(name):
+    directory = job_file_path(name)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return directory
+
+
+def store_upload(uploaded_file):
+    """Save an uploaded file where workers can read it and return its path"""
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    path = os.path.join(_private_directory(UPLOAD_DIR), f"{uuid.uuid4().hex}{extension}")
+    with open(path, "wb") as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return path
+
+
+class JobContext:
+    """Handed to a task to report progress on its job"""
+
+    def __init__(self, job):
+        self.job = job
+        self._last_write = 0.0
+
+    def progress(self, done, total=None, message=None, force=False):
+        job = self.job
+        job.progress = done
+        if total is not None:
+            job.total = total
+        if message is not None:
+            job.message = message[:255]
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        Job.objects.filter(pk=job.pk).update(
+            progress=job.progress,
+            total=job.total,
+            message=job.message,
+            updated_at=timezone.now(),
+        )
+
+
+def claim_next(worker_name):
+    """Move the oldest queued job to RUNNING for this worker, or return None"""
+    while True:
+        job_id = (
+            Job.objects.filter(status=Job.QUEUED)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            worker=worker_name,
+            started_at=now,
+            updated_at=now,
+            attempts=F("attempts") + 1,
+            message="Started",
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+        # Another worker got there first
+
+
+class Heartbeat(threading.Thread):
+    """Keep a running job's ``updated_at`` fresh until stopped"""
+
+    def __init__(self, job_id, interval=None):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.interval = HEARTBEAT_INTERVAL if interval is None else interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(pk=self.job_id, status=Job.RUNNING).update(
+                        updated_at=timezone.now()
+                    )
+                except Exception:
+                    logger.exception("Heartbeat for job %s failed", self.job_id)
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job):
+    """Run a claimed job to completion and record the outcome"""
+    ctx = JobContext(job)
+    heartbeat = Heartbeat(job.pk)
+    heartbeat.start()
+    try:
+        result = TASKS[job.kind](ctx, **job.params)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED,
+            error=traceback.format_exc(),
+            message=str(e)[:255],
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        return False
+    finally:
+        heartbeat.stop()
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.SUCCEEDED,
+        result=result,
+        progress=ctx.job.total or ctx.job.progress,
+        total=ctx.job.total,
+        message="Finished",
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def recover_stale(stale_after=STALE_AFTER):
+    """Requeue (or fail) RUNNING jobs whose worker stopped sending heartbeats"""
+    cutoff = timezone.now() - stale_after
+    stale = Job.objects.filter(status=Job.RUNNING, updated_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=Job.FAILED,
+        message="The worker running this job stopped responding",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(
+        status=Job.QUEUED, worker="", message="Requeued after the worker stopped responding"
+    )
+    return requeued, failed
+
+
+class Worker:
+    """Poll for jobs and run up to ``concurrency`` of them at a time"""
+
+    def __init__(self, concurrency=1, poll_interval=2.0, name=None, stale_after=STALE_AFTER):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = threading.Event()
+        self._recovery_lock = threading.Lock()
+        self._last_recovery = None
+
+    def _recover_if_due(self):
+        """Requeue jobs of dead workers, at most once per ``stale_after``"""
+        with self._recovery_lock:
+            now = time.monotonic()
+            due = self.stale_after.total_seconds()
+            if self._last_recovery is not None and now - self._last_recovery < due:
+                return False
+            self._last_recovery = now
+        requeued, failed = recover_stale(self.stale_after)
+        if requeued or failed:
+            logger.warning("Recovered stale jobs: %s requeued, %s failed", requeued, failed)
+        return bool(requeued)
+
+    def _loop(self, index, burst):
+        thread_name = f"{self.name}/{index}"
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    job = claim_next(thread_name)
+                except Exception:
+                    # e.g. a locked or restarting database; try again later
+                    logger.exception("%s could not claim a job", thread_name)
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if self._recover_if_due():
+                        continue
+                    if burst:
+                        return
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                logger.info("%s running job %s (%s)", thread_name, job.pk, job.kind)
+                run_job(job)
+        finally:
+            # Connections are per thread; do not leave this one open
+            connections.close_all()
+
+    def run(self, burst=False):
+        """Work until stopped, or with ``burst`` until the queue is empty"""
+        self._recover_if_due()
+        if self.concurrency == 1:
+            self._loop(0, burst)
+            return
+        threads = [
+            threading.Thread(target=self._loop, args=(index, burst), daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+# ---------------------------------------------------------------------------
+# Tasks
+# ---------------------------------------------------------------------------
+
+def _count_csv_rows(path):
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        return max(0, sum(1 for _ in csv.reader(file)) - 1)
+
+
+@task("import_members_csv")
+def import_members_csv(ctx, path, chunk_size=None, restart=False, delete_after=False):
+    """Run ``import_members_from_csv``; ``delete_after`` removes an uploaded file once imported"""
+    from .utils.csv_import import DEFAULT_CHUNK_SIZE, import_members_from_csv
+
+    total = _count_csv_rows(path)
+    ctx.progress(0, total, "Importing members", force=True)
+    done = 0
+
+    def on_chunk(chunk_number, rows, created, updated, seconds):
+        nonlocal done
+        done += rows
+        ctx.progress(done, message=f"Imported {done} of {total} rows")
+
+    created, updated = import_members_from_csv(
+        path, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, on_chunk=on_chunk, restart=restart
+    )
+    if delete_after:
+        os.remove(path)
+    return {"members_created": created, "members_updated": updated}
+
+
+@task("import_excel")
+def import_excel(ctx, path, batch_size=None, sheet=0, delete_after=False):
+    """Run ``import_data_from_excel``; ``delete_after`` removes an uploaded file once imported"""
+    from .createdata import DEFAULT_BATCH_SIZE, import_data_from_excel
+
+    ctx.progress(0, message="Importing members", force=True)
+    result = import_data_from_excel(path, batch_size=batch_size or DEFAULT_BATCH_SIZE, sheet_name=sheet)
+    if delete_after:
+        os.remove(path)
+    return result
+
+
+@task("export_members")
+def export_members(ctx, admin_id, filters=None, file_format="csv"):
+    """Write member_list's filtered members to a file under JOB_FILES_ROOT"""
+    from . import exports, lookups
+    from .models import Admin
+
+    admin_profile = Admin.objects.select_related("cell").get(pk=admin_id)
+    members = exports.filter_members(filters or {}, admin_profile)
+    total = members.count()
+    ctx.progress(0, total, "Exporting members", force=True)
+
+    counted = 0
+
+    def counting(rows):
+        nonlocal counted
+        for row in rows:
+            counted += 1
+            if counted % 1000 == 0:
+                ctx.progress(counted, message=f"Exported {counted} of {total} members")
+            yield row
+
+    # Stored under a random name; the dated one is only offered on download
+    stored = os.path.join(EXPORT_DIR, f"{uuid.uuid4().hex}.{file_format}")
+    filename = f"members-{timezone.localdate():%Y%m%d}-{ctx.job.pk}.{file_format}"
+    rows = counting(exports.member_rows(members, lookups.ReferenceData()))
+    _private_directory(EXPORT_DIR)
+    with open(job_file_path(stored), "wb") as file:
+        for chunk in exports.encode(rows, file_format):
+            file.write(chunk)
+    return {"file": stored, "filename": filename, "rows": counted}
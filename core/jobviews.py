@@ -0,0 +1,111 @@
+import os
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+
+from . import jobs
+from .models import Job
+
+RECENT_JOBS = 10
+
+IMPORT_KINDS = {
+    ".csv": "import_members_csv",
+    ".xlsx": "import_excel",
+    ".xls": "import_excel",
+}
+
+
+def _is_superadmin(user):
+    return hasattr(user, "admin_account") and user.admin_account.is_superadmin
+
+
+def _visible_jobs(user):
+    jobs_qs = Job.objects.defer("error", "params")
+    if _is_superadmin(user):
+        return jobs_qs
+    return jobs_qs.filter(created_by=user)
+
+
+def job_payload(job):
+    """JSON-ready status of a job, as polled by the dashboard"""
+    payload = {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "progress": job.progress,
+        "total": job.total,
+        "percent": job.percent,
+        "message": job.message,
+        "finished": job.is_finished,
+        "result": job.result,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": reverse("job_status", args=[job.id]),
+    }
+    if job.kind == "export_members" and job.status == Job.SUCCEEDED:
+        payload["download_url"] = reverse("job_download", args=[job.id])
+    return payload
+
+
+@login_required
+def job_status(request, pk):
+    """AJAX endpoint: status and progress of one job"""
+    try:
+        job = _visible_jobs(request.user).get(pk=pk)
+    except Job.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+    return JsonResponse({"job": job_payload(job)})
+
+
+@login_required
+def job_list(request):
+    """AJAX endpoint: the user's most recent jobs (``?active=1`` for unfinished ones)"""
+    try:
+        recent = _visible_jobs(request.user)
+        if request.GET.get("active"):
+            recent = recent.filter(status__in=[Job.QUEUED, Job.RUNNING])
+        return JsonResponse(
+            {"jobs": [job_payload(job) for job in recent.order_by("-created_at")[:RECENT_JOBS]]}
+        )
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@login_required
+@require_http_methods(["POST"])
+def start_import(request):
+    """Queue a CSV or Excel member import from an uploaded file (superadmins only)"""
+    if not _is_superadmin(request.user):
+        return JsonResponse(
+            {"error": "Only super administrators can import members."}, status=403
+        )
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"error": "No file was uploaded."}, status=400)
+    kind = IMPORT_KINDS.get(os.path.splitext(upload.name)[1].lower())
+    if kind is None:
+        return JsonResponse({"error": "Upload a .csv or .xlsx file."}, status=400)
+
+    # The stored copy is ours to remove; files queued from the CLI are not
+    job = jobs.enqueue(
+        kind, {"path": jobs.store_upload(upload), "delete_after": True}, user=request.user
+    )
+    return JsonResponse({"job": job_payload(job)}, status=202)
+
+
+@login_required
+def job_download(request, pk):
+    """The file written by a finished export job"""
+    job = _visible_jobs(request.user).filter(
+        pk=pk, kind="export_members", status=Job.SUCCEEDED
+    ).first()
+    if job is None or not job.result:
+        raise Http404("Export not found")
+    path = jobs.job_file_path(job.result["file"])
+    if not os.path.exists(path):
+        raise Http404("The export file has been removed")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=job.result["filename"])
@@ -0,0 +1,139 @@
+"""
+Cached option lists for the small reference tables (assemblies, units and
+cells) that fill filter dropdowns on most pages.
+
+Each table is stored as a tuple of ``(id, name)`` tuples at two levels:
+- a per-process dict, so a warm worker only reads the version number
+- the shared Django cache, so a cold worker reads one cache key instead of
+  the table
+
+Both levels are keyed by a version number that the save/delete signals in
+``core.signals`` bump. Bulk writes that skip the signals call
+``invalidate_lookups`` themselves.
+
+``for_request`` gives templates id -> name maps built at most once per
+request (see the ``reference`` context variable and the ``lookup_name`` tag).
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from .models import Assembly, Cell, Unit
+
+LOOKUP_VERSION_KEY = "lookups:version"
+
+# Safety net for caches that are not shared between processes
+LOOKUP_TIMEOUT = 3600
+
+LOOKUP_MODELS = {"assembly": Assembly, "unit": Unit, "cell": Cell}
+
+
+class Option(namedtuple("Option", ["id", "name"])):
+    """One lookup row; templates can use ``option.id`` and ``option.name``"""
+
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.name
+
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def get_lookup_version():
+    version = cache.get(LOOKUP_VERSION_KEY)
+    if version is None:
+        # Never restart from a number a process may still hold in _local,
+        # e.g. after the shared cache was cleared or the key evicted
+        cache.add(LOOKUP_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(LOOKUP_VERSION_KEY)
+    return version
+
+
+def invalidate_lookups():
+    """Make every process reload its lookup tables on next use"""
+    try:
+        cache.incr(LOOKUP_VERSION_KEY)
+    except ValueError:
+        cache.set(LOOKUP_VERSION_KEY, time.time_ns(), None)
+
+
+def options(name):
+    """Every row of a lookup table as Options ordered by name"""
+    version = get_lookup_version()
+    cached = _local.get(name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    cache_key = f"lookups:{name}:{version}"
+    rows = cache.get(cache_key)
+    if rows is None:
+        rows = tuple(
+            LOOKUP_MODELS[name].objects.order_by("name", "id").values_list("id", "name")
+        )
+        cache.set(cache_key, rows, LOOKUP_TIMEOUT)
+
+    result = tuple(Option(*row) for row in rows)
+    with _local_lock:
+        _local[name] = (version, result)
+    return result
+
+
+def names(name):
+    """``{id: name}`` for a lookup table"""
+    return {option.id: option.name for option in options(name)}
+
+
+def choices(name, empty_label=None):
+    """Form choices for a lookup table, with an optional blank first choice"""
+    result = [(option.id, option.name) for option in options(name)]
+    if empty_label is not None:
+        result.insert(0, ("", empty_label))
+    return result
+
+
+def use_cached_choices(field, name):
+    """
+    Render a ModelChoiceField's options from the cache. Submitted values are
+    still validated against the field's queryset.
+    """
+    field.choices = choices(name, field.empty_label)
+
+
+class ReferenceData:
+    """
+    Id -> name maps of the lookup tables for one request. Each map is built
+    from the cached options the first time it is used and then reused.
+    """
+
+    def __init__(self):
+        self._maps = {}
+
+    def __getitem__(self, table):
+        if table not in self._maps:
+            self._maps[table] = names(table)
+        return self._maps[table]
+
+    def name(self, table, pk, default="Unknown"):
+        """Name of one row, or ``default`` for a blank or unknown id"""
+        try:
+            return self[table].get(int(pk), default)
+        except (TypeError, ValueError):
+            return default
+
+
+def for_request(request):
+    """The request's ReferenceData, created on first use"""
+    if request is None:
+        return ReferenceData()
+    data = getattr(request, "_reference_data", None)
+    if data is None:
+        data = request._reference_data = ReferenceData()
+    return data
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.birthdays import backfill_birthdays, BACKFILL_BATCH_SIZE
+from core.models import Member
+
+class Command(BaseCommand):
+    help = 'Recompute Member.birth_month and birth_day from date_of_birth'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BACKFILL_BATCH_SIZE,
+            help=f'Rows per bulk update (default {BACKFILL_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        changed = backfill_birthdays(Member, batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f'Updated birthday columns on {changed} members.'))
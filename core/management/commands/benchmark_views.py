@@ -0,0 +1,62 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from core import search
+from core.benchmark import measure_views
+from core.models import Assembly, Cell, Committee, Member, Unit
+from core.utils.fakedata import generate
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main views at several member counts on a throwaway test '
+        'database filled with synthetic data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,10000,100000',
+            help='Comma separated member counts (default 1000,10000,100000)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per view (default 5)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0)')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        repeat = max(1, options['repeat'])
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for size in sizes:
+                call_command('flush', interactive=False, verbosity=0)
+                # flush only empties model tables
+                search.rebuild_index([Member, Assembly, Unit, Cell, Committee])
+
+                self.stdout.write(f'Generating {size} members...')
+                generate(
+                    members=size,
+                    assemblies=max(5, size // 2000),
+                    cells=max(20, size // 50),
+                    units=max(10, size // 1000),
+                    committees=max(10, size // 1000),
+                    inventory=max(200, size // 10),
+                    sermons=max(100, size // 100),
+                    admins=1,
+                    seed=options['seed'],
+                )
+                self.report(size, measure_views(repeat=repeat))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, size, results):
+        self.stdout.write(self.style.SUCCESS(f'\n{size} members'))
+        self.stdout.write(f'{"view":<28}{"status":>7}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}')
+        for name, result in results.items():
+            line = (
+                f'{name:<28}{result["status"]:>7}{result["p50_ms"]:>10}'
+                f'{result["p95_ms"]:>10}{result["queries"]:>9}'
+            )
+            self.stdout.write(line if result['status'] == 200 else self.style.ERROR(line))
@@ -0,0 +1,54 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.utils.fakedata import generate, DEFAULT_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Fill the database with reproducible synthetic data for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=1000, help='Members to create (default 1000)')
+        parser.add_argument('--assemblies', type=int, default=5, help='Assemblies to create (default 5)')
+        parser.add_argument('--cells', type=int, default=20, help='Cells to create (default 20)')
+        parser.add_argument('--units', type=int, default=10, help='Units to create (default 10)')
+        parser.add_argument('--committees', type=int, default=10, help='Committees to create (default 10)')
+        parser.add_argument(
+            '--committee-size', type=int, default=15, help='Members per committee (default 15)'
+        )
+        parser.add_argument('--inventory', type=int, default=200, help='Inventory items (default 200)')
+        parser.add_argument('--sermons', type=int, default=100, help='Sermons to create (default 100)')
+        parser.add_argument(
+            '--admins', type=int, default=3,
+            help='Admin accounts; the first is a superadmin (default 3)'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows per bulk insert (default {DEFAULT_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['assemblies'] < 1:
+            raise CommandError('At least one assembly is needed to attach members to.')
+
+        started = time.perf_counter()
+        created = generate(
+            members=options['members'],
+            assemblies=options['assemblies'],
+            cells=options['cells'],
+            units=options['units'],
+            committees=options['committees'],
+            committee_size=options['committee_size'],
+            inventory=options['inventory'],
+            sermons=options['sermons'],
+            admins=options['admins'],
+            seed=options['seed'],
+            batch_size=max(1, options['batch_size']),
+        )
+        elapsed = time.perf_counter() - started
+
+        summary = '\n'.join(f'{name.replace("_", " ").capitalize()}: {count}' for name, count in created.items())
+        self.stdout.write(
+            self.style.SUCCESS(f'Generated synthetic data in {elapsed:.2f}s\n{summary}')
+        )
@@ -0,0 +1,73 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from core.createdata import import_data_from_excel, DEFAULT_BATCH_SIZE
+from core.jobs import enqueue
+
+class Command(BaseCommand):
+    help = 'Import members, assemblies and cells from an Excel sheet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('excel_file', type=str, help='Path to the .xlsx file')
+        parser.add_argument(
+            '--sheet',
+            default=0,
+            help='Sheet name or index (default: first sheet)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Members per bulk insert (default {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--background',
+            action='store_true',
+            help='Queue the import for the run_jobs worker and return immediately'
+        )
+
+    def handle(self, *args, **options):
+        excel_file = options['excel_file']
+        sheet = options['sheet']
+        if isinstance(sheet, str) and sheet.isdigit():
+            sheet = int(sheet)
+
+        if options['background']:
+            job = enqueue('import_excel', {
+                'path': os.path.abspath(excel_file),
+                'batch_size': max(1, options['batch_size']),
+                'sheet': sheet,
+            })
+            self.stdout.write(self.style.SUCCESS(f'Queued as job {job.pk}; run_jobs will pick it up.'))
+            return
+
+        self.stdout.write(f"Starting import from {excel_file}...")
+        started = time.perf_counter()
+
+        try:
+            result = import_data_from_excel(
+                excel_file,
+                batch_size=max(1, options['batch_size']),
+                sheet_name=sheet,
+            )
+            elapsed = time.perf_counter() - started
+            rate = result['members_created'] / elapsed if elapsed else 0
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Successfully imported members!\n'
+                    f'Members created: {result["members_created"]}\n'
+                    f'Assemblies created: {result["assemblies_created"]}\n'
+                    f'Cells created: {result["cells_created"]}\n'
+                    f'Rows skipped (no assembly): {result["rows_skipped"]}\n'
+                    f'Finished in {elapsed:.2f}s ({rate:.0f} rows/s)'
+                )
+            )
+        except FileNotFoundError:
+            self.stdout.write(
+                self.style.ERROR(f'File {excel_file} not found!')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error during import: {str(e)}')
+            )
@@ -1,26 +1,121 @@
-# core/management/commands/import_members.py
+import os
+import time
 from django.core.management.base import BaseCommand
-from core.utils.csv_import import import_members_from_csv
+from core.jobs import enqueue
+from core.utils.csv_import import (
+    import_members_from_csv,
+    file_sha256,
+    get_checkpoint,
+    DEFAULT_CHUNK_SIZE,
+)
 
 class Command(BaseCommand):
     help = 'Import members from CSV file'
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str, help='Path to the CSV file')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows written per transaction (default {DEFAULT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report creates, updates and field changes without writing'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore any checkpoint and import the file from the first row'
+        )
+        parser.add_argument(
+            '--background',
+            action='store_true',
+            help='Queue the import for the run_jobs worker and return immediately'
+        )
+        parser.add_argument(
+            '--show-diffs',
+            type=int,
+            default=50,
+            help='Maximum number of row diffs printed in a dry run (default 50)'
+        )
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
-        
+        chunk_size = max(1, options['chunk_size'])
+        dry_run = options['dry_run']
+        show_diffs = options['show_diffs']
+        total_rows = 0
+        diffs_shown = 0
+
+        def report_chunk(chunk_number, rows, created, updated, seconds):
+            nonlocal total_rows
+            total_rows += rows
+            rate = rows / seconds if seconds else 0
+            self.stdout.write(
+                f'Chunk {chunk_number}: {rows} rows '
+                f'({created} created, {updated} updated) '
+                f'in {seconds:.2f}s - {rate:.0f} rows/s'
+            )
+
+        def report_diff(row_number, member, changes):
+            nonlocal diffs_shown
+            if diffs_shown >= show_diffs or changes == {}:
+                return
+            diffs_shown += 1
+            name = f'{member.first_name} {member.last_name}'
+            if changes is None:
+                self.stdout.write(f'Row {row_number}: create {name}')
+                return
+            self.stdout.write(f'Row {row_number}: update {name}')
+            for field, (old, new) in changes.items():
+                self.stdout.write(f'    {field}: {old!r} -> {new!r}')
+
+        if options['background']:
+            job = enqueue('import_members_csv', {
+                'path': os.path.abspath(csv_file),
+                'chunk_size': chunk_size,
+                'restart': options['restart'],
+            })
+            self.stdout.write(self.style.SUCCESS(f'Queued as job {job.pk}; run_jobs will pick it up.'))
+            return
+
         self.stdout.write(f"Starting import from {csv_file}...")
-        
+        started = time.perf_counter()
+
         try:
-            members_created, members_updated = import_members_from_csv(csv_file)
-            
+            file_hash = file_sha256(csv_file)
+            checkpoint = None if options['restart'] else get_checkpoint(file_hash)
+            if checkpoint:
+                self.stdout.write(
+                    f'Resuming after row {checkpoint.rows_committed} '
+                    f'(checkpoint from {checkpoint.updated_at:%Y-%m-%d %H:%M})'
+                )
+
+            members_created, members_updated = import_members_from_csv(
+                csv_file,
+                chunk_size=chunk_size,
+                on_chunk=report_chunk,
+                dry_run=dry_run,
+                on_diff=report_diff,
+                restart=options['restart'],
+                file_hash=file_hash,
+            )
+            elapsed = time.perf_counter() - started
+            rate = total_rows / elapsed if elapsed else 0
+
+            if dry_run:
+                summary = 'Dry run complete, nothing was written!\nWould create'
+            else:
+                summary = 'Successfully imported members!\nCreated'
+
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'Successfully imported members!\n'
-                    f'Created: {members_created}\n'
-                    f'Updated: {members_updated}'
+                    f'{summary}: {members_created}\n'
+                    f'{"Would update" if dry_run else "Updated"}: {members_updated}\n'
+                    f'Rows: {total_rows} in {elapsed:.2f}s ({rate:.0f} rows/s)'
                 )
             )
         except FileNotFoundError:
@@ -30,4 +125,8 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Error during import: {str(e)}')
-            )
\ No newline at end of file
+            )
+            if not dry_run:
+                self.stdout.write(
+                    'Committed chunks were kept; rerun the same file to resume.'
+                )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.tombstones import TOMBSTONE_RETENTION, prune_tombstones
+
+class Command(BaseCommand):
+    help = (
+        f'Delete sync tombstones older than {TOMBSTONE_RETENTION.days} days; clients '
+        'that last synced before then get a full download'
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from core import search
+from core.models import Assembly, Cell, Committee, Member, Sermon, SermonPassage, Unit
+from core.sermons import rebuild_passages
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index (members, assemblies, units, cells, committees, sermons) and the sermon passage index'
+
+    def handle(self, *args, **options):
+        passages = rebuild_passages(Sermon, SermonPassage)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {passages} sermon passages.'))
+
+        if not search.is_supported():
+            self.stdout.write(
+                self.style.WARNING('This database backend has no search index; nothing more to do.')
+            )
+            return
+
+        total = search.rebuild_index([Member, Assembly, Unit, Cell, Committee, Sermon])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} rows.'))
@@ -0,0 +1,51 @@
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (imports, exports) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Jobs run at the same time, one thread each (default 1)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between checks of an empty queue (default 2)'
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new jobs'
+        )
+
+    def handle(self, *args, **options):
+        if not logging.getLogger('core.jobs').handlers and options['verbosity'] > 0:
+            logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=max(0.1, options['poll_interval']),
+        )
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping after the running jobs finish...')
+            worker.stop()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write(
+            f'Worker {worker.name} started with concurrency {worker.concurrency}'
+        )
+        worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS('Worker stopped.'))
@@ -0,0 +1,159 @@
+"""
+In-process request metrics collected by ``core.middleware.RequestMetricsMiddleware``.
+
+For each resolved view the middleware records the query count, SQL time,
+template render time and total latency of a request. The last
+``REQUEST_METRICS_WINDOW`` samples per view are kept in memory, so every
+worker process reports only its own traffic, and the numbers are lost when
+it restarts.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+FIELDS = ("queries", "sql_ms", "template_ms", "total_ms")
+
+# The sample being collected for the current request, if any
+current_sample = ContextVar("current_sample", default=None)
+
+
+class RequestSample:
+    """Counters for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "sql_ms": self.sql_time * 1000,
+            "template_ms": self.template_time * 1000,
+            "total_ms": (time.perf_counter() - self.started) * 1000,
+        }
+
+
+def query_timer(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current sample"""
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.sql_time += time.perf_counter() - started
+
+
+_template_patch_lock = threading.Lock()
+_template_patched = False
+
+
+def instrument_templates():
+    """Time Django template rendering (installed once per process)"""
+    global _template_patched
+    with _template_patch_lock:
+        if _template_patched:
+            return
+        from django.template.backends.django import Template
+
+        original_render = Template.render
+
+        def render(self, context=None, request=None):
+            sample = current_sample.get()
+            if sample is None:
+                return original_render(self, context, request)
+            # render_to_string inside a template render is counted once
+            sample.template_depth += 1
+            started = time.perf_counter()
+            try:
+                return original_render(self, context, request)
+            finally:
+                sample.template_depth -= 1
+                if sample.template_depth == 0:
+                    sample.template_time += time.perf_counter() - started
+
+        Template.render = render
+        _template_patched = True
+
+
+class MetricsRegistry:
+    """Rolling per-view samples, safe to share between threads"""
+
+    def __init__(self, window=None):
+        self.window = window or getattr(settings, "REQUEST_METRICS_WINDOW", 500)
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, view_name, sample):
+        with self._lock:
+            self._samples[view_name].append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        """Summary statistics and a latency histogram for every view"""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        return {name: summarize(values) for name, values in sorted(samples.items())}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0
+    # round() drops float noise such as 0.07 * 100 == 7.000000000000001
+    rank = math.ceil(round(fraction * len(values), 9))
+    index = min(len(values) - 1, max(0, rank - 1))
+    return values[index]
+
+
+def summarize(samples):
+    summary = {"requests": len(samples)}
+    for field in FIELDS:
+        values = sorted(sample[field] for sample in samples)
+        summary[field] = {
+            "mean": round(sum(values) / len(values), 2) if values else 0,
+            "p50": round(percentile(values, 0.50), 2),
+            "p90": round(percentile(values, 0.90), 2),
+            "p99": round(percentile(values, 0.99), 2),
+            "max": round(values[-1], 2) if values else 0,
+        }
+
+    histogram = dict.fromkeys([f"<={bound}" for bound in LATENCY_BUCKETS] + ["inf"], 0)
+    for sample in samples:
+        for bound in LATENCY_BUCKETS:
+            if sample["total_ms"] <= bound:
+                histogram[f"<={bound}"] += 1
+                break
+        else:
+            histogram["inf"] += 1
+    summary["latency_histogram"] = histogram
+    return summary
+
+
+registry = MetricsRegistry()
+
+
+def server_timing(sample):
+    """Format a sample as a Server-Timing header value"""
+    return ", ".join(
+        [
+            f'db;dur={sample["sql_ms"]:.1f};desc="{sample["queries"]} queries"',
+            f'tpl;dur={sample["template_ms"]:.1f}',
+            f'total;dur={sample["total_ms"]:.1f}',
+        ]
+    )
@@ -0,0 +1,60 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, SQL time, template time and latency per view.
+
+    Enabled with ``REQUEST_METRICS_ENABLED``. Adds a ``Server-Timing`` header
+    to every response, keeps rolling samples in ``core.metrics.registry`` and
+    logs a warning when a view issues more queries than its budget in
+    ``QUERY_BUDGETS`` (or ``DEFAULT_QUERY_BUDGET``).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.budgets = getattr(settings, "QUERY_BUDGETS", {})
+        self.default_budget = getattr(settings, "DEFAULT_QUERY_BUDGET", None)
+        metrics.instrument_templates()
+
+    def __call__(self, request):
+        sample = metrics.RequestSample()
+        token = metrics.current_sample.set(sample)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(metrics.query_timer))
+                response = self.get_response(request)
+        finally:
+            metrics.current_sample.reset(token)
+
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return response
+        view_name = match.view_name or match._func_path
+
+        result = sample.as_dict()
+        metrics.registry.record(view_name, result)
+        response["Server-Timing"] = metrics.server_timing(result)
+
+        budget = self.budgets.get(view_name, self.default_budget)
+        if budget is not None and result["queries"] > budget:
+            logger.warning(
+                "%s issued %d queries (budget %d) in %.1f ms",
+                view_name,
+                result["queries"],
+                budget,
+                result["total_ms"],
+            )
+        return response
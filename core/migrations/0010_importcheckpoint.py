@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_inventory_comment_alter_inventory_brand_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, unique=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('rows_committed', models.PositiveIntegerField(default=0)),
+                ('members_created', models.PositiveIntegerField(default=0)),
+                ('members_updated', models.PositiveIntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Import Checkpoints',
+                'ordering': ['-updated_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['name', 'id'], name='inventory_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['status', 'name'], name='inventory_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['condition', 'name'], name='inventory_condition_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['assembly', 'status', 'condition', 'total_price'], name='inventory_breakdown_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['total_price'], name='inventory_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['created_at'], name='inventory_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['last_name', 'first_name'], name='member_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['first_name', 'last_name', 'id'], name='member_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['cell', 'first_name', 'last_name'], name='member_cell_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['assembly', 'first_name', 'last_name'], name='member_assembly_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['unit', 'first_name', 'last_name'], name='member_unit_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['membership_status', 'first_name', 'last_name'], name='member_status_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['gender', 'first_name', 'last_name'], name='member_gender_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['created_at'], name='member_created_idx'),
+        ),
+    ]
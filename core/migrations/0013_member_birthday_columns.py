@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:43
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def fill_birthday_columns(apps, schema_editor):
+    # Frozen copy of core.birthdays.backfill_birthdays as of this migration
+    Member = apps.get_model("core", "Member")
+    rows = (
+        Member.objects.filter(date_of_birth__isnull=False)
+        .only("id", "date_of_birth")
+        .order_by("id")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for member in rows:
+        member.birth_month = member.date_of_birth.month
+        member.birth_day = member.date_of_birth.day
+        batch.append(member)
+        if len(batch) >= BATCH_SIZE:
+            Member.objects.bulk_update(batch, ["birth_month", "birth_day"])
+            batch = []
+    if batch:
+        Member.objects.bulk_update(batch, ["birth_month", "birth_day"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='birth_day',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='birth_month',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['birth_month', 'birth_day'], name='member_birthday_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['cell', 'birth_month', 'birth_day'], name='member_cell_birthday_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['assembly', 'birth_month', 'birth_day'], name='member_assembly_birthday_idx'),
+        ),
+        migrations.RunPython(fill_birthday_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of the core.search schema and document format as of this
+# migration; later changes to core.search must not alter it.
+SEARCH_TABLE = "core_search_index"
+# Committees get their own kind and KIND_COUNT grew, so every rowid changes
+KINDS = {"member": 0, "assembly": 1, "unit": 2, "cell": 3, "committee": 4}
+KIND_COUNT = 8
+BATCH_SIZE = 500
+
+
+def normalize_phone(value):
+    value = (value or "").strip()
+    digits = re.sub(r"\D", "", value)
+    if digits.startswith("234") and (value.startswith("+") or len(digits) > 10):
+        digits = digits[3:]
+    return digits.lstrip("0")
+
+
+def phone_terms(value):
+    digits = re.sub(r"\D", "", value or "")
+    return [term for term in dict.fromkeys([normalize_phone(value), digits]) if term]
+
+
+def document_for(model_name, instance):
+    if model_name == "member":
+        name = " ".join(
+            part for part in (instance.first_name, instance.middle_name, instance.last_name) if part
+        )
+        contact = [instance.email, *phone_terms(instance.phone)]
+        extra = []
+    elif model_name == "assembly":
+        name = instance.name
+        contact = [instance.email, *phone_terms(instance.phone)]
+        extra = [instance.city, instance.state]
+    elif model_name in ("unit", "committee"):
+        name = instance.name
+        contact = []
+        extra = [instance.description]
+    else:
+        name = instance.name
+        contact = []
+        extra = []
+    return (
+        KINDS[model_name],
+        instance.pk,
+        name or "",
+        " ".join(part for part in contact if part),
+        " ".join(part for part in extra if part),
+    )
+
+
+def write_documents(conn, documents):
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name, contact, extra) "
+                "VALUES (%s, %s, %s, %s)",
+                [
+                    (object_id * KIND_COUNT + kind, name, contact, extra)
+                    for kind, object_id, name, contact, extra in documents
+                ],
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (kind, object_id, document) VALUES "
+                "(%s, %s, setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'C')) "
+                "ON CONFLICT (kind, object_id) DO UPDATE SET document = EXCLUDED.document",
+                documents,
+            )
+
+
+def rebuild_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ("sqlite", "postgresql"):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    for model_name in KINDS:
+        model = apps.get_model("core", model_name)
+        batch = []
+        for instance in model.objects.order_by().iterator(chunk_size=2000):
+            batch.append(document_for(model_name, instance))
+            if len(batch) >= BATCH_SIZE:
+                write_documents(conn, batch)
+                batch = []
+        if batch:
+            write_documents(conn, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_member_birthday_columns"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,204 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:10
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of core.scripture's reference parser and the core.search
+# document format for sermons as of this migration; later changes to those
+# modules must not alter it.
+SEARCH_TABLE = "core_search_index"
+SERMON_KIND = 5
+KIND_COUNT = 8
+BATCH_SIZE = 2000
+
+VERSE_SPAN = 1000
+
+BOOKS = [
+    ("Genesis", ""), ("Exodus", ""), ("Leviticus", ""), ("Numbers", ""),
+    ("Deuteronomy", "dt"), ("Joshua", "jsh"), ("Judges", "jdg judg"), ("Ruth", "rth"),
+    ("1 Samuel", "1sa 1sm"), ("2 Samuel", "2sa 2sm"), ("1 Kings", "1kgs 1ki"),
+    ("2 Kings", "2kgs 2ki"), ("1 Chronicles", "1chr 1ch"), ("2 Chronicles", "2chr 2ch"),
+    ("Ezra", "ezr"), ("Nehemiah", "neh"), ("Esther", "est"), ("Job", ""),
+    ("Psalms", "ps psa psalm pss"), ("Proverbs", "prv"), ("Ecclesiastes", "qoh"),
+    ("Song of Solomon", "song sos songofsongs canticles"), ("Isaiah", "isa"),
+    ("Jeremiah", "jer"), ("Lamentations", "lam"), ("Ezekiel", "ezk eze"),
+    ("Daniel", ""), ("Hosea", "hos"), ("Joel", ""), ("Amos", ""), ("Obadiah", "obad"),
+    ("Jonah", "jon jnh"), ("Micah", "mic"), ("Nahum", "nah"), ("Habakkuk", "hab"),
+    ("Zephaniah", "zeph"), ("Haggai", "hag"), ("Zechariah", "zech"),
+    ("Malachi", "mal"), ("Matthew", "mt"), ("Mark", "mk mrk"), ("Luke", "lk"),
+    ("John", "jn jhn"), ("Acts", ""), ("Romans", ""),
+    ("1 Corinthians", "1co"), ("2 Corinthians", "2co"), ("Galatians", "gal"),
+    ("Ephesians", "eph"), ("Philippians", "phil php"), ("Colossians", "col"),
+    ("1 Thessalonians", "1th"), ("2 Thessalonians", "2th"), ("1 Timothy", "1ti 1tm"),
+    ("2 Timothy", "2ti 2tm"), ("Titus", "tit"), ("Philemon", "phm philem"),
+    ("Hebrews", "heb"), ("James", "jas"), ("1 Peter", "1pe 1pt"), ("2 Peter", "2pe 2pt"),
+    ("1 John", "1jn 1jhn"), ("2 John", "2jn 2jhn"), ("3 John", "3jn 3jhn"), ("Jude", "jud"),
+    ("Revelation", "rev revelations"),
+]
+
+def _key(name):
+    """Lookup key for a book name: "II Cor." -> "2cor" """
+    name = re.sub(r"[\s.]+", " ", name.lower()).strip()
+    name = re.sub(r"^(iii|ii|i)\s", lambda m: str(len(m.group(1))) + " ", name)
+    return name.replace(" ", "")
+
+
+def _book_keys():
+    keys = {}
+    for number, (name, aliases) in enumerate(BOOKS, start=1):
+        keys[_key(name)] = number
+        for alias in aliases.split():
+            keys[alias] = number
+
+    # Unambiguous prefixes of at least three characters ("gen", "deut", "1cor")
+    prefixes = {}
+    for number, (name, _) in enumerate(BOOKS, start=1):
+        full = _key(name)
+        for length in range(3, len(full)):
+            prefixes.setdefault(full[:length], set()).add(number)
+    for prefix, numbers in prefixes.items():
+        if len(numbers) == 1 and prefix not in keys:
+            keys[prefix] = numbers.pop()
+    return keys
+
+
+BOOK_KEYS = _book_keys()
+
+_PART = r"\d+(?::\d+)?(?:\s*[-–]\s*\d+(?::\d+)?)?"
+_REFERENCE = re.compile(
+    r"(?<![\w:])(?P<book>(?:[123]|iii|ii|i)?\s*[a-z]+(?:\s+of\s+[a-z]+)?)\.?\s*"
+    rf"(?P<parts>{_PART}(?:\s*[;,]\s*{_PART})*)(?![\w:])",
+    re.IGNORECASE,
+)
+_RANGE = re.compile(r"(\d+)(?::(\d+))?(?:\s*[-–]\s*(\d+)(?::(\d+))?)?")
+
+
+def book_number(name):
+    return BOOK_KEYS.get(_key(name))
+
+
+def _position(chapter, verse, last=False):
+    if verse is None:
+        verse = VERSE_SPAN - 1 if last else 0
+    return int(chapter) * VERSE_SPAN + min(int(verse), VERSE_SPAN - 1)
+
+
+def _parse_parts(book, parts):
+    references = []
+    chapter = None  # set while a comma-separated list is of verses
+    pieces = re.split(r"\s*([;,])\s*", parts)
+    separator = None
+    for piece in pieces:
+        if piece in (";", ","):
+            separator = piece
+            continue
+        a, a_verse, b, b_verse = _RANGE.fullmatch(piece).groups()
+        if separator != "," or a_verse is not None:
+            chapter = None
+        if chapter is not None:
+            # "John 3:16, 18-20": bare numbers after a verse are verses
+            a, a_verse, b, b_verse = chapter, a, chapter, b or a
+        elif a_verse is not None and b is not None and b_verse is None:
+            # "John 3:16-18": the range ends within the same chapter
+            b, b_verse = a, b
+        start = _position(a, a_verse)
+        end = _position(b or a, b_verse if b else a_verse, last=True)
+        if end >= start:
+            references.append((book, start, end))
+        if a_verse is not None or b_verse is not None:
+            chapter = b or a
+    return references
+
+
+def parse_references(text):
+    """(book, start, end) for every reference in a passage string"""
+    references = []
+    for match in _REFERENCE.finditer(text or ""):
+        number = book_number(match.group("book"))
+        if number is not None:
+            references.extend(_parse_parts(number, match.group("parts")))
+    return references
+
+
+def sermon_document(sermon):
+    books = dict.fromkeys(BOOKS[book - 1][0] for book, _, _ in parse_references(sermon.bible_passage))
+    contact = [sermon.preacher, sermon.bible_passage, *books]
+    return (
+        SERMON_KIND,
+        sermon.pk,
+        sermon.title or "",
+        " ".join(part for part in contact if part),
+        sermon.notes or "",
+    )
+
+
+def write_documents(conn, documents):
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name, contact, extra) "
+                "VALUES (%s, %s, %s, %s)",
+                [
+                    (object_id * KIND_COUNT + kind, name, contact, extra)
+                    for kind, object_id, name, contact, extra in documents
+                ],
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (kind, object_id, document) VALUES "
+                "(%s, %s, setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'C')) "
+                "ON CONFLICT (kind, object_id) DO UPDATE SET document = EXCLUDED.document",
+                documents,
+            )
+
+
+def index_sermons(apps, schema_editor):
+    Sermon = apps.get_model('core', 'Sermon')
+    SermonPassage = apps.get_model('core', 'SermonPassage')
+    conn = schema_editor.connection
+    indexed = conn.vendor in ("sqlite", "postgresql")
+
+    passages, documents = [], []
+    for sermon in Sermon.objects.order_by('id').iterator(chunk_size=BATCH_SIZE):
+        passages.extend(
+            SermonPassage(sermon_id=sermon.pk, book=book, start=start, end=end)
+            for book, start, end in parse_references(sermon.bible_passage)
+        )
+        if indexed:
+            documents.append(sermon_document(sermon))
+        if len(passages) >= BATCH_SIZE or len(documents) >= BATCH_SIZE:
+            SermonPassage.objects.bulk_create(passages)
+            if documents:
+                write_documents(conn, documents)
+            passages, documents = [], []
+    SermonPassage.objects.bulk_create(passages)
+    if documents:
+        write_documents(conn, documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_sermon_audio_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SermonPassage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book', models.PositiveSmallIntegerField()),
+                ('start', models.PositiveIntegerField()),
+                ('end', models.PositiveIntegerField()),
+                ('sermon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='passages', to='core.sermon')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['book', 'start', 'end'], name='sermon_passage_idx')],
+            },
+        ),
+        migrations.RunPython(index_sermons, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_sermon_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('assembly_id', models.BigIntegerField(blank=True, null=True)),
+                ('cell_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cell',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='cell',
+            index=models.Index(fields=['updated_at', 'id'], name='cell_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['updated_at', 'id'], name='member_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sermon',
+            index=models.Index(fields=['updated_at', 'id'], name='sermon_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['updated_at', 'id'], name='unit_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='member',
+            name='member_ordering_idx',
+        ),
+        migrations.AlterField(
+            model_name='member',
+            name='assembly',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='members', to='core.assembly'),
+        ),
+        migrations.AlterField(
+            model_name='member',
+            name='cell',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.cell'),
+        ),
+        migrations.AlterField(
+            model_name='member',
+            name='unit',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='core.unit'),
+        ),
+    ]
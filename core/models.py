@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -62,6 +64,9 @@ class Unit(models.Model):
     class Meta:
         verbose_name_plural = "Units"
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="unit_sync_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -70,6 +75,12 @@ class Unit(models.Model):
 class Cell(models.Model):
     name = models.CharField(max_length=200)
     created_at = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="cell_sync_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -117,8 +128,10 @@ class Member(models.Model):
         ("TRANSFERRED", "Transferred"),
     ]
 
+    # assembly, unit and cell lead composite indexes in Meta, which serve
+    # their joins and deletes as well as a single-column index would
     assembly = models.ForeignKey(
-        Assembly, on_delete=models.CASCADE, related_name="members"
+        Assembly, on_delete=models.CASCADE, related_name="members", db_index=False
     )
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -130,6 +143,9 @@ class Member(models.Model):
     )
     # family = models.ForeignKey(Family, on_delete=models.SET_NULL, blank=True, null=True)
     month_of_birth = models.CharField(max_length=20, null=True, blank=True)
+    # Denormalized from date_of_birth for indexed birthday lookups
+    birth_month = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    birth_day = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
 
     # Contact Information
     email = models.EmailField(blank=True)
@@ -140,7 +156,12 @@ class Member(models.Model):
 
     # Church Information
     unit = models.ForeignKey(
-        Unit, on_delete=models.SET_NULL, null=True, blank=True, related_name="members"
+        Unit,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="members",
+        db_index=False,
     )
     other_unit = models.ForeignKey(
         Unit,
@@ -153,7 +174,9 @@ class Member(models.Model):
         max_length=15, choices=MEMBERSHIP_STATUS_CHOICES, default="ACTIVE"
     )
     membership_date = models.DateField(null=True, blank=True)
-    cell = models.ForeignKey(Cell, on_delete=models.SET_NULL, null=True, blank=True)
+    cell = models.ForeignKey(
+        Cell, on_delete=models.SET_NULL, null=True, blank=True, db_index=False
+    )
     baptism_date = models.DateField(null=True, blank=True)
     confirmation_date = models.DateField(null=True, blank=True)
 
@@ -165,21 +188,58 @@ class Member(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def get_month_of_birth(self):
-        """Set month_of_birth based on date_of_birth"""
+        """Set month_of_birth, birth_month and birth_day based on date_of_birth"""
         if self.date_of_birth:
+            self.birth_month = self.date_of_birth.month
+            self.birth_day = self.date_of_birth.day
             self.month_of_birth = self.date_of_birth.strftime("%B")
             return self.month_of_birth
+        self.birth_month = self.birth_day = None
         return None
 
     def save(self, *args, **kwargs):
         self.get_month_of_birth()
         return super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The cell and assembly the row was loaded with (see core.tombstones)
+        if "assembly_id" in instance.__dict__ and "cell_id" in instance.__dict__:
+            instance._loaded_scope = (instance.assembly_id, instance.cell_id)
+        return instance
+
     def get_full_name(self):
         return f"{self.first_name} {self.middle_name + ' ' if self.middle_name else ''}{self.last_name}"
 
     class Meta:
         ordering = ["last_name", "first_name"]
+        # Matched to the filter + order_by shapes of member_list and dashboard
+        indexes = [
+            models.Index(fields=["first_name", "last_name", "id"], name="member_name_idx"),
+            models.Index(fields=["cell", "first_name", "last_name"], name="member_cell_name_idx"),
+            models.Index(
+                fields=["assembly", "first_name", "last_name"], name="member_assembly_name_idx"
+            ),
+            models.Index(fields=["unit", "first_name", "last_name"], name="member_unit_name_idx"),
+            models.Index(
+                fields=["membership_status", "first_name", "last_name"],
+                name="member_status_name_idx",
+            ),
+            models.Index(fields=["gender", "first_name", "last_name"], name="member_gender_name_idx"),
+            models.Index(fields=["created_at"], name="member_created_idx"),
+            # Delta sync (see api.sync)
+            models.Index(fields=["updated_at", "id"], name="member_sync_idx"),
+            # Birthday calendar and month filter, overall and per cell/assembly
+            models.Index(fields=["birth_month", "birth_day"], name="member_birthday_idx"),
+            models.Index(
+                fields=["cell", "birth_month", "birth_day"], name="member_cell_birthday_idx"
+            ),
+            models.Index(
+                fields=["assembly", "birth_month", "birth_day"],
+                name="member_assembly_birthday_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -305,11 +365,57 @@ class Sermon(models.Model):
 
     class Meta:
         ordering = ["-sermon_date"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="sermon_sync_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.sermon_date}"
 
 
+class SermonPassage(models.Model):
+    """
+    One Bible reference from ``Sermon.bible_passage``, as verse positions
+    (see core.scripture), so references are searched through an index.
+    """
+
+    sermon = models.ForeignKey(Sermon, on_delete=models.CASCADE, related_name="passages")
+    book = models.PositiveSmallIntegerField()
+    start = models.PositiveIntegerField()
+    end = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["book", "start", "end"], name="sermon_passage_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.sermon_id}: {self.book} {self.start}-{self.end}"
+
+
+class SermonAudioUpload(models.Model):
+    """
+    An audio file being uploaded to a sermon in chunks (see core.sermons).
+    ``received`` is the offset the next chunk must start at.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sermon = models.ForeignKey(
+        Sermon, on_delete=models.CASCADE, related_name="audio_uploads"
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size} bytes)"
+
+
 class PrayerRequest(models.Model):
     STATUS_CHOICES = [
         ("PENDING", "Pending"),
@@ -499,7 +605,7 @@ class Committee(models.Model):
         ordering = ["name"]
 
     def __str__(self):
-        return f"{self.name} - {self.assembly.name}"
+        return self.name
 
 
 class CommitteeMembership(models.Model):
@@ -614,6 +720,19 @@ class Inventory(models.Model):
     class Meta:
         verbose_name_plural = "Inventries"
         ordering = ["name"]
+        # Matched to inventory_list filters/orderings and the dashboard breakdown
+        indexes = [
+            models.Index(fields=["name", "id"], name="inventory_name_idx"),
+            models.Index(fields=["status", "name"], name="inventory_status_idx"),
+            models.Index(fields=["condition", "name"], name="inventory_condition_idx"),
+            # Covers the grouped (assembly, status, condition) value aggregate
+            models.Index(
+                fields=["assembly", "status", "condition", "total_price"],
+                name="inventory_breakdown_idx",
+            ),
+            models.Index(fields=["total_price"], name="inventory_price_idx"),
+            models.Index(fields=["created_at"], name="inventory_created_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         # Automatically calculate total price
@@ -623,3 +742,102 @@ class Inventory(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.quantity} available"
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of a CSV member import, keyed by the file's content hash"""
+
+    file_hash = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255)
+    rows_committed = models.PositiveIntegerField(default=0)
+    members_created = models.PositiveIntegerField(default=0)
+    members_updated = models.PositiveIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Import Checkpoints"
+        ordering = ["-updated_at"]
+
+    def __str__(self):
+        state = "completed" if self.completed else f"row {self.rows_committed}"
+        return f"{self.file_name} - {state}"
+
+
+class Job(models.Model):
+    """A unit of background work run by the ``run_jobs`` worker (see core.jobs)"""
+
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Heartbeat: refreshed with every progress update while running
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # The worker claims the oldest queued job
+            models.Index(fields=["status", "created_at"], name="job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    @property
+    def percent(self):
+        if self.status == self.SUCCEEDED:
+            return 100
+        if not self.total:
+            return None
+        return min(100, round(self.progress * 100 / self.total))
+
+
+class Tombstone(models.Model):
+    """
+    A synced row that was deleted, or a member that left a cell or assembly,
+    kept so offline clients can drop it (see core.tombstones and api.sync).
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    # Where the row was, so scoped clients only hear about their own rows
+    assembly_id = models.BigIntegerField(null=True, blank=True)
+    cell_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} at {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) pagination for long lists.
+
+Django's Paginator runs COUNT(*) plus an OFFSET query for every page, so
+deep pages get slower as tables grow. A keyset page instead filters on the
+last row seen in the list's ordering and reads ``page_size + 1`` rows, which
+costs the same on page 1 and page 10,000. Cursors are opaque url-safe tokens
+holding the boundary row's ordering values and the paging direction.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Totals shown next to keyset pages are cached this long (seconds)
+COUNT_TIMEOUT = 120
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a page_size query parameter, clamped to 1..maximum"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def encode_cursor(values, direction="next"):
+    payload = json.dumps({"d": direction, "k": values}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return (values, direction), or (None, "next") for a missing/bad cursor"""
+    if not token:
+        return None, "next"
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["k"], payload["d"]
+    except (ValueError, KeyError, TypeError):
+        return None, "next"
+    if not isinstance(values, list) or direction not in ("next", "prev"):
+        return None, "next"
+    return values, direction
+
+
+def _after(ordering, values, reverse=False):
+    """Q for rows strictly after (or before) the boundary row in ordering"""
+    lookup = "lt" if reverse else "gt"
+    condition = Q()
+    for position, field in enumerate(ordering):
+        clause = Q(**{f"{field}__{lookup}": values[position]})
+        for previous, value in zip(ordering[:position], values):
+            clause &= Q(**{previous: value})
+        condition |= clause
+    return condition
+
+
+class KeysetPage:
+    """A page of rows plus the cursors to its neighbours"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE, count=None):
+    """
+    Return a KeysetPage of ``queryset`` ordered ascending by ``ordering``,
+    which must end in a unique field (normally ``id``).
+    """
+    values, direction = decode_cursor(cursor)
+    if values is not None and len(values) != len(ordering):
+        values, direction = None, "next"
+
+    backwards = direction == "prev"
+    rows = queryset.order_by(*(f"-{field}" if backwards else field for field in ordering))
+    if values is not None:
+        rows = rows.filter(_after(ordering, values, reverse=backwards))
+
+    rows = list(rows[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    def key(obj):
+        return [getattr(obj, field) for field in ordering]
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = encode_cursor(key(rows[-1]), "next")
+        if (has_more and backwards) or (values is not None and not backwards):
+            previous_cursor = encode_cursor(key(rows[0]), "prev")
+
+    return KeysetPage(rows, next_cursor, previous_cursor, count)
+
+
+def cached_aggregate(queryset, version=None, timeout=COUNT_TIMEOUT, **aggregates):
+    """queryset.aggregate(**aggregates), cached by the queryset's SQL"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f"{sql}|{params!r}|{sorted(aggregates.items())!r}".encode()).hexdigest()
+    key = f"keyset-aggregate:{version}:{digest}"
+    result = cache.get(key)
+    if result is None:
+        result = queryset.order_by().aggregate(**aggregates)
+        cache.set(key, result, timeout)
+    return result
+
+
+def cached_count(queryset, version=None, timeout=COUNT_TIMEOUT):
+    """COUNT(*) of a queryset, cached by its SQL for ``timeout`` seconds"""
+    return cached_aggregate(queryset, version, timeout, count=Count("pk"))["count"]
@@ -0,0 +1,154 @@
+"""
+Parsing of Bible references such as "John 3:16", "1 Cor 13" or
+"Romans 8:28-39; 12:1-2".
+
+A reference becomes ``(book, start, end)``: the book's number (1-66), and
+the first and last verse it covers as ``chapter * VERSE_SPAN + verse``. A
+whole chapter runs from verse 0 to ``VERSE_SPAN - 1``. Two references
+overlap when each starts before the other ends, so "John 3" matches a
+sermon on "John 3:16", and "John 3:16" matches one on "John 3".
+
+Books are recognised by full name, common abbreviation or a prefix that
+only one book starts with, with 1/2/3 or I/II/III for numbered books.
+Two-letter abbreviations that are also English words ("is", "am") are
+left out. A book name with no chapter after it is not a reference.
+"""
+import re
+from collections import namedtuple
+
+VERSE_SPAN = 1000
+
+Reference = namedtuple("Reference", ["book", "start", "end"])
+
+BOOKS = [
+    ("Genesis", ""), ("Exodus", ""), ("Leviticus", ""), ("Numbers", ""),
+    ("Deuteronomy", "dt"), ("Joshua", "jsh"), ("Judges", "jdg judg"), ("Ruth", "rth"),
+    ("1 Samuel", "1sa 1sm"), ("2 Samuel", "2sa 2sm"), ("1 Kings", "1kgs 1ki"),
+    ("2 Kings", "2kgs 2ki"), ("1 Chronicles", "1chr 1ch"), ("2 Chronicles", "2chr 2ch"),
+    ("Ezra", "ezr"), ("Nehemiah", "neh"), ("Esther", "est"), ("Job", ""),
+    ("Psalms", "ps psa psalm pss"), ("Proverbs", "prv"), ("Ecclesiastes", "qoh"),
+    ("Song of Solomon", "song sos songofsongs canticles"), ("Isaiah", "isa"),
+    ("Jeremiah", "jer"), ("Lamentations", "lam"), ("Ezekiel", "ezk eze"),
+    ("Daniel", ""), ("Hosea", "hos"), ("Joel", ""), ("Amos", ""), ("Obadiah", "obad"),
+    ("Jonah", "jon jnh"), ("Micah", "mic"), ("Nahum", "nah"), ("Habakkuk", "hab"),
+    ("Zephaniah", "zeph"), ("Haggai", "hag"), ("Zechariah", "zech"),
+    ("Malachi", "mal"), ("Matthew", "mt"), ("Mark", "mk mrk"), ("Luke", "lk"),
+    ("John", "jn jhn"), ("Acts", ""), ("Romans", ""),
+    ("1 Corinthians", "1co"), ("2 Corinthians", "2co"), ("Galatians", "gal"),
+    ("Ephesians", "eph"), ("Philippians", "phil php"), ("Colossians", "col"),
+    ("1 Thessalonians", "1th"), ("2 Thessalonians", "2th"), ("1 Timothy", "1ti 1tm"),
+    ("2 Timothy", "2ti 2tm"), ("Titus", "tit"), ("Philemon", "phm philem"),
+    ("Hebrews", "heb"), ("James", "jas"), ("1 Peter", "1pe 1pt"), ("2 Peter", "2pe 2pt"),
+    ("1 John", "1jn 1jhn"), ("2 John", "2jn 2jhn"), ("3 John", "3jn 3jhn"), ("Jude", "jud"),
+    ("Revelation", "rev revelations"),
+]
+
+BOOK_NAMES = {number: name for number, (name, _) in enumerate(BOOKS, start=1)}
+
+
+def _key(name):
+    """Lookup key for a book name: "II Cor." -> "2cor" """
+    name = re.sub(r"[\s.]+", " ", name.lower()).strip()
+    name = re.sub(r"^(iii|ii|i)\s", lambda m: str(len(m.group(1))) + " ", name)
+    return name.replace(" ", "")
+
+
+def _book_keys():
+    keys = {}
+    for number, (name, aliases) in enumerate(BOOKS, start=1):
+        keys[_key(name)] = number
+        for alias in aliases.split():
+            keys[alias] = number
+
+    # Unambiguous prefixes of at least three characters ("gen", "deut", "1cor")
+    prefixes = {}
+    for number, (name, _) in enumerate(BOOKS, start=1):
+        full = _key(name)
+        for length in range(3, len(full)):
+            prefixes.setdefault(full[:length], set()).add(number)
+    for prefix, numbers in prefixes.items():
+        if len(numbers) == 1 and prefix not in keys:
+            keys[prefix] = numbers.pop()
+    return keys
+
+
+BOOK_KEYS = _book_keys()
+
+_PART = r"\d+(?::\d+)?(?:\s*[-–]\s*\d+(?::\d+)?)?"
+_REFERENCE = re.compile(
+    r"(?<![\w:])(?P<book>(?:[123]|iii|ii|i)?\s*[a-z]+(?:\s+of\s+[a-z]+)?)\.?\s*"
+    rf"(?P<parts>{_PART}(?:\s*[;,]\s*{_PART})*)(?![\w:])",
+    re.IGNORECASE,
+)
+_RANGE = re.compile(r"(\d+)(?::(\d+))?(?:\s*[-–]\s*(\d+)(?::(\d+))?)?")
+
+
+def book_number(name):
+    return BOOK_KEYS.get(_key(name))
+
+
+def _position(chapter, verse, last=False):
+    if verse is None:
+        verse = VERSE_SPAN - 1 if last else 0
+    return int(chapter) * VERSE_SPAN + min(int(verse), VERSE_SPAN - 1)
+
+
+def _parse_parts(book, parts):
+    references = []
+    chapter = None  # set while a comma-separated list is of verses
+    pieces = re.split(r"\s*([;,])\s*", parts)
+    separator = None
+    for piece in pieces:
+        if piece in (";", ","):
+            separator = piece
+            continue
+        a, a_verse, b, b_verse = _RANGE.fullmatch(piece).groups()
+        if separator != "," or a_verse is not None:
+            chapter = None
+        if chapter is not None:
+            # "John 3:16, 18-20": bare numbers after a verse are verses
+            a, a_verse, b, b_verse = chapter, a, chapter, b or a
+        elif a_verse is not None and b is not None and b_verse is None:
+            # "John 3:16-18": the range ends within the same chapter
+            b, b_verse = a, b
+        start = _position(a, a_verse)
+        end = _position(b or a, b_verse if b else a_verse, last=True)
+        if end >= start:
+            references.append(Reference(book, start, end))
+        if a_verse is not None or b_verse is not None:
+            chapter = b or a
+    return references
+
+
+def find_references(text):
+    """Return [(Reference, (start, end) span in text)] for every reference"""
+    found = []
+    for match in _REFERENCE.finditer(text or ""):
+        number = book_number(match.group("book"))
+        if number is None:
+            continue
+        for reference in _parse_parts(number, match.group("parts")):
+            found.append((reference, match.span()))
+    return found
+
+
+def parse_references(text):
+    """Every reference in a passage string such as "Romans 8:28; 12:1-2" """
+    return [reference for reference, _ in find_references(text)]
+
+
+def split_query(query):
+    """
+    Separate the references in a search string from the rest:
+    "faith Hebrews 11" -> ([Reference(58, 11000, 11999)], "faith")
+    """
+    found = find_references(query)
+    remaining = query or ""
+    for span in sorted({span for _, span in found}, reverse=True):
+        remaining = remaining[:span[0]] + " " + remaining[span[1]:]
+    return [reference for reference, _ in found], " ".join(remaining.split())
+
+
+def book_names(text):
+    """Full names of the books referred to, for the full-text index"""
+    return list(dict.fromkeys(BOOK_NAMES[reference.book] for reference in parse_references(text)))
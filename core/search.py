@@ -0,0 +1,309 @@
+"""
+Full-text search index over members, assemblies, units, cells, committees
+and sermons.
+
+SQLite gets an FTS5 virtual table with a prefix index and bm25 ranking.
+PostgreSQL gets a table of weighted tsvectors behind a GIN index ranked
+with ts_rank. On any other backend ``search`` returns None and callers keep
+their icontains filters.
+
+Each indexed row holds three columns: ``name`` (weighted highest),
+``contact`` (email and normalized phone numbers) and ``extra`` (city,
+state, description). Sermons put their title in ``name``, the preacher and
+passage (with book names spelled out, see core.scripture) in ``contact``
+and their notes in ``extra``. On SQLite the rowid encodes the object as
+``object_id * KIND_COUNT + kind`` so updates and deletes are primary key
+lookups. KIND_COUNT leaves room for more models; changing it means the
+index has to be rebuilt.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from . import scripture
+
+SEARCH_TABLE = "core_search_index"
+
+# Model name -> kind code stored with every indexed row
+KINDS = {"member": 0, "assembly": 1, "unit": 2, "cell": 3, "committee": 4, "sermon": 5}
+KIND_COUNT = 8
+
+# How many rows of one model are (re)indexed per statement batch
+INDEX_BATCH_SIZE = 500
+
+
+def normalize_phone(value):
+    """
+    Reduce a phone number to its national significant number so that
+    "0803 123 4567", "+234 803 123 4567" and "8031234567" compare equal.
+    """
+    value = (value or "").strip()
+    digits = re.sub(r"\D", "", value)
+    if digits.startswith("234") and (value.startswith("+") or len(digits) > 10):
+        digits = digits[3:]
+    return digits.lstrip("0")
+
+
+def phone_terms(value):
+    """Index terms for a phone number: its normalized and raw digit forms"""
+    digits = re.sub(r"\D", "", value or "")
+    terms = [normalize_phone(value), digits]
+    return [term for term in dict.fromkeys(terms) if term]
+
+
+def document_for(instance):
+    """Return (kind, object_id, name, contact, extra) for a model instance"""
+    model_name = instance._meta.model_name
+    kind = KINDS[model_name]
+
+    if model_name == "member":
+        name = " ".join(
+            part for part in (instance.first_name, instance.middle_name, instance.last_name) if part
+        )
+        contact = [instance.email, *phone_terms(instance.phone)]
+        extra = []
+    elif model_name == "assembly":
+        name = instance.name
+        contact = [instance.email, *phone_terms(instance.phone)]
+        extra = [instance.city, instance.state]
+    elif model_name == "sermon":
+        name = instance.title
+        contact = [
+            instance.preacher,
+            instance.bible_passage,
+            *scripture.book_names(instance.bible_passage),
+        ]
+        extra = [instance.notes]
+    elif model_name in ("unit", "committee"):
+        name = instance.name
+        contact = []
+        extra = [instance.description]
+    else:
+        name = instance.name
+        contact = []
+        extra = []
+
+    return (
+        kind,
+        instance.pk,
+        name or "",
+        " ".join(part for part in contact if part),
+        " ".join(part for part in extra if part),
+    )
+
+
+def query_terms(query):
+    """Split a search string into index terms, normalizing phone numbers"""
+    query = (query or "").strip()
+    if re.fullmatch(r"[\d\s+().-]+", query):
+        # The whole query looks like a phone number
+        phone = normalize_phone(query)
+        return [phone] if phone else []
+
+    terms = []
+    for token in re.findall(r"\w+", query.lower()):
+        if token.isdigit():
+            token = normalize_phone(token)
+        if token:
+            terms.append(token)
+    return terms
+
+
+def is_supported(using=None):
+    return (using or connection).vendor in ("sqlite", "postgresql")
+
+
+# ---------------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------------
+
+def create_index_table(conn):
+    """Create the backend's search table (used by the migration)"""
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                "name, contact, extra, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+            )
+        elif conn.vendor == "postgresql":
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                "kind smallint NOT NULL, object_id bigint NOT NULL, "
+                "document tsvector NOT NULL, PRIMARY KEY (kind, object_id))"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document "
+                f"ON {SEARCH_TABLE} USING GIN (document)"
+            )
+
+
+def drop_index_table(conn):
+    if conn.vendor in ("sqlite", "postgresql"):
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def index_objects(instances, conn=None):
+    """Insert or replace the index rows for the given saved instances"""
+    conn = conn or connection
+    if not is_supported(conn):
+        return
+    documents = [document_for(instance) for instance in instances if instance.pk]
+    if not documents:
+        return
+
+    with conn.cursor() as cursor:
+        for start in range(0, len(documents), INDEX_BATCH_SIZE):
+            batch = documents[start:start + INDEX_BATCH_SIZE]
+            if conn.vendor == "sqlite":
+                cursor.executemany(
+                    f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name, contact, extra) "
+                    "VALUES (%s, %s, %s, %s)",
+                    [
+                        (object_id * KIND_COUNT + kind, name, contact, extra)
+                        for kind, object_id, name, contact, extra in batch
+                    ],
+                )
+            else:
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (kind, object_id, document) VALUES "
+                    "(%s, %s, setweight(to_tsvector('simple', %s), 'A') || "
+                    "setweight(to_tsvector('simple', %s), 'B') || "
+                    "setweight(to_tsvector('simple', %s), 'C')) "
+                    "ON CONFLICT (kind, object_id) DO UPDATE SET document = EXCLUDED.document",
+                    batch,
+                )
+
+
+def remove_object(instance, conn=None):
+    """Delete the index row for an instance"""
+    conn = conn or connection
+    if not is_supported(conn) or instance.pk is None:
+        return
+    kind = KINDS[instance._meta.model_name]
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+                [instance.pk * KIND_COUNT + kind],
+            )
+        else:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND object_id = %s",
+                [kind, instance.pk],
+            )
+
+
+def rebuild_index(models, conn=None):
+    """Empty the index and re-add every row of the given models"""
+    conn = conn or connection
+    if not is_supported(conn):
+        return 0
+
+    total = 0
+    with transaction.atomic(using=conn.alias):
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+        for model in models:
+            batch = []
+            for instance in model._default_manager.order_by().iterator(chunk_size=2000):
+                batch.append(instance)
+                if len(batch) >= 2000:
+                    index_objects(batch, conn)
+                    total += len(batch)
+                    batch = []
+            index_objects(batch, conn)
+            total += len(batch)
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def _match_expression(terms):
+    if connection.vendor == "sqlite":
+        # Quote every term so FTS5 syntax characters are taken literally. The
+        # extra exact-token branch lets bm25 rank whole words above prefixes.
+        quoted = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        return " AND ".join(f"({term} OR {term}*)" for term in quoted)
+    return " & ".join(re.sub(r"\W", "", term) + ":*" for term in terms)
+
+
+def search(query, model_name, limit=10, exclude=None):
+    """
+    Return the ids of the best matching objects of one model, ranked, or
+    None when the backend has no search index. ``exclude`` is an optional
+    list of ``values_list(..., flat=True)`` querysets of ids to leave out.
+    """
+    if not is_supported():
+        return None
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    kind = KINDS[model_name]
+    expression = _match_expression(terms)
+    object_id = f"rowid / {KIND_COUNT}" if connection.vendor == "sqlite" else "object_id"
+    exclusions, exclude_params = "", []
+    for queryset in exclude or []:
+        sql, params = queryset.query.sql_with_params()
+        exclusions += f"AND {object_id} NOT IN ({sql}) "
+        exclude_params.extend(params)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"AND rowid %% {KIND_COUNT} = %s {exclusions}"
+                f"ORDER BY bm25({SEARCH_TABLE}, 10.0, 5.0, 1.0) LIMIT %s",
+                [expression, kind, *exclude_params, limit],
+            )
+            return [rowid // KIND_COUNT for (rowid,) in cursor.fetchall()]
+
+        cursor.execute(
+            f"SELECT object_id FROM {SEARCH_TABLE} "
+            f"WHERE kind = %s AND document @@ to_tsquery('simple', %s) {exclusions}"
+            "ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC LIMIT %s",
+            [kind, expression, *exclude_params, expression, limit],
+        )
+        return [object_id for (object_id,) in cursor.fetchall()]
+
+
+def matching_ids(query, model_name):
+    """
+    A subquery of every matching id, for use as ``filter(id__in=...)``, or
+    None when the backend has no search index.
+    """
+    if not is_supported():
+        return None
+    terms = query_terms(query)
+    if not terms:
+        return None
+
+    kind = KINDS[model_name]
+    expression = _match_expression(terms)
+    if connection.vendor == "sqlite":
+        return RawSQL(
+            f"SELECT rowid / {KIND_COUNT} FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid %% {KIND_COUNT} = %s",
+            [expression, kind],
+        )
+    return RawSQL(
+        f"SELECT object_id FROM {SEARCH_TABLE} "
+        "WHERE kind = %s AND document @@ to_tsquery('simple', %s)",
+        [kind, expression],
+    )
+
+
+def ranked(queryset, ids):
+    """Fetch ids from a queryset, keeping the ranking order of ids"""
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
@@ -0,0 +1,399 @@
+"""
+Sermon caching and audio delivery.
+
+Responses built from the sermon table (the API's public and recent feeds)
+are cached under a version number that the save/delete signals in
+``core.signals`` bump, so a write invalidates all of them at once. Like the
+lookup version, it starts from ``time.time_ns()`` rather than 1, so a cache
+that was cleared never hands back a version another process still holds.
+
+``audio_response`` serves a sermon's audio with single byte-range support,
+so players can seek without downloading the whole recording. With
+``SENDFILE_BACKEND`` set, it only sends headers and the web server sends
+the file (and handles ranges itself):
+- "nginx": X-Accel-Redirect to ``SENDFILE_URL_PREFIX`` plus the path under
+  MEDIA_ROOT
+- "apache": X-Sendfile with the absolute path
+
+Uploads arrive in chunks through ``SermonAudioUpload`` rows. Each chunk
+must start at the offset already received, so a client that lost its
+connection asks for the offset and carries on from there.
+
+``search_sermons`` replaces icontains scans: scripture references in the
+query are looked up in the ``SermonPassage`` index (one row per reference
+in ``bible_passage``, kept current by the save signal), and the other words
+in the full-text index of ``core.search``.
+"""
+import mimetypes
+import os
+import re
+import time
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.db.models import Case, IntegerField, Q, When
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import scripture, search
+from .models import SermonAudioUpload, SermonPassage
+
+SERMON_VERSION_KEY = "sermons:version"
+
+# Safety net for caches that are not shared between processes
+SERMON_CACHE_TIMEOUT = 600
+
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".aac", ".ogg", ".oga", ".opus", ".wav", ".flac")
+DEFAULT_AUDIO_MAX_SIZE = 500 * 1024 * 1024
+DEFAULT_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+STREAM_BLOCK_SIZE = 64 * 1024
+
+UPLOAD_DIR = "sermons/uploads"
+# Unfinished uploads untouched for this long are discarded
+UPLOAD_EXPIRY = timedelta(days=1)
+
+# Only this many of the best full-text matches are ranked and returned
+SEARCH_RESULT_LIMIT = 1000
+PASSAGE_BATCH_SIZE = 2000
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+def get_sermon_version():
+    version = cache.get(SERMON_VERSION_KEY)
+    if version is None:
+        cache.add(SERMON_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(SERMON_VERSION_KEY)
+    return version
+
+
+def invalidate_sermons():
+    """Drop every cached sermon response by moving to a new version"""
+    try:
+        cache.incr(SERMON_VERSION_KEY)
+    except ValueError:
+        cache.set(SERMON_VERSION_KEY, time.time_ns(), None)
+
+
+# ---------------------------------------------------------------------------
+# Serving
+# ---------------------------------------------------------------------------
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Inclusive (start, end) for a single-range ``Range`` header. Returns None
+    to send the whole file: no header, several ranges or a malformed one,
+    all of which RFC 9110 lets a server ignore.
+    """
+    match = _RANGE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # A suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+class _RangeFile:
+    """Read-only view of ``length`` bytes of ``file`` from ``start``"""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _offloaded(field, content_type):
+    backend = getattr(settings, "SENDFILE_BACKEND", "")
+    response = HttpResponse(content_type=content_type)
+    if backend == "nginx":
+        prefix = getattr(settings, "SENDFILE_URL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = quote(f"{prefix.rstrip('/')}/{field.name}")
+    elif backend == "apache":
+        response["X-Sendfile"] = field.path
+    else:
+        raise ImproperlyConfigured(f"Unknown SENDFILE_BACKEND: {backend!r}")
+    return response
+
+
+def audio_response(request, sermon):
+    """
+    The sermon's audio as a 200, 206, 304 or 416 response. Raises
+    FileNotFoundError when the sermon has no audio or the file is gone.
+    """
+    field = sermon.audio_file
+    if not field:
+        raise FileNotFoundError("This sermon has no audio")
+    stat = os.stat(field.path)
+    size = stat.st_size
+    content_type = mimetypes.guess_type(field.name)[0] or "application/octet-stream"
+    etag = quote_etag(f"{size:x}-{stat.st_mtime_ns:x}")
+    last_modified = int(stat.st_mtime)
+
+    def finish(response):
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    cached = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if cached is not None:
+        return finish(cached)
+    if getattr(settings, "SENDFILE_BACKEND", ""):
+        return finish(_offloaded(field, content_type))
+
+    byte_range = None
+    # If-Range: only send part of the file if the client's copy is current
+    if request.headers.get("If-Range", etag) in (etag, http_date(last_modified)):
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return finish(response)
+
+    if byte_range is None:
+        response = FileResponse(open(field.path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            _RangeFile(open(field.path, "rb"), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = length
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.block_size = STREAM_BLOCK_SIZE
+    return finish(response)
+
+
+# ---------------------------------------------------------------------------
+# Chunked uploads
+# ---------------------------------------------------------------------------
+
+class OffsetMismatch(ValueError):
+    """A chunk did not start where the upload left off"""
+
+    def __init__(self, expected):
+        super().__init__(f"Expected the chunk at offset {expected}")
+        self.expected = expected
+
+
+class ChunkTooLarge(ValueError):
+    pass
+
+
+def audio_max_size():
+    return getattr(settings, "SERMON_AUDIO_MAX_SIZE", DEFAULT_AUDIO_MAX_SIZE)
+
+
+def upload_chunk_size():
+    return getattr(settings, "SERMON_AUDIO_CHUNK_SIZE", DEFAULT_UPLOAD_CHUNK_SIZE)
+
+
+def validate_audio(filename, size):
+    """Raise ValueError for a file that may not be a sermon's audio"""
+    if os.path.splitext(filename)[1].lower() not in AUDIO_EXTENSIONS:
+        raise ValueError(f"Audio must be one of: {', '.join(AUDIO_EXTENSIONS)}")
+    if size <= 0:
+        raise ValueError("The file is empty")
+    if size > audio_max_size():
+        raise ValueError(f"Audio may be at most {audio_max_size() // (1024 * 1024)} MB")
+
+
+def _part_path(upload):
+    return os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR, f"{upload.pk}.part")
+
+
+def clear_stale_uploads():
+    """Delete uploads (and their partial files) nobody has touched recently"""
+    stale = SermonAudioUpload.objects.filter(updated_at__lt=timezone.now() - UPLOAD_EXPIRY)
+    for upload in stale:
+        if os.path.exists(_part_path(upload)):
+            os.remove(_part_path(upload))
+    return stale.delete()[0]
+
+
+def start_upload(sermon, filename, size, user=None):
+    validate_audio(filename, size)
+    clear_stale_uploads()
+    upload = SermonAudioUpload.objects.create(
+        sermon=sermon, filename=os.path.basename(filename), size=size, created_by=user
+    )
+    os.makedirs(os.path.dirname(_part_path(upload)), exist_ok=True)
+    open(_part_path(upload), "wb").close()
+    return upload
+
+
+def parse_content_range(header):
+    """(start, end, total) from a ``Content-Range: bytes start-end/total`` header"""
+    match = _CONTENT_RANGE.match((header or "").strip())
+    if not match:
+        raise ValueError("Send each chunk with a 'Content-Range: bytes start-end/total' header")
+    start, end, total = (int(value) for value in match.groups())
+    if end < start:
+        raise ValueError("Invalid Content-Range")
+    return start, end, total
+
+
+class _PartFile(File):
+    # Tells FileSystemStorage to move the finished file rather than copy it
+    def temporary_file_path(self):
+        return self.name
+
+
+def _finish_upload(upload):
+    sermon = upload.sermon
+    previous = sermon.audio_file.name
+    with _PartFile(open(_part_path(upload), "rb")) as part:
+        sermon.audio_file.save(upload.filename, part, save=True)
+    if previous and previous != sermon.audio_file.name:
+        sermon.audio_file.storage.delete(previous)
+    upload.delete()
+
+
+def append_chunk(upload, content_range, stream):
+    """
+    Write one chunk read from ``stream`` and return the new offset. The
+    completed file becomes the sermon's audio, and the upload row goes away.
+    """
+    start, end, total = parse_content_range(content_range)
+    length = end - start + 1
+    if total != upload.size or end >= upload.size:
+        raise ValueError(f"The upload is {upload.size} bytes")
+    if length > upload_chunk_size():
+        raise ChunkTooLarge(f"Chunks may be at most {upload_chunk_size()} bytes")
+    if start != upload.received:
+        raise OffsetMismatch(upload.received)
+
+    written = 0
+    with open(_part_path(upload), "r+b") as part:
+        part.seek(start)
+        while written < length:
+            data = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+            if not data:
+                break
+            part.write(data)
+            written += len(data)
+        part.truncate()
+
+    offset = start + written
+    # Conditional so that of two requests sending the same chunk only one counts
+    if not SermonAudioUpload.objects.filter(pk=upload.pk, received=start).update(
+        received=offset, updated_at=timezone.now()
+    ):
+        upload.refresh_from_db()
+        raise OffsetMismatch(upload.received)
+    upload.received = offset
+    if offset == upload.size:
+        _finish_upload(upload)
+    return offset
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+def _passages(sermon, passage_model):
+    return [
+        passage_model(sermon_id=sermon.pk, book=reference.book, start=reference.start, end=reference.end)
+        for reference in scripture.parse_references(sermon.bible_passage)
+    ]
+
+
+def index_passages(sermons):
+    """Replace the passage rows of the given saved sermons"""
+    sermons = [sermon for sermon in sermons if sermon.pk]
+    SermonPassage.objects.filter(sermon_id__in=[sermon.pk for sermon in sermons]).delete()
+    SermonPassage.objects.bulk_create(
+        [passage for sermon in sermons for passage in _passages(sermon, SermonPassage)],
+        batch_size=PASSAGE_BATCH_SIZE,
+    )
+
+
+def rebuild_passages(sermon_model, passage_model, batch_size=PASSAGE_BATCH_SIZE):
+    """
+    Re-parse every sermon's passage and return the number of passage rows.
+    The models may be historical models.
+    """
+    passage_model._default_manager.all().delete()
+    total = 0
+    batch = []
+    sermons = sermon_model._default_manager.only("id", "bible_passage").order_by("id")
+    for sermon in sermons.iterator(chunk_size=batch_size):
+        batch.extend(_passages(sermon, passage_model))
+        if len(batch) >= batch_size:
+            passage_model._default_manager.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    passage_model._default_manager.bulk_create(batch)
+    return total + len(batch)
+
+
+def passage_filter(references):
+    """Q over SermonPassage for passages overlapping any of the references"""
+    condition = Q()
+    for reference in references:
+        condition |= Q(book=reference.book, start__lte=reference.end, end__gte=reference.start)
+    return condition
+
+
+def search_sermons(queryset, query, rank=True):
+    """
+    ``queryset`` narrowed to sermons matching ``query``, or None when the
+    backend has no search index. With ``rank`` and words besides scripture
+    references, the best full-text matches come first.
+    """
+    if not search.is_supported():
+        return None
+    references, text = scripture.split_query(query)
+    if references:
+        queryset = queryset.filter(
+            id__in=SermonPassage.objects.filter(passage_filter(references)).values("sermon_id")
+        )
+    if not search.query_terms(text):
+        return queryset
+    if not rank:
+        return queryset.filter(id__in=search.matching_ids(text, "sermon"))
+
+    ids = search.search(text, "sermon", limit=SEARCH_RESULT_LIMIT)
+    if not ids:
+        return queryset.none()
+    position = Case(
+        *[When(id=pk, then=index) for index, pk in enumerate(ids)], output_field=IntegerField()
+    )
+    return (
+        queryset.filter(id__in=ids)
+        .annotate(search_rank=position)
+        .order_by("search_rank", "-sermon_date", "-id")
+    )
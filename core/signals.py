@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search, tombstones
+from .lookups import invalidate_lookups
+from .sermons import index_passages, invalidate_sermons
+from .stats import invalidate_inventory, invalidate_stats
+from .models import Assembly, Cell, Committee, Inventory, Member, Sermon, Unit
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Assembly)
+@receiver(post_save, sender=Unit)
+@receiver(post_save, sender=Cell)
+@receiver(post_save, sender=Committee)
+@receiver(post_save, sender=Sermon)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Keep the search index in step with saved members, lookups, committees and sermons"""
+    if not raw:
+        search.index_objects([instance])
+
+
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Assembly)
+@receiver(post_delete, sender=Unit)
+@receiver(post_delete, sender=Cell)
+@receiver(post_delete, sender=Committee)
+@receiver(post_delete, sender=Sermon)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Assembly)
+@receiver(post_save, sender=Unit)
+@receiver(post_save, sender=Cell)
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Assembly)
+@receiver(post_delete, sender=Unit)
+@receiver(post_delete, sender=Cell)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Any member or lookup change makes the cached dashboard counters stale"""
+    invalidate_stats()
+
+
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+@receiver(post_save, sender=Assembly)
+@receiver(post_delete, sender=Assembly)
+def invalidate_inventory_totals(sender, **kwargs):
+    """Inventory list totals are cached; searches also match assembly names"""
+    invalidate_inventory()
+
+
+@receiver(post_save, sender=Assembly)
+@receiver(post_save, sender=Unit)
+@receiver(post_save, sender=Cell)
+@receiver(post_delete, sender=Assembly)
+@receiver(post_delete, sender=Unit)
+@receiver(post_delete, sender=Cell)
+def invalidate_lookup_options(sender, **kwargs):
+    """Lookup rows are cached as filter options"""
+    invalidate_lookups()
+    # Another process may reload the old rows before this transaction commits
+    transaction.on_commit(invalidate_lookups)
+
+
+@receiver(post_save, sender=Sermon)
+@receiver(post_delete, sender=Sermon)
+@receiver(post_save, sender=Assembly)
+@receiver(post_delete, sender=Assembly)
+def invalidate_sermon_feeds(sender, **kwargs):
+    """Cached sermon feeds include the assembly name"""
+    invalidate_sermons()
+    transaction.on_commit(invalidate_sermons)
+
+
+@receiver(post_save, sender=Sermon)
+def update_sermon_passages(sender, instance, raw=False, **kwargs):
+    """Keep the scripture reference index in step with bible_passage"""
+    if not raw:
+        index_passages([instance])
+
+
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Cell)
+@receiver(post_delete, sender=Unit)
+@receiver(post_delete, sender=Sermon)
+def record_tombstone(sender, instance, **kwargs):
+    """Rows are hard-deleted; offline clients learn about it from the tombstone"""
+    tombstones.record_deletion(instance)
+
+
+@receiver(pre_save, sender=Member)
+def record_member_move(sender, instance, raw=False, **kwargs):
+    """A member leaving a cell or assembly disappears from that scope's sync"""
+    if not raw and instance.pk:
+        tombstones.record_move(instance)
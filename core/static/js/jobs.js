@@ -0,0 +1,70 @@
+// Background job panel: member imports and the list of recent jobs, polled
+// from the job endpoints while anything is queued or running.
+function initJobPanel($panel) {
+    const listUrl = $panel.data('list-url');
+    const $rows = $panel.find('.job-rows');
+    let timer = null;
+
+    function jobLabel(job) {
+        return {
+            import_members_csv: 'CSV member import',
+            import_excel: 'Excel member import',
+            export_members: 'Member export'
+        }[job.kind] || job.kind;
+    }
+
+    function renderJob(job) {
+        const colour = {QUEUED: 'secondary', RUNNING: 'primary', SUCCEEDED: 'success', FAILED: 'danger'}[job.status];
+        const percent = job.percent === null ? 100 : job.percent;
+        const $row = $('<tr>');
+        $row.append($('<td>').text(jobLabel(job)));
+        $row.append($('<td>').append($('<span class="badge">').addClass('bg-' + colour).text(job.status_display)));
+        const $bar = $('<div class="progress-bar">').addClass('bg-' + colour).css('width', percent + '%');
+        if (job.status === 'RUNNING' && job.percent === null) {
+            $bar.addClass('progress-bar-striped progress-bar-animated');
+        }
+        $row.append($('<td style="min-width: 160px">')
+            .append($('<div class="progress" style="height: 6px">').append($bar))
+            .append($('<small class="text-muted">').text(job.message)));
+        const $action = $('<td class="text-end">');
+        if (job.download_url) {
+            $action.append($('<a class="btn btn-sm btn-outline-success">').attr('href', job.download_url).text('Download'));
+        }
+        $row.append($action);
+        return $row;
+    }
+
+    function refresh() {
+        $.get(listUrl, function(data) {
+            $rows.empty();
+            if (!data.jobs.length) {
+                $rows.append('<tr><td colspan="4" class="text-center text-muted">No background jobs yet</td></tr>');
+            }
+            data.jobs.forEach(job => $rows.append(renderJob(job)));
+            const busy = data.jobs.some(job => !job.finished);
+            clearTimeout(timer);
+            timer = setTimeout(refresh, busy ? 2000 : 15000);
+        });
+    }
+
+    $panel.find('.job-import-form').on('submit', function(e) {
+        e.preventDefault();
+        const form = this;
+        $.ajax({
+            url: $(form).attr('action'),
+            type: 'POST',
+            data: new FormData(form),
+            processData: false,
+            contentType: false,
+            success: function() {
+                form.reset();
+                refresh();
+            },
+            error: function(xhr) {
+                alert((xhr.responseJSON && xhr.responseJSON.error) || 'Could not start the import');
+            }
+        });
+    });
+
+    refresh();
+}
@@ -0,0 +1,46 @@
+// Select2 member pickers backed by the member_autocomplete endpoint.
+// Usage: initMemberAutocomplete($('#id_leader'), { placeholder: '...', params: { exclude_committee: 3 } })
+function initMemberAutocomplete($select, options) {
+    options = options || {};
+    const params = Object.assign({}, options.params || {});
+    if ($select.data('exclude-admins')) {
+        params.exclude_admins = 1;
+    }
+
+    function formatMemberOption(member) {
+        if (!member.id) return member.text;
+
+        const email = member.email || $(member.element).data('email') || 'No email';
+        const phone = member.phone || $(member.element).data('phone') || 'No phone';
+
+        return $('<div class="member-option">')
+            .append($('<strong>').text(member.text))
+            .append('<br>')
+            .append($('<small class="text-muted">').text(email + ' | ' + phone));
+    }
+
+    $select.select2({
+        placeholder: options.placeholder || 'Search for a member...',
+        allowClear: true,
+        width: '100%',
+        theme: 'bootstrap-5',
+        dropdownParent: options.dropdownParent || $select.parent(),
+        minimumInputLength: 0,
+        ajax: {
+            url: $select.data('autocomplete-url') || '/ajax/members/autocomplete/',
+            dataType: 'json',
+            delay: 250,
+            data: function(search) {
+                return Object.assign({ q: search.term || '', limit: 20 }, params);
+            },
+            processResults: function(data) {
+                return { results: data.results || [] };
+            }
+        },
+        templateResult: formatMemberOption,
+        templateSelection: function(member) {
+            return member.text;
+        }
+    });
+    return $select;
+}
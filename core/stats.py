@@ -0,0 +1,205 @@
+"""
+Dashboard statistics computed in one query and cached per scope.
+
+Every counter shown by the dashboard and polled through ``quick_stats``
+comes from a single statement: conditional aggregation over the member
+table plus scalar sub-selects for assemblies, units and cells. Snapshots
+are cached per scope (everyone, or one cell) under a version number that
+the save/delete signals in ``core.signals`` bump, so any write invalidates
+every scope at once.
+
+The inventory dashboard's breakdowns come from ``inventory_breakdown``, one
+grouped aggregate over (assembly, status, condition). Inventory list totals
+are cached under their own version, bumped when items or assemblies change.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Assembly, Cell, Inventory, Member, Unit
+
+STATS_VERSION_KEY = "dashboard-stats:version"
+
+# Safety net for caches that are not shared between processes
+STATS_TIMEOUT = 300
+
+
+def get_stats_version():
+    """Current data version; changes whenever members or lookups change"""
+    version = cache.get(STATS_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(STATS_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_stats():
+    """Drop every cached snapshot by moving to a new version"""
+    try:
+        cache.incr(STATS_VERSION_KEY)
+    except ValueError:
+        cache.set(STATS_VERSION_KEY, 2, None)
+
+
+INVENTORY_VERSION_KEY = "inventory-stats:version"
+
+
+def get_inventory_version():
+    """Current inventory version; changes whenever items or assemblies change"""
+    version = cache.get(INVENTORY_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(INVENTORY_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_inventory():
+    """Drop cached inventory totals by moving to a new version"""
+    try:
+        cache.incr(INVENTORY_VERSION_KEY)
+    except ValueError:
+        cache.set(INVENTORY_VERSION_KEY, 2, None)
+
+
+def scope_for(admin_profile):
+    """Cache scope: a cell admin sees their cell, everyone else everything"""
+    if admin_profile is not None and admin_profile.is_cell_admin:
+        return f"cell:{admin_profile.cell_id}"
+    return "all"
+
+
+def compute_stats(cell_id=None, scoped=False):
+    """Compute every dashboard counter with one SQL statement"""
+    now = timezone.localtime() if settings.USE_TZ else datetime.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    ops = connection.ops
+    qn = ops.quote_name
+
+    where = ""
+    params = ["ACTIVE", ops.adapt_datetimefield_value(today_start)]
+    if scoped and cell_id is None:
+        where = f"WHERE {qn('cell_id')} IS NULL"
+    elif scoped:
+        where = f"WHERE {qn('cell_id')} = %s"
+        params.append(cell_id)
+
+    sql = (
+        "SELECT COUNT(*), "
+        f"COUNT(CASE WHEN {qn('membership_status')} = %s THEN 1 END), "
+        f"COUNT(CASE WHEN {qn('created_at')} >= %s THEN 1 END), "
+        f"(SELECT COUNT(*) FROM {qn(Assembly._meta.db_table)}), "
+        f"(SELECT COUNT(*) FROM {qn(Unit._meta.db_table)}), "
+        f"(SELECT COUNT(*) FROM {qn(Cell._meta.db_table)}) "
+        f"FROM {qn(Member._meta.db_table)} {where}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    return dict(zip(
+        (
+            "total_members",
+            "active_members",
+            "new_members_today",
+            "total_assemblies",
+            "total_units",
+            "total_cells",
+        ),
+        row,
+    ))
+
+
+def get_stats(admin_profile=None):
+    """Return the cached statistics snapshot for an admin's scope"""
+    scope = scope_for(admin_profile)
+    key = f"dashboard-stats:{get_stats_version()}:{timezone.localdate().isoformat()}:{scope}"
+    stats = cache.get(key)
+    if stats is None:
+        if scope == "all":
+            stats = compute_stats()
+        else:
+            stats = compute_stats(cell_id=admin_profile.cell_id, scoped=True)
+        cache.set(key, stats, STATS_TIMEOUT)
+    return stats
+
+
+def _percentage(count, total):
+    return (count / total * 100) if total > 0 else 0
+
+
+def inventory_breakdown(top_assemblies=10):
+    """
+    Inventory counts and values by assembly x status x condition.
+
+    Returns the totals, the status and condition distributions, the top
+    assemblies by item count and ``matrix``, keyed
+    ``matrix[assembly_id][status][condition] = {"count", "value"}``. Costs two
+    queries however many assemblies there are.
+    """
+    cells = (
+        Inventory.objects.order_by()
+        .values("assembly_id", "status", "condition")
+        .annotate(count=Count("id"), value=Sum("total_price"))
+    )
+
+    matrix = {}
+    assemblies = {}
+    status_totals = dict.fromkeys((code for code, _ in Inventory.STATUS_CHOICES), 0)
+    condition_totals = dict.fromkeys((code for code, _ in Inventory.CONDITION_CHOICES), 0)
+    total_items = 0
+    total_value = Decimal(0)
+    for cell in cells:
+        count, value = cell["count"], cell["value"] or Decimal(0)
+        matrix.setdefault(cell["assembly_id"], {}).setdefault(cell["status"], {})[
+            cell["condition"]
+        ] = {"count": count, "value": value}
+
+        totals = assemblies.setdefault(
+            cell["assembly_id"], {"item_count": 0, "total_value": None, "status_counts": {}}
+        )
+        totals["item_count"] += count
+        if cell["value"] is not None:
+            totals["total_value"] = (totals["total_value"] or 0) + value
+        totals["status_counts"][cell["status"]] = (
+            totals["status_counts"].get(cell["status"], 0) + count
+        )
+
+        status_totals[cell["status"]] = status_totals.get(cell["status"], 0) + count
+        condition_totals[cell["condition"]] = condition_totals.get(cell["condition"], 0) + count
+        total_items += count
+        total_value += value
+
+    # Assemblies without inventory still rank (last), as the old annotate did
+    assembly_stats = [
+        {"id": pk, "name": name, **assemblies.get(
+            pk, {"item_count": 0, "total_value": None, "status_counts": {}}
+        )}
+        for pk, name in Assembly.objects.values_list("id", "name")
+    ]
+    assembly_stats.sort(key=lambda row: -row["item_count"])
+
+    return {
+        "total_items": total_items,
+        "total_value": total_value,
+        "status_counts": {
+            name: {
+                "count": status_totals[code],
+                "percentage": _percentage(status_totals[code], total_items),
+            }
+            for code, name in Inventory.STATUS_CHOICES
+        },
+        "condition_counts": {
+            name: {
+                "count": condition_totals[code],
+                "percentage": _percentage(condition_totals[code], total_items),
+            }
+            for code, name in Inventory.CONDITION_CHOICES
+        },
+        "assembly_stats": assembly_stats[:top_assemblies],
+        "matrix": matrix,
+    }
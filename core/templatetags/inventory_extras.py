@@ -4,17 +4,13 @@ from django.utils.http import urlencode
 register = template.Library()
 
 
-# @register.filter
-# def get_assembly_name(assemblies, assembly_id):
-#     try:
-#         return assemblies.get(id=assembly_id).name
-#     except:
-#         return "Unknown"
-
-
 @register.filter
-def status_count(items, status):
-    return items.filter(status=status).count()
+def status_count(status_counts, status):
+    """Look up a status in a precomputed {status: count} mapping"""
+    try:
+        return status_counts.get(status, 0)
+    except AttributeError:
+        return 0
 
 
 @register.filter
@@ -36,16 +32,6 @@ def update_query_params(**kwargs):
     return urlencode(query_dict)
 
 
-@register.filter
-def get_assembly_name(assemblies, assembly_id):
-    """Get assembly name from ID"""
-    try:
-        assembly = assemblies.get(id=int(assembly_id))
-        return assembly.name
-    except:
-        return "Unknown"
-
-
 @register.filter
 def div(value, arg):
     """Divide the value by the argument"""
@@ -0,0 +1,20 @@
+from django import template
+
+from core import lookups
+
+register = template.Library()
+
+
+@register.simple_tag
+def lookup_options(name):
+    """Cached options of a lookup table: {% lookup_options "cell" as cells %}"""
+    return lookups.options(name)
+
+
+@register.simple_tag(takes_context=True)
+def lookup_name(context, name, pk, default="Unknown"):
+    """
+    Name of a lookup row by id from the request's reference data:
+    {% lookup_name "assembly" assembly_filter as assembly %}
+    """
+    return lookups.for_request(context.get("request")).name(name, pk, default)
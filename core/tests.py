@@ -1,3 +1,1013 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Sum
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import jobs, lookups, metrics, scripture, search, stats
+from .benchmark import measure_views
+from .birthdays import backfill_birthdays, upcoming_birthdays
+from .context_processors import admin_context
+from .createdata import import_data_from_excel
+from .adminforms import AdminFilterForm
+from .forms import BulkMemberUploadForm, CommitteeForm, MemberFilterForm
+from .models import (Admin, Assembly, Cell, Committee, CommitteeMembership, ImportCheckpoint, Inventory, Job,
+                     Member, Unit)
+from .pagination import keyset_paginate, parse_page_size
+from .utils import csv_import, fakedata
+from .utils import export as export_utils
+from .utils.csv_import import import_members_from_csv
 
 # Create your tests here.
+
+
+class CsvImportTests(TestCase):
+    HEADER = ['Surname', 'Other Names 1', 'Other Names 2', 'Gender', 'Status',
+              'DOB', 'Phone', 'Email', 'Cell', 'Main Unit']
+
+    def write_csv(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.HEADER)
+            writer.writerows(rows)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_creates_then_updates_in_chunks(self):
+        rows = [
+            ['Ade', 'Tunde', '', 'M', 'Single', '12/03/1990', '0801', '', 'Ipinsa', 'Media'],
+            ['Bello', 'Kemi', '', 'F', 'Married', '', '', 'kemi@example.com', '', ''],
+            ['Ade', 'Tunde', 'Ola', 'M', 'Married', '', '0801', '', '', ''],
+            ['Okon', 'Ema', '', 'F', '', '', '', '', '', ''],
+        ]
+        chunks = []
+        created, updated = import_members_from_csv(
+            self.write_csv(rows), chunk_size=2,
+            on_chunk=lambda *args: chunks.append(args),
+        )
+
+        self.assertEqual((created, updated), (3, 1))
+        self.assertEqual([c[1] for c in chunks], [2, 2])
+        self.assertEqual(Member.objects.count(), 3)
+        tunde = Member.objects.get(phone='0801')
+        self.assertEqual(tunde.middle_name, 'Ola')
+        self.assertEqual(tunde.marital_status, 'MARRIED')
+        self.assertEqual(tunde.month_of_birth, None)
+
+        created, updated = import_members_from_csv(self.write_csv(rows[:2]))
+        self.assertEqual((created, updated), (0, 2))
+        self.assertEqual(Member.objects.get(phone='0801').month_of_birth, 'March')
+
+    def test_failed_import_resumes_from_checkpoint(self):
+        rows = [
+            ['Ade', 'Tunde', '', 'M', '', '', '0801', '', '', ''],
+            ['Bello', 'Kemi', '', 'F', '', '', '0802', '', '', ''],
+            ['Okon', 'Ema', '', 'F', '', '', '0803', '', '', ''],
+        ]
+        path = self.write_csv(rows)
+        real_import_chunk = csv_import.import_chunk
+        calls = []
+
+        def failing_import_chunk(*args, **kwargs):
+            calls.append(args[0])
+            if len(calls) == 2:
+                raise ValueError('bad date')
+            return real_import_chunk(*args, **kwargs)
+
+        with mock.patch.object(csv_import, 'import_chunk', failing_import_chunk):
+            with self.assertRaises(ValueError):
+                import_members_from_csv(path, chunk_size=1)
+
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertEqual((checkpoint.rows_committed, checkpoint.completed), (1, False))
+        self.assertEqual(Member.objects.count(), 1)
+
+        created, updated = import_members_from_csv(path, chunk_size=1)
+        self.assertEqual((created, updated), (2, 0))
+        checkpoint.refresh_from_db()
+        self.assertEqual((checkpoint.rows_committed, checkpoint.completed), (3, True))
+
+    def test_dry_run_reports_diffs_without_writing(self):
+        import_members_from_csv(self.write_csv([
+            ['Ade', 'Tunde', '', 'M', 'Single', '', '0801', '', '', ''],
+        ]))
+        diffs = []
+        created, updated = import_members_from_csv(
+            self.write_csv([
+                ['Ade', 'Tunde', '', 'M', 'Married', '', '0801', '', '', ''],
+                ['Bello', 'Kemi', '', 'F', '', '', '0802', '', '', ''],
+            ]),
+            dry_run=True,
+            on_diff=lambda row, member, changes: diffs.append((row, changes)),
+        )
+
+        self.assertEqual((created, updated), (1, 1))
+        self.assertEqual(diffs, [
+            (1, {'marital_status': ('SINGLE', 'MARRIED')}),
+            (2, None),
+        ])
+        self.assertEqual(Member.objects.count(), 1)
+        self.assertEqual(Member.objects.get().marital_status, 'SINGLE')
+        self.assertEqual(ImportCheckpoint.objects.count(), 1)
+
+
+class ExcelImportTests(TestCase):
+    def test_import_resolves_lookups_once_and_bulk_inserts(self):
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        pd.DataFrame([
+            {'First Name': ' Tunde ', 'Last Name': 'Ade', 'Email': 'T@X.COM',
+             'Phone': 8031234567, 'Assembly': 'Ifelodun', 'Cell': 'Ipinsa'},
+            {'First Name': 'Kemi', 'Last Name': 'Bello', 'Email': None,
+             'Phone': None, 'Assembly': 'Ifelodun  ', 'Cell': None},
+            {'First Name': 'Ema', 'Last Name': 'Okon', 'Email': None,
+             'Phone': None, 'Assembly': None, 'Cell': 'Ipinsa'},
+        ]).to_excel(path, index=False)
+
+        with self.assertNumQueries(12):
+            result = import_data_from_excel(path)
+
+        self.assertEqual(result, {
+            'members_created': 2,
+            'assemblies_created': 1,
+            'cells_created': 1,
+            'rows_skipped': 1,
+        })
+        tunde = Member.objects.get(first_name='Tunde')
+        self.assertEqual((tunde.email, tunde.phone), ('t@x.com', '8031234567'))
+        self.assertEqual(tunde.cell, Cell.objects.get(name='Ipinsa'))
+        self.assertIsNone(Member.objects.get(first_name='Kemi').cell)
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.assembly = Assembly.objects.create(
+            name='Ifelodun Assembly', street_address='x', city='Akure', state='Ondo'
+        )
+        cls.tunde = Member.objects.create(
+            assembly=cls.assembly, first_name='Tunde', last_name='Adeyemi',
+            gender='M', phone='0803 123 4567', email='tunde@example.com',
+        )
+        cls.kemi = Member.objects.create(
+            assembly=cls.assembly, first_name='Kemi', last_name='Tundeji', gender='F',
+        )
+        # Background rows so bm25 has a meaningful document frequency
+        for i in range(8):
+            Member.objects.create(
+                assembly=cls.assembly, first_name=f'Other{i}', last_name='Person', gender='F',
+            )
+
+    def test_prefix_match_is_ranked_by_name(self):
+        self.assertCountEqual(search.search('tun', 'member'), [self.tunde.pk, self.kemi.pk])
+        # An exact name plus email hit outranks a prefix-only hit
+        self.assertEqual(search.search('tunde', 'member'), [self.tunde.pk, self.kemi.pk])
+        self.assertEqual(search.search('ade tun', 'member'), [self.tunde.pk])
+        self.assertEqual(search.search('akure', 'assembly'), [self.assembly.pk])
+
+    def test_phone_numbers_are_normalized(self):
+        for query in ('+234 803 123', '0803123', '8031234567'):
+            self.assertEqual(search.search(query, 'member'), [self.tunde.pk], query)
+
+    def test_index_follows_save_and_delete(self):
+        self.kemi.first_name = 'Funmi'
+        self.kemi.save()
+        self.assertEqual(search.search('funmi', 'member'), [self.kemi.pk])
+        self.kemi.delete()
+        self.assertEqual(search.search('funmi', 'member'), [])
+
+    def test_ajax_search_uses_index(self):
+        response = self.client.get(reverse('ajax_search'), {'q': 'tunde@exa'})
+        self.assertEqual(
+            [m['id'] for m in response.json()['members']], [self.tunde.pk]
+        )
+
+
+class DashboardStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.assembly = Assembly.objects.create(
+            name='Main', street_address='x', city='Akure', state='Ondo'
+        )
+        cls.cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+        Member.objects.create(assembly=cls.assembly, first_name='A', last_name='A', gender='M', cell=cls.cell)
+        Member.objects.create(
+            assembly=cls.assembly, first_name='B', last_name='B', gender='F',
+            membership_status='VISITOR',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_come_from_one_query_and_are_cached(self):
+        with self.assertNumQueries(1):
+            snapshot = stats.get_stats()
+        self.assertEqual(snapshot, {
+            'total_members': 2,
+            'active_members': 1,
+            'new_members_today': 2,
+            'total_assemblies': 1,
+            'total_units': 0,
+            'total_cells': 1,
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(stats.get_stats(), snapshot)
+
+    def test_cell_scope_and_signal_invalidation(self):
+        member = Member.objects.get(first_name='A')
+        admin = Admin(member=member, assembly=self.assembly, cell=self.cell)
+        admin.save()
+        self.assertEqual(stats.get_stats(admin)['total_members'], 1)
+
+        Member.objects.create(assembly=self.assembly, first_name='C', last_name='C', gender='F', cell=self.cell)
+        self.assertEqual(stats.get_stats(admin)['total_members'], 2)
+        self.assertEqual(stats.get_stats()['total_members'], 3)
+
+    def test_quick_stats_reads_snapshot(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+        stats.get_stats()
+        with self.assertNumQueries(3):
+            # session, user and admin_account lookups only
+            response = self.client.get(reverse('quick_stats'))
+        self.assertEqual(response.json()['total_members'], 2)
+
+
+class AdminContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+        member = Member.objects.create(assembly=assembly, first_name='Ada', last_name='Obi', gender='F')
+        self.admin = Admin(member=member, assembly=assembly, cell=cell)
+        self.admin.save()
+
+    def test_context_is_lazy_and_memoized_per_request(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=self.admin.user_account_id)
+
+        with self.assertNumQueries(0):
+            context = admin_context(request)
+        self.assertIs(admin_context(request), context)
+
+        with self.assertNumQueries(3):
+            # admin profile, its cell and the statistics snapshot
+            self.assertTrue(context['is_cell_admin'])
+            self.assertEqual(str(context['admin_cell_name']), 'Ipinsa')
+            self.assertEqual(str(context['members_count']), '1')
+        with self.assertNumQueries(0):
+            self.assertFalse(context['is_superadmin'])
+            self.assertEqual(str(context['members_count']), '1')
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        # Duplicate first names force the id tie-breaker
+        for index in range(7):
+            Member.objects.create(assembly=assembly, first_name='Ada' if index < 4 else 'Bola',
+                                  last_name='Obi', gender='F')
+        cls.ordering = ['first_name', 'last_name', 'id']
+        cls.expected = list(Member.objects.order_by(*cls.ordering).values_list('id', flat=True))
+
+    def ids(self, page):
+        return [member.id for member in page]
+
+    def test_walks_forward_and_back(self):
+        queryset = Member.objects.all()
+        first = keyset_paginate(queryset, self.ordering, None, 3)
+        second = keyset_paginate(queryset, self.ordering, first.next_cursor, 3)
+        third = keyset_paginate(queryset, self.ordering, second.next_cursor, 3)
+        self.assertEqual(self.ids(first) + self.ids(second) + self.ids(third), self.expected)
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+
+        back = keyset_paginate(queryset, self.ordering, third.previous_cursor, 3)
+        self.assertEqual(self.ids(back), self.ids(second))
+        self.assertTrue(back.has_next and back.has_previous)
+
+    def test_bad_cursor_and_page_size(self):
+        page = keyset_paginate(Member.objects.all(), self.ordering, 'not-a-cursor', 5)
+        self.assertEqual(self.ids(page), self.expected[:5])
+        self.assertEqual(parse_page_size('500'), 100)
+        self.assertEqual(parse_page_size('abc'), 25)
+        self.assertEqual(parse_page_size('0'), 1)
+
+
+class InventoryDashboardTests(TestCase):
+    def setUp(self):
+        assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        member = Member.objects.create(assembly=assembly, first_name='Ada', last_name='Obi', gender='F')
+        admin = Admin(member=member, assembly=assembly, level='SUPERADMIN')
+        admin.save()
+        self.client.force_login(admin.user_account)
+
+    def add_items(self, assemblies):
+        for index in range(assemblies):
+            assembly = Assembly.objects.create(name=f'A{index}', street_address='x', city='Akure', state='Ondo')
+            for status, condition in [('available', 'good'), ('available', 'poor'), ('in_use', 'good')]:
+                Inventory.objects.create(
+                    name='Chair', description='-', assembly=assembly, acquired_from='-', Brand='-',
+                    quantity=2, price_per_unit=5, status=status, condition=condition, location='-',
+                )
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('inventory_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_breakdown_matrix(self):
+        self.add_items(2)
+        assembly = Assembly.objects.get(name='A0')
+        breakdown = stats.inventory_breakdown()
+        self.assertEqual(breakdown['total_items'], 6)
+        self.assertEqual(breakdown['total_value'], 60)
+        self.assertEqual(breakdown['status_counts']['Available']['count'], 4)
+        self.assertEqual(breakdown['matrix'][assembly.id]['available']['poor']['count'], 1)
+        self.assertEqual(breakdown['assembly_stats'][0]['status_counts'], {'available': 2, 'in_use': 1})
+
+    def test_keyset_totals_follow_changes(self):
+        cache.clear()
+        self.add_items(1)
+        keyset = {'paging': 'keyset'}
+        self.assertEqual(self.client.get(reverse('inventory_list'), keyset).context['total_items'], 3)
+        Inventory.objects.first().delete()
+        self.assertEqual(self.client.get(reverse('inventory_list'), keyset).context['total_items'], 2)
+
+    def test_query_count_does_not_grow_with_assemblies(self):
+        self.add_items(1)
+        _, few = self.dashboard_queries()
+        self.add_items(5)
+        response, many = self.dashboard_queries()
+        self.assertEqual(few, many)
+        self.assertContains(response, '2 Available')
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True, QUERY_BUDGETS={'quick_stats': 1})
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        member = Member.objects.create(assembly=assembly, first_name='Ada', last_name='Obi', gender='F')
+        self.admin = Admin(member=member, assembly=assembly, level='SUPERADMIN')
+        self.admin.save()
+        self.client.force_login(self.admin.user_account)
+
+    def test_server_timing_histogram_and_budget(self):
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            response = self.client.get(reverse('quick_stats'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('quick_stats issued', logs.output[0])
+
+        self.client.get(reverse('dashboard'))
+        views = self.client.get(reverse('request_metrics')).json()['views']
+        self.assertEqual(views['quick_stats']['requests'], 1)
+        self.assertGreater(views['quick_stats']['queries']['max'], 1)
+        self.assertGreater(views['dashboard']['template_ms']['max'], 0)
+        self.assertEqual(sum(views['dashboard']['latency_histogram'].values()), 1)
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 11))
+        self.assertEqual(metrics.percentile(values, 0.5), 5)
+        self.assertEqual(metrics.percentile(values, 0.9), 9)
+        self.assertEqual(metrics.percentile(values, 0.95), 10)
+        self.assertEqual(metrics.percentile(values, 0.0), 1)
+        self.assertEqual(metrics.percentile(list(range(1, 101)), 0.07), 7)
+        self.assertEqual(metrics.percentile([], 0.5), 0)
+
+    def test_endpoint_is_superadmin_only(self):
+        self.admin.level = 'MODERATOR'
+        self.admin.save()
+        self.assertEqual(self.client.get(reverse('request_metrics')).status_code, 403)
+
+
+class FakeDataTests(TestCase):
+    def test_generator_is_seeded_and_benchmark_covers_views(self):
+        created = fakedata.generate(members=60, assemblies=2, cells=4, units=3, committees=2,
+                                    committee_size=5, inventory=10, sermons=5, admins=2, seed=7)
+        self.assertEqual(created['members'], 60)
+        self.assertEqual(created['committee_memberships'], 10)
+        self.assertEqual(Admin.objects.filter(level='SUPERADMIN').count(), 1)
+        names = list(Member.objects.order_by('id').values_list('first_name', 'last_name', 'phone'))
+        self.assertTrue(search.search(names[0][1], 'member', limit=100))
+
+        Member.objects.all().delete()
+        fakedata.generate(members=60, assemblies=2, cells=4, units=3, committees=0,
+                          inventory=0, sermons=0, admins=0, seed=7)
+        again = list(Member.objects.order_by('id').values_list('first_name', 'last_name', 'phone'))
+        self.assertEqual(again, names)
+
+    def test_benchmark_views_all_respond(self):
+        fakedata.generate(members=40, assemblies=2, cells=3, units=2, committees=1,
+                          committee_size=5, inventory=5, sermons=3, admins=1)
+        results = measure_views(repeat=1)
+        self.assertIn('committee_detail', results)
+        self.assertEqual({name for name, result in results.items() if result['status'] != 200}, set())
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class QueryPlanTests(TestCase):
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f'INDEX {index}', plan)
+        # Rows come out of the index already ordered
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_member_list_filters(self):
+        members = Member.objects.order_by('first_name', 'last_name')
+        self.assertUsesIndex(members.filter(cell_id=1), 'member_cell_name_idx')
+        self.assertUsesIndex(members.filter(assembly_id=1), 'member_assembly_name_idx')
+        self.assertUsesIndex(members.filter(unit_id=1), 'member_unit_name_idx')
+        self.assertUsesIndex(members.filter(membership_status='ACTIVE'), 'member_status_name_idx')
+        self.assertUsesIndex(members.filter(gender='F'), 'member_gender_name_idx')
+        self.assertIn('member_created_idx', Member.objects.order_by('-created_at')[:10].explain())
+
+    def test_member_foreign_keys_use_the_composite_indexes(self):
+        for field in ('assembly', 'cell', 'unit'):
+            plan = Member.objects.filter(**{f'{field}_id': 1}).order_by().explain()
+            self.assertRegex(plan, rf'INDEX member_{field}_\w+_idx \({field}_id=\?')
+
+    def test_inventory_filters_and_breakdown(self):
+        self.assertUsesIndex(Inventory.objects.filter(status='available'), 'inventory_status_idx')
+        self.assertUsesIndex(Inventory.objects.filter(condition='good'), 'inventory_condition_idx')
+        self.assertUsesIndex(Inventory.objects.order_by('-total_price'), 'inventory_price_idx')
+        self.assertUsesIndex(Inventory.objects.order_by('-created_at'), 'inventory_created_idx')
+        breakdown = (
+            Inventory.objects.order_by()
+            .values('assembly_id', 'status', 'condition')
+            .annotate(count=Count('id'), value=Sum('total_price'))
+        )
+        self.assertIn('COVERING INDEX inventory_breakdown_idx', breakdown.explain())
+
+
+class BirthdayTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        for name, born in [('Dec', date(1990, 12, 30)), ('Jan', date(1985, 1, 3)),
+                           ('Feb', date(2000, 2, 29)), ('Jun', date(1970, 6, 1))]:
+            Member.objects.create(assembly=cls.assembly, first_name=name, last_name='Obi',
+                                  gender='F', date_of_birth=born)
+
+    def names(self, today, days):
+        return [member.first_name for member, _ in upcoming_birthdays(Member.objects.all(), days, today)]
+
+    def test_save_fills_columns_and_backfill_repairs(self):
+        member = Member.objects.get(first_name='Jun')
+        self.assertEqual((member.birth_month, member.birth_day), (6, 1))
+        Member.objects.filter(pk=member.pk).update(birth_month=None, birth_day=None)
+        self.assertEqual(backfill_birthdays(Member), 1)
+        self.assertEqual(Member.objects.get(pk=member.pk).birth_month, 6)
+
+    def test_window_wraps_the_year_and_handles_leap_day(self):
+        self.assertEqual(self.names(date(2025, 12, 28), 7), ['Dec', 'Jan'])
+        self.assertEqual(self.names(date(2025, 2, 20), 10), ['Feb'])
+        pairs = upcoming_birthdays(Member.objects.filter(first_name='Feb'), 10, date(2025, 2, 20))
+        self.assertEqual(pairs[0][1], date(2025, 2, 28))
+        # A window ending on 28 February of a non-leap year includes the 29th
+        self.assertEqual(self.names(date(2025, 2, 28), 0), ['Feb'])
+        self.assertEqual(self.names(date(2025, 2, 25), 3), ['Feb'])
+        self.assertEqual(self.names(date(2024, 2, 25), 3), [])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_month_filter_uses_index(self):
+        plan = Member.objects.filter(birth_month=3).order_by('birth_day').explain()
+        self.assertIn('member_birthday_idx', plan)
+
+    def test_endpoint_is_scoped_to_the_cell_admin(self):
+        cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+        admin = Admin(member=Member.objects.get(first_name='Dec'), assembly=self.assembly, cell=cell)
+        admin.save()
+        self.client.force_login(admin.user_account)
+        with mock.patch('core.views.timezone.localdate', return_value=date(2025, 12, 28)):
+            data = self.client.get(reverse('birthday_calendar'), {'days': 7}).json()
+        self.assertEqual([row['name'] for row in data['results']], ['Dec Obi'])
+        self.assertEqual(data['results'][0]['turning'], 35)
+        self.assertEqual(data['results'][0]['days_until'], 2)
+
+    def test_endpoint_stays_within_the_admin_assembly(self):
+        other = Assembly.objects.create(name='Other', street_address='x', city='Ondo', state='Ondo')
+        Member.objects.create(assembly=other, first_name='Far', last_name='Away', gender='M',
+                              date_of_birth=date(1990, 12, 29))
+        admin = Admin(member=Member.objects.get(first_name='Jun'), assembly=self.assembly, level='MODERATOR')
+        admin.save()
+        self.client.force_login(admin.user_account)
+        with mock.patch('core.views.timezone.localdate', return_value=date(2025, 12, 28)):
+            data = self.client.get(reverse('birthday_calendar'), {'days': 7, 'assembly': other.pk}).json()
+        self.assertEqual(data['results'], [])
+
+        admin.level = 'Inventory'
+        admin.save()
+        self.assertEqual(self.client.get(reverse('birthday_calendar')).status_code, 403)
+        self.client.force_login(User.objects.create_user('plain', password='x'))
+        self.assertEqual(self.client.get(reverse('birthday_calendar')).status_code, 403)
+
+
+class GroupMemberPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        cls.cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+        cls.unit = Unit.objects.create(name='Choir')
+        Member.objects.bulk_create(
+            Member(assembly=cls.assembly, cell=cls.cell, unit=cls.unit, first_name=f'M{index:02}', last_name='Obi',
+                   gender='F', membership_status='ACTIVE' if index % 2 else 'NEW_MEMBER')
+            for index in range(45)
+        )
+
+    def test_modals_render_one_page_and_a_summary(self):
+        for name, pk in [('cell_detail_modal', self.cell.pk), ('unit_detail_modal', self.unit.pk),
+                         ('assembly_detail_modal', self.assembly.pk)]:
+            with self.assertNumQueries(3):
+                # object, summary aggregate, first page
+                html = self.client.get(reverse(name, args=[pk])).json()['html']
+            self.assertIn('M19', html)
+            self.assertNotIn('M20', html)
+            self.assertIn('Showing <span class="members-shown">20</span> of 45', html)
+
+    def test_endpoint_pages_through_the_rest(self):
+        url = reverse('cell_members', args=[self.cell.pk])
+        first = self.client.get(url).json()
+        second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+        third = self.client.get(url, {'cursor': second['next_cursor'], 'page_size': 500}).json()
+        self.assertEqual([first['count'], second['count'], third['count']], [20, 20, 5])
+        self.assertIsNone(third['next_cursor'])
+        self.assertEqual(third['results'][-1]['name'], 'M44 Obi')
+        self.assertIn('view-cell-member', third['html'])
+
+
+class MemberAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        members = Member.objects.bulk_create(
+            Member(assembly=cls.assembly, first_name=f'Tobi{index:02}', last_name='Ade', gender='M')
+            for index in range(60)
+        )
+        search.index_objects(members)
+        cls.committee = Committee.objects.create(name='Welfare')
+        CommitteeMembership.objects.create(committee=cls.committee, member=members[0])
+        cls.admin = Admin(member=members[1], assembly=cls.assembly, level='SUPERADMIN')
+        cls.admin.save()
+
+    def setUp(self):
+        self.client.force_login(self.admin.user_account)
+
+    def names(self, **params):
+        response = self.client.get(reverse('member_autocomplete'), params)
+        return [result['text'] for result in response.json()['results']]
+
+    def test_prefix_match_and_limit(self):
+        self.assertEqual(len(self.names(q='tob')), 10)
+        self.assertEqual(len(self.names(q='tob', limit=500)), 50)
+        self.assertEqual(self.names(q='tobi05 ad'), ['Tobi05 Ade'])
+        self.assertEqual(self.names(q='zzz'), [])
+
+    def test_exclusions(self):
+        names = self.names(q='tobi0', exclude_committee=self.committee.id, exclude_admins=1)
+        self.assertNotIn('Tobi00 Ade', names)
+        self.assertNotIn('Tobi01 Ade', names)
+        self.assertIn('Tobi02 Ade', names)
+
+    def test_pickers_do_not_load_every_member(self):
+        leader = Member.objects.get(first_name='Tobi30')
+        html = str(CommitteeForm(initial={'leader': leader.pk})['leader'])
+        self.assertIn('Tobi30 Ade', html)
+        self.assertNotIn('Tobi31', html)
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('committee-detail', args=[self.committee.id]))
+        Member.objects.bulk_create(
+            Member(assembly=self.assembly, first_name=f'Extra{index}', last_name='Eze', gender='F')
+            for index in range(100)
+        )
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('committee-detail', args=[self.committee.id]))
+        self.assertEqual(len(small), len(large))
+        self.assertNotContains(response, 'Extra1')
+
+
+class BulkCommitteeMembershipTests(TestCase):
+    def setUp(self):
+        assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        self.members = Member.objects.bulk_create(
+            Member(assembly=assembly, first_name=f'Kemi{index:02}', last_name='Bello', gender='F')
+            for index in range(70)
+        )
+        self.committee = Committee.objects.create(name='Harvest')
+        self.kept = CommitteeMembership.objects.create(committee=self.committee, member=self.members[0])
+        self.dropped = CommitteeMembership.objects.create(committee=self.committee, member=self.members[1])
+        admin = Admin(member=self.members[2], assembly=assembly, level='SUPERADMIN')
+        admin.save()
+        self.client.force_login(admin.user_account)
+        self.url = reverse('bulk-committee-members', args=[self.committee.id])
+
+    def post(self, payload):
+        return self.client.post(self.url, payload, content_type='application/json')
+
+    def test_batch_is_applied_with_a_fixed_number_of_queries(self):
+        payload = {
+            'add': [{'member_id': member.id, 'role': 'Usher'} for member in self.members[3:63]],
+            'remove': [self.dropped.id],
+            'roles': [{'membership_id': self.kept.id, 'role': 'Secretary'}],
+        }
+        # session, user, committee, memberships, members, then the writes
+        with self.assertNumQueries(10):
+            response = self.post(payload)
+        data = response.json()
+        self.assertEqual(data['message'], '60 added, 1 removed, 1 roles updated')
+        self.assertEqual(self.committee.memberships.count(), 61)
+        self.assertFalse(CommitteeMembership.objects.filter(id=self.dropped.id).exists())
+        self.kept.refresh_from_db()
+        self.assertEqual(self.kept.role, 'Secretary')
+
+    def test_per_item_results(self):
+        data = self.post({
+            'add': [
+                {'member_id': self.members[0].id},
+                {'member_id': self.members[1].id},
+                {'member_id': self.members[5].id},
+                {'member_id': self.members[5].id},
+                {'member_id': 999999},
+                {'member_id': 'x'},
+            ],
+            'remove': [self.dropped.id, 999999],
+            'roles': [{'membership_id': self.dropped.id, 'role': 'Chair'}],
+        }).json()['results']
+        self.assertEqual(
+            [item['status'] for item in data['add']],
+            ['exists', 'added', 'added', 'duplicate', 'not_found', 'invalid'],
+        )
+        self.assertEqual([item['status'] for item in data['remove']], ['removed', 'not_found'])
+        self.assertEqual(data['roles'][0]['status'], 'conflict')
+        self.assertTrue(self.committee.memberships.filter(member=self.members[1]).exists())
+
+    def test_rejects_malformed_body(self):
+        self.assertEqual(self.post({'add': 'nope'}).status_code, 400)
+        self.assertEqual(
+            self.client.post(self.url, 'not json', content_type='application/json').status_code, 400
+        )
+
+
+class CommitteeListTests(TestCase):
+    def setUp(self):
+        self.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        self.members = Member.objects.bulk_create(
+            Member(assembly=self.assembly, first_name=f'Femi{index:02}', last_name='Okoro', gender='M')
+            for index in range(40)
+        )
+        self.welfare = Committee.objects.create(
+            name='Welfare', description='Visits sick members', leader=self.members[0]
+        )
+        self.choir = Committee.objects.create(name='Choir board')
+        CommitteeMembership.objects.bulk_create(
+            CommitteeMembership(committee=self.welfare, member=member, role=['', 'Secretary', 'Treasurer'][index % 3])
+            for index, member in enumerate(self.members[:10])
+        )
+        admin = Admin(member=self.members[39], assembly=self.assembly, level='SUPERADMIN')
+        admin.save()
+        self.client.force_login(admin.user_account)
+
+    def test_query_count_does_not_depend_on_committee_size(self):
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(reverse('committee-list'))
+        self.assertContains(response, '10 members')
+        self.assertContains(response, 'Leader: Femi00 Okoro')
+        self.assertEqual(len(response.context['page_obj'][1].role_preview), 3)
+
+        CommitteeMembership.objects.bulk_create(
+            CommitteeMembership(committee=committee, member=member, role='Usher')
+            for committee in (self.welfare, self.choir)
+            for member in self.members[10:]
+        )
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('committee-list'))
+        self.assertContains(response, '40 members')
+        self.assertEqual(len(small), len(large))
+
+    def test_search_uses_the_index(self):
+        response = self.client.get(reverse('committee-list'), {'search': 'sick'})
+        self.assertEqual([committee.name for committee in response.context['page_obj']], ['Welfare'])
+        self.assertEqual(str(self.welfare), 'Welfare')
+
+
+class LookupCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        Unit.objects.create(name='Choir')
+        self.cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+
+    def test_warm_cache_costs_no_queries(self):
+        lookups.options('cell')
+        with self.assertNumQueries(0):
+            self.assertEqual(lookups.options('cell'), ((self.cell.id, 'Ipinsa'),))
+
+    def test_filter_forms_render_from_the_cache(self):
+        for name in ('assembly', 'unit', 'cell'):
+            lookups.options(name)
+        with self.assertNumQueries(0):
+            html = str(MemberFilterForm()) + str(AdminFilterForm()) + str(BulkMemberUploadForm())
+            html += Template('{% load lookup_tags %}{% lookup_options "unit" as units %}'
+                             '{% for unit in units %}{{ unit.name }}{% endfor %}').render(Context())
+        self.assertIn('Ipinsa', html)
+        self.assertIn('Choir', html)
+
+        form = MemberFilterForm({'cell': self.cell.id})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['cell'], self.cell)
+
+    def test_saves_and_deletes_invalidate(self):
+        lookups.options('cell')
+        other = Cell.objects.create(name='Alagbaka', created_at='2024-01-01')
+        self.assertEqual([option.name for option in lookups.options('cell')], ['Alagbaka', 'Ipinsa'])
+        other.delete()
+        self.assertEqual([option.name for option in lookups.options('cell')], ['Ipinsa'])
+
+        # A cleared shared cache must not bring back rows held in-process
+        lookups.options('unit')
+        cache.clear()
+        Unit.objects.update(name='Ushers')
+        self.assertEqual(lookups.options('unit')[0].name, 'Ushers')
+
+
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.assembly = Assembly.objects.create(name='Oke Ijebu', street_address='x', city='Akure', state='Ondo')
+        member = Member.objects.create(assembly=self.assembly, first_name='Ada', last_name='Obi', gender='F')
+        admin = Admin(member=member, assembly=self.assembly, level='SUPERADMIN')
+        admin.save()
+        self.client.force_login(admin.user_account)
+
+    def test_names_resolve_without_queries(self):
+        request = RequestFactory().get('/')
+        lookups.options('assembly')
+        template = Template('{% load lookup_tags %}{% lookup_name "assembly" pk %}|'
+                            '{% lookup_name "assembly" "x" %}|{% lookup_name "cell" 99 default="-" %}')
+        lookups.options('cell')
+        with self.assertNumQueries(0):
+            html = template.render(Context({'request': request, 'pk': self.assembly.id}))
+        self.assertEqual(html, 'Oke Ijebu|Unknown|-')
+        self.assertIs(lookups.for_request(request), lookups.for_request(request))
+
+    def test_inventory_filter_badge(self):
+        response = self.client.get(reverse('inventory_list'), {'assembly': self.assembly.id})
+        self.assertContains(response, 'Assembly: Oke Ijebu')
+
+
+class MemberExportTests(TestCase):
+    def setUp(self):
+        self.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        self.cell = Cell.objects.create(name='Ipinsa', created_at='2024-01-01')
+        Member.objects.bulk_create(
+            Member(assembly=self.assembly, cell=self.cell if index % 2 else None, first_name=f'Bola{index:04}',
+                   last_name='Ajayi', gender='F' if index % 3 else 'M', email=f'b{index}@example.com')
+            for index in range(1200)
+        )
+        member = Member.objects.create(assembly=self.assembly, first_name='Ada', last_name='<Obi> & "Co"',
+                                       gender='F', date_of_birth=date(1990, 5, 17))
+        admin = Admin(member=member, assembly=self.assembly, level='SUPERADMIN')
+        admin.save()
+        self.client.force_login(admin.user_account)
+
+    def export(self, **params):
+        response = self.client.get(reverse('member_export'), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_honours_member_list_filters(self):
+        response, content = self.export(gender='M', cell='None')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:4], ['ID', 'First Name', 'Middle Name', 'Last Name'])
+        expected = Member.objects.filter(gender='M', cell__isnull=True).count()
+        self.assertEqual(len(rows) - 1, expected)
+        self.assertEqual({row[4] for row in rows[1:]}, {'Male'})
+
+    def test_xlsx_opens_in_openpyxl(self):
+        from openpyxl import load_workbook
+
+        response, content = self.export(format='xlsx', search='ada')
+        self.assertIn('members-', response['Content-Disposition'])
+        sheet = load_workbook(io.BytesIO(content), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][3], '<Obi> & "Co"')
+        self.assertEqual(rows[1][6], '1990-05-17')
+        self.assertEqual(rows[1][10], 'Main')
+
+        content = self.export(format='xlsx')[1]
+        sheet = load_workbook(io.BytesIO(content), read_only=True).active
+        self.assertEqual(sum(1 for _ in sheet.iter_rows()), 1202)
+
+    def test_formulas_are_written_as_text(self):
+        from openpyxl import load_workbook
+
+        Member.objects.create(assembly=self.assembly, first_name='=HYPERLINK("http://x")', last_name='@SUM(A1)',
+                              gender='M', phone='+2348031234567')
+        content = self.export(search='hyperlink')[1]
+        row = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))[1]
+        self.assertEqual(row[1], '\'=HYPERLINK("http://x")')
+        self.assertEqual(row[3], "'@SUM(A1)")
+        self.assertEqual(row[8], "'+2348031234567")
+
+        rows = export_utils.stream_xlsx(['a', 'b', 'c'], [('-1+2', '\tx', -5)])
+        sheet = load_workbook(io.BytesIO(b''.join(rows)), read_only=True).active
+        self.assertEqual(list(sheet.iter_rows(values_only=True))[1], ("'-1+2", "'\tx", -5))
+
+    def test_rejects_unknown_format(self):
+        self.assertEqual(self.client.get(reverse('member_export'), {'format': 'pdf'}).status_code, 400)
+
+    def login_as(self, level):
+        member = Member.objects.create(assembly=self.assembly, first_name=level, last_name='Admin', gender='M')
+        admin = Admin(member=member, assembly=self.assembly, level=level)
+        admin.save()
+        self.client.force_login(admin.user_account)
+
+    def test_moderator_exports_their_assembly(self):
+        other = Assembly.objects.create(name='Other', street_address='x', city='Ondo', state='Ondo')
+        Member.objects.create(assembly=other, first_name='Elsewhere', last_name='Ajayi', gender='M')
+        self.login_as('MODERATOR')
+        rows = list(csv.reader(io.StringIO(self.export()[1].decode('utf-8-sig'))))
+        self.assertEqual(len(rows) - 1, Member.objects.filter(assembly=self.assembly).count())
+
+    def test_inventory_admin_cannot_export(self):
+        self.login_as('Inventory')
+        self.assertEqual(self.client.get(reverse('member_export')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('member_export'), {'background': '1'}).status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), JOB_FILES_ROOT=tempfile.mkdtemp())
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.assembly = Assembly.objects.create(name='Main', street_address='x', city='Akure', state='Ondo')
+        member = Member.objects.create(assembly=self.assembly, first_name='Ada', last_name='Obi', gender='F')
+        admin = Admin(member=member, assembly=self.assembly, level='SUPERADMIN')
+        admin.save()
+        self.admin = admin
+        self.client.force_login(admin.user_account)
+
+    def upload(self, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return self.client.post(reverse('job_start_import'), {'file': SimpleUploadedFile(name, content)})
+
+    def test_uploaded_csv_is_imported_by_the_worker(self):
+        rows = io.StringIO()
+        writer = csv.writer(rows)
+        writer.writerow(CsvImportTests.HEADER)
+        writer.writerow(['Ade', 'Tunde', '', 'M', 'Single', '', '0801', '', '', ''])
+        writer.writerow(['Bello', 'Kemi', '', 'F', 'Married', '', '', 'kemi@example.com', '', ''])
+
+        response = self.upload('members.csv', rows.getvalue().encode('utf-8'))
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.json()['job']['id'])
+        self.assertEqual((job.status, job.kind), (Job.QUEUED, 'import_members_csv'))
+
+        jobs.Worker().run(burst=True)
+
+        status = self.client.get(reverse('job_status', args=[job.pk])).json()['job']
+        self.assertEqual(status['status'], Job.SUCCEEDED)
+        self.assertEqual(status['percent'], 100)
+        self.assertEqual(status['result'], {'members_created': 2, 'members_updated': 0})
+        self.assertTrue(Member.objects.filter(phone='0801').exists())
+        self.assertFalse(os.path.exists(job.params['path']))
+
+    def test_rejects_other_files_and_non_superadmins(self):
+        self.assertEqual(self.upload('members.pdf', b'x').status_code, 400)
+        member = Member.objects.create(assembly=self.assembly, first_name='Bayo', last_name='Ola', gender='M')
+        admin = Admin(member=member, assembly=self.assembly, level='ASSEMBLY')
+        admin.save()
+        self.client.force_login(admin.user_account)
+        self.assertEqual(self.upload('members.csv', b'Surname').status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+    def test_background_export_can_be_downloaded(self):
+        Member.objects.bulk_create(
+            Member(assembly=self.assembly, first_name=f'Bola{index}', last_name='Ajayi', gender='M')
+            for index in range(30)
+        )
+        response = self.client.get(reverse('member_export'), {'gender': 'M', 'background': '1'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job']['id']
+
+        jobs.Worker().run(burst=True)
+
+        status = self.client.get(reverse('job_status', args=[job_id])).json()['job']
+        self.assertEqual(status['result']['rows'], 30)
+        stored = Job.objects.get(pk=job_id).result['file']
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, stored)))
+        self.assertTrue(os.path.exists(os.path.join(settings.JOB_FILES_ROOT, stored)))
+        self.assertNotIn('members-', stored)
+        download = self.client.get(status['download_url'])
+        content = b''.join(download.streaming_content).decode('utf-8-sig')
+        self.assertEqual(len(list(csv.reader(io.StringIO(content)))), 31)
+
+    def test_idle_worker_requeues_jobs_of_dead_workers(self):
+        job = jobs.enqueue('import_members_csv', {'path': 'a.csv'})
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, attempts=1, updated_at=job.created_at - jobs.STALE_AFTER
+        )
+        worker = jobs.Worker()
+        worker._last_recovery = time.monotonic()
+        with mock.patch.dict(jobs.TASKS, {'import_members_csv': lambda ctx, path: None}):
+            # Recovered recently: the stale job is left alone for now
+            worker._loop(0, burst=True)
+            self.assertEqual(Job.objects.get(pk=job.pk).status, Job.RUNNING)
+
+            worker._last_recovery -= jobs.STALE_AFTER.total_seconds()
+            with self.assertLogs('core.jobs', 'WARNING'):
+                worker._loop(0, burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 2))
+
+    def test_background_cli_import_keeps_the_source_file(self):
+        from django.core.management import call_command
+
+        path = os.path.join(tempfile.mkdtemp(), 'members.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(CsvImportTests.HEADER)
+            writer.writerow(['Ade', 'Tunde', '', 'M', 'Single', '', '0801', '', '', ''])
+        call_command('import_members', path, background=True, stdout=io.StringIO())
+
+        jobs.Worker().run(burst=True)
+
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+        self.assertTrue(Member.objects.filter(phone='0801').exists())
+        self.assertTrue(os.path.exists(path))
+
+    def test_failures_are_recorded(self):
+        job = jobs.enqueue('import_members_csv', {'path': '/no/such/file.csv'})
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.Worker().run(burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('FileNotFoundError', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_claims_are_exclusive_and_stale_jobs_requeued(self):
+        first = jobs.enqueue('import_members_csv', {'path': 'a.csv'})
+        jobs.enqueue('import_members_csv', {'path': 'b.csv'})
+        self.assertEqual(jobs.claim_next('w1').pk, first.pk)
+        self.assertNotEqual(jobs.claim_next('w2').pk, first.pk)
+        self.assertIsNone(jobs.claim_next('w3'))
+
+        Job.objects.filter(pk=first.pk).update(updated_at=first.created_at - jobs.STALE_AFTER)
+        self.assertEqual(jobs.recover_stale(), (1, 0))
+        self.assertEqual(Job.objects.get(pk=first.pk).status, Job.QUEUED)
+
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    # The heartbeat writes from its own thread, which TestCase's open
+    # transaction would block
+
+    def test_long_running_job_is_not_requeued(self):
+        outcome = {}
+
+        def slow(ctx):
+            time.sleep(0.5)
+            outcome['recovered'] = jobs.recover_stale(timedelta(seconds=0.3))
+
+        with mock.patch.dict(jobs.TASKS, {'slow': slow}), mock.patch.object(jobs, 'HEARTBEAT_INTERVAL', 0.05):
+            job = jobs.enqueue('slow')
+            jobs.Worker().run(burst=True)
+
+        self.assertEqual(outcome['recovered'], (0, 0))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 1))
+
+class ScriptureTests(TestCase):
+    def test_references_become_verse_ranges(self):
+        self.assertEqual(scripture.parse_references('John 3:16'), [(43, 3016, 3016)])
+        self.assertEqual(scripture.parse_references('1 Cor. 13'), [(46, 13000, 13999)])
+        self.assertEqual(scripture.parse_references('II Tim 3:16-17'), [(55, 3016, 3017)])
+        self.assertEqual(scripture.parse_references('Romans 8:28-39; 12:1, 3'),
+                         [(45, 8028, 8039), (45, 12001, 12001), (45, 12003, 12003)])
+        self.assertEqual(scripture.parse_references('Gen 1-3'), [(1, 1000, 3999)])
+
+    def test_split_query_keeps_other_words(self):
+        self.assertEqual(scripture.split_query('faith hebrews 11 Ade'), ([(58, 11000, 11999)], 'faith Ade'))
+        # A book name needs a chapter, and "is" is not Isaiah
+        self.assertEqual(scripture.split_query('Pastor John'), ([], 'Pastor John'))
+        self.assertEqual(scripture.split_query('faith is 40 days'), ([], 'faith is 40 days'))
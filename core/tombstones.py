@@ -0,0 +1,76 @@
+"""
+Tombstones for rows that offline clients keep copies of.
+
+Deletes are hard, so a client syncing changes since its last visit (see
+``api.sync``) cannot see that a row went away. The post_delete signal
+records a ``Tombstone`` for every deleted member, cell, unit and sermon,
+and a member whose cell or assembly changes gets one for the place it left,
+so that clients scoped to that cell or assembly drop it as well.
+
+Bulk ``QuerySet.update()`` and ``bulk_update()`` calls skip the signals.
+They never delete rows, but one that moves members between cells or
+assemblies should call ``record_bulk_moves`` before writing.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Member, Tombstone
+
+TOMBSTONE_KINDS = {"member", "cell", "unit", "sermon"}
+
+# Clients that last synced before this must download everything again
+TOMBSTONE_RETENTION = timedelta(days=90)
+
+
+def _scope(instance):
+    return getattr(instance, "assembly_id", None), getattr(instance, "cell_id", None)
+
+
+def record_deletion(instance):
+    assembly_id, cell_id = _scope(instance)
+    Tombstone.objects.create(
+        kind=instance._meta.model_name,
+        object_id=instance.pk,
+        assembly_id=assembly_id,
+        cell_id=cell_id,
+    )
+
+
+def record_move(member):
+    """Record the cell/assembly a member is leaving, if it changed since loading"""
+    loaded = getattr(member, "_loaded_scope", None)
+    current = (member.assembly_id, member.cell_id)
+    if loaded is None or loaded == current:
+        return
+    Tombstone.objects.create(
+        kind="member", object_id=member.pk, assembly_id=loaded[0], cell_id=loaded[1]
+    )
+    member._loaded_scope = current
+
+
+def record_bulk_moves(members):
+    """
+    Before ``bulk_update`` of ``members``: record the scope each one is
+    leaving, read from the database since the instances may be unsaved stubs
+    """
+    members = {member.pk: member for member in members if member.pk}
+    stored = Member.objects.filter(pk__in=members).values_list("pk", "assembly_id", "cell_id")
+    moves = [
+        Tombstone(kind="member", object_id=pk, assembly_id=assembly_id, cell_id=cell_id)
+        for pk, assembly_id, cell_id in stored
+        if (members[pk].assembly_id, members[pk].cell_id) != (assembly_id, cell_id)
+    ]
+    Tombstone.objects.bulk_create(moves)
+    return len(moves)
+
+
+def prune_tombstones():
+    """
+    Delete tombstones older than ``TOMBSTONE_RETENTION`` and return how many.
+    The retention is fixed because api.sync resets clients at the same cutoff;
+    pruning closer would drop deletions incremental clients still need.
+    """
+    return Tombstone.objects.filter(
+        deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION
+    ).delete()[0]
@@ -2,6 +2,7 @@ from django.urls import path
 from . import views
 from . import commiteeview as com_views
 from . import inventoryviews as inv_views
+from . import jobviews as job_views
 from . import adminviews  # Make sure this imports your admin views
 
 urlpatterns = [
@@ -14,10 +15,17 @@ urlpatterns = [
     # AJAX endpoints
     path("ajax/search/", views.ajax_search, name="ajax_search"),
     path("ajax/quick-stats/", views.quick_stats, name="quick_stats"),
+    path("metrics/requests/", views.request_metrics, name="request_metrics"),
+    path("ajax/birthdays/", views.birthday_calendar, name="birthday_calendar"),
     # Member AJAX endpoints
     path(
         "ajax/members/<int:pk>/", views.member_detail_modal, name="member_detail_modal"
     ),
+    path(
+        "ajax/members/autocomplete/",
+        views.member_autocomplete,
+        name="member_autocomplete",
+    ),
     path("ajax/members/form/", views.get_member_form, name="get_member_form"),
     path(
         "ajax/members/form/<int:pk>/",
@@ -65,6 +73,12 @@ urlpatterns = [
     ),
     # List pages
     path("members/", views.member_list, name="member_list"),
+    path("members/export/", views.member_export, name="member_export"),
+    # Background jobs
+    path("jobs/", job_views.job_list, name="job_list"),
+    path("jobs/import/", job_views.start_import, name="job_start_import"),
+    path("jobs/<int:pk>/", job_views.job_status, name="job_status"),
+    path("jobs/<int:pk>/download/", job_views.job_download, name="job_download"),
     # # path('families/', views.family_list, name='family_list'),
     path("units/", views.unit_list, name="unit_list"),
     path("cells/", views.cell_list, name="cell_list"),
@@ -82,14 +96,32 @@ urlpatterns = [
     path("ajax/units/update/<int:pk>/", views.update_unit, name="update_unit"),
     path("ajax/units/delete/<int:pk>/", views.delete_unit, name="delete_unit"),
     path("ajax/units/<int:pk>/", views.unit_detail_modal, name="unit_detail_modal"),
+    path(
+        "ajax/units/<int:pk>/members/",
+        views.group_members,
+        {"group": "unit"},
+        name="unit_members",
+    ),
     # Cell detail modal
     path("ajax/cells/<int:pk>/", views.cell_detail_modal, name="cell_detail_modal"),
+    path(
+        "ajax/cells/<int:pk>/members/",
+        views.group_members,
+        {"group": "cell"},
+        name="cell_members",
+    ),
     # Assembly detail modal
     path(
         "ajax/assemblies/<int:pk>/",
         views.assembly_detail_modal,
         name="assembly_detail_modal",
     ),
+    path(
+        "ajax/assemblies/<int:pk>/members/",
+        views.group_members,
+        {"group": "assembly"},
+        name="assembly_members",
+    ),
     # Committee URLs
     path("committee/", com_views.committee_list, name="committee-list"),
     path("committee/<int:pk>/", com_views.committee_detail, name="committee-detail"),
@@ -120,6 +152,11 @@ urlpatterns = [
         com_views.update_member_role,
         name="update-member-role",
     ),
+    path(
+        "committee/<int:committee_id>/members/bulk/",
+        com_views.bulk_committee_members,
+        name="bulk-committee-members",
+    ),
     path(
         "committee/<int:committee_id>/leader/set/",
         com_views.set_committee_leader,
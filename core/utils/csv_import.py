@@ -1,8 +1,37 @@
 # core/utils/csv_import.py
 import csv
+import hashlib
+import itertools
+import os
+import time
 from datetime import datetime
+from django.db import models, transaction
 from django.utils import timezone
-from core.models import Assembly, Unit, Cell, Family, Member
+from core import search, tombstones
+from core.stats import invalidate_stats
+from core.models import Assembly, Unit, Cell, Member, ImportCheckpoint
+
+# Rows read, resolved and written per transaction
+DEFAULT_CHUNK_SIZE = 1000
+
+# Member fields written by the importer (used for bulk_update)
+MEMBER_IMPORT_FIELDS = [
+    'assembly', 'first_name', 'last_name', 'middle_name', 'date_of_birth',
+    'month_of_birth', 'birth_month', 'birth_day', 'gender', 'marital_status', 'email', 'phone', 'address',
+    'unit', 'cell', 'baptism_date', 'membership_date', 'membership_status',
+    'updated_at',
+]
+
+GENDER_MAP = {'M': 'M', 'F': 'F'}
+
+MARITAL_STATUS_MAP = {
+    'Single': 'SINGLE',
+    'Married': 'MARRIED',
+    'Widow': 'WIDOWED',
+    'Widowed': 'WIDOWED',
+    'Seprated': 'SEPARATED',
+    'Separated': 'SEPARATED'
+}
 
 def parse_date(date_str):
     """Parse various date formats in the CSV"""
@@ -82,152 +111,328 @@ def create_cells():
     
     return cells
 
-def get_or_create_family(assembly, surname, row):
-    """Get or create family based on surname and address"""
-    if not surname:
+
+def normalize_name(name):
+    """Lowercase and collapse whitespace so names compare reliably"""
+    return ' '.join((name or '').split()).lower()
+
+
+def member_keys(phone, email, first_name, last_name):
+    """Lookup keys identifying a member: phone or email plus normalized name"""
+    first = normalize_name(first_name)
+    last = normalize_name(last_name)
+    keys = []
+    phone = (phone or '').strip()
+    email = (email or '').strip().lower()
+    if phone:
+        keys.append(('phone', phone, first, last))
+    if email:
+        keys.append(('email', email, first, last))
+    return keys
+
+
+def build_member_index():
+    """Load every existing member once into an in-memory key -> pk index"""
+    index = {}
+    rows = Member.objects.values_list('id', 'phone', 'email', 'first_name', 'last_name')
+    for pk, phone, email, first_name, last_name in rows.iterator(chunk_size=5000):
+        for key in member_keys(phone, email, first_name, last_name):
+            index.setdefault(key, pk)
+    return index
+
+
+def build_member_data(row, assembly, units, cells):
+    """Map one CSV row to Member field values, or None for an empty row"""
+    # Skip empty rows
+    if not row.get('Surname') and not row.get('Other Names 1'):
         return None
-    
-    # Try to find family by surname and similar address
-    address = row.get('Address', '') or ''
-    families = Family.objects.filter(
-        assembly=assembly,
-        family_name__icontains=surname
-    )
-    
-    if families.exists():
-        return families.first()
-    
-    # Create new family
-    family = Family.objects.create(
-        assembly=assembly,
-        family_name=surname,
-        address=address,
-        phone=row.get('Phone', ''),
-        email=row.get('Email', '')
-    )
-    return family
 
-def import_members_from_csv(csv_file_path):
-    """Main function to import members from CSV"""
-    
-    # Create base data
-    assembly = create_assembly()
-    units = create_units()
-    cells = create_cells()
-    
+    surname = (row.get('Surname') or '').strip()
+    other_names_1 = (row.get('Other Names 1') or '').strip()
+    other_names_2 = (row.get('Other Names 2') or '').strip()
+
+    # Create full name components
+    first_name = other_names_1 if other_names_1 else surname
+    last_name = surname
+    middle_name = other_names_2
+
+    gender = GENDER_MAP.get((row.get('Gender') or '').strip(), 'O')
+    marital_status = MARITAL_STATUS_MAP.get((row.get('Status') or '').strip(), 'SINGLE')
+
+    # Parse date of birth
+    dob = parse_date((row.get('DOB') or '').strip())
+
+    # Handle unit assignment
+    unit_name = (row.get('Main Unit') or '').strip() or (row.get('Sub-Unit 1') or '').strip()
+    unit = units.get(unit_name)
+
+    # Handle cell assignment
+    cell_name = (row.get('Cell') or '').strip() or (row.get('Assembly') or '').strip()
+    cell = cells.get(cell_name)
+
+    # Handle baptism
+    baptism_date = None
+    if (row.get('Baptism') or '').strip().lower() == 'yes':
+        baptism_year = (row.get('Baptism Year') or '').strip()
+        if baptism_year and baptism_year.isdigit():
+            baptism_date = datetime(int(baptism_year), 1, 1).date()
+
+    # Handle born again year
+    membership_date = None
+    born_again_year = (row.get('born again year') or '').strip()
+    if born_again_year and born_again_year.isdigit():
+        membership_date = datetime(int(born_again_year), 1, 1).date()
+
+    return {
+        'assembly': assembly,
+        'first_name': first_name,
+        'last_name': last_name,
+        'middle_name': middle_name,
+        'date_of_birth': dob,
+        'gender': gender,
+        'marital_status': marital_status,
+        'email': (row.get('Email') or '').strip(),
+        'phone': (row.get('Phone') or '').strip(),
+        'address': row.get('Address', '') or row.get('Place of Work', '') or '',
+        'unit': unit,
+        'cell': cell,
+        'baptism_date': baptism_date,
+        'membership_date': membership_date,
+        'membership_status': 'ACTIVE'
+    }
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash a file in blocks without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_checkpoint(file_hash):
+    """Return the unfinished checkpoint for a file hash, if any"""
+    return ImportCheckpoint.objects.filter(file_hash=file_hash, completed=False).first()
+
+
+def read_chunks(reader, chunk_size):
+    """Yield lists of at most chunk_size rows from a csv reader"""
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _display(value):
+    """Readable form of a field value for diff output"""
+    if isinstance(value, models.Model):
+        return str(value)
+    return value
+
+
+def diff_member(member, member_data):
+    """Field-level changes {field: (old, new)} that member_data would apply"""
+    changes = {}
+    for field, value in member_data.items():
+        if isinstance(value, models.Model) or value is None and field in ('assembly', 'unit', 'cell'):
+            # Compare foreign keys by id to avoid a query per row
+            current_id = getattr(member, f'{field}_id')
+            new_id = value.pk if value is not None else None
+            if current_id != new_id:
+                changes[field] = (current_id, _display(value))
+        elif getattr(member, field) != value:
+            changes[field] = (getattr(member, field), value)
+    return changes
+
+
+def import_chunk(rows, index, assembly, units, cells, dry_run=False, on_diff=None, first_row=1):
+    """
+    Resolve a chunk of rows against the member index and write it with one
+    bulk_create and one bulk_update. Returns (created, updated).
+
+    With ``dry_run`` nothing is written; existing members are loaded so that
+    ``on_diff(row_number, member, changes)`` can report field-level changes.
+    The caller owns the transaction.
+    """
+    to_create = {}
+    to_update = {}
+    staged = {}
+    now = timezone.now()
+
+    prepared = []
+    for row_number, row in enumerate(rows, start=first_row):
+        member_data = build_member_data(row, assembly, units, cells)
+        if member_data is None:
+            continue
+        keys = member_keys(
+            member_data['phone'], member_data['email'],
+            member_data['first_name'], member_data['last_name'],
+        )
+        prepared.append((row_number, member_data, keys))
+
+    existing = {}
+    if dry_run:
+        pks = {index[key] for _, _, keys in prepared for key in keys
+               if isinstance(index.get(key), int)}
+        existing = Member.objects.in_bulk(pks)
+
+    for row_number, member_data, keys in prepared:
+        match = next((index[key] for key in keys if key in index), None)
+
+        if isinstance(match, Member):
+            # Dry runs only: a member staged as a create by an earlier chunk
+            if on_diff:
+                on_diff(row_number, match, diff_member(match, member_data))
+            for key, value in member_data.items():
+                setattr(match, key, value)
+            staged[id(match)] = match
+            continue
+
+        if match is not None:
+            member = to_update.get(match) or existing.get(match) or Member(pk=match)
+            if dry_run and on_diff:
+                on_diff(row_number, member, diff_member(member, member_data))
+            for key, value in member_data.items():
+                setattr(member, key, value)
+            member.updated_at = now
+            member.get_month_of_birth()
+            to_update[match] = member
+            continue
+
+        # A row repeating a member created earlier in this chunk updates it
+        pending = next((to_create[key] for key in keys if key in to_create), None)
+        if pending is not None:
+            if dry_run and on_diff:
+                on_diff(row_number, pending, diff_member(pending, member_data))
+            for key, value in member_data.items():
+                setattr(pending, key, value)
+            pending.get_month_of_birth()
+            for key in keys:
+                to_create.setdefault(key, pending)
+            continue
+
+        member = Member(**member_data)
+        member.get_month_of_birth()
+        if dry_run and on_diff:
+            on_diff(row_number, member, None)
+        if keys:
+            for key in keys:
+                to_create[key] = member
+        else:
+            # No phone or email: nothing to match on, always a new member
+            to_create[('row', id(member))] = member
+
+    new_members = list({id(m): m for m in to_create.values()}.values())
+
+    if not dry_run:
+        if new_members:
+            Member.objects.bulk_create(new_members, batch_size=500)
+        if to_update:
+            # Members moved to another cell or assembly leave a tombstone for sync
+            tombstones.record_bulk_moves(to_update.values())
+            Member.objects.bulk_update(
+                list(to_update.values()), MEMBER_IMPORT_FIELDS, batch_size=500
+            )
+        # Bulk writes skip the save signals that maintain the search index
+        search.index_objects(new_members + list(to_update.values()))
+
+    # Make new members visible to later chunks
+    for key, member in to_create.items():
+        if key[0] == 'row':
+            continue
+        index.setdefault(key, member if dry_run else member.pk)
+
+    return len(new_members), len(to_update) + len(staged)
+
+
+def import_members_from_csv(
+    csv_file_path,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    on_chunk=None,
+    dry_run=False,
+    on_diff=None,
+    restart=False,
+    file_hash=None,
+):
+    """
+    Stream members from CSV in chunks.
+
+    Existing members are matched on phone or email plus normalized name using
+    an index built once up front, and each chunk is written with bulk_create /
+    bulk_update inside its own transaction together with an ImportCheckpoint
+    holding the file hash and the number of rows committed. A rerun of the
+    same file resumes after the last committed chunk unless ``restart`` is set.
+
+    ``dry_run`` reads the whole file (from the checkpoint, if any) and reports
+    creates, updates and field diffs through ``on_diff`` without writing.
+    ``on_chunk`` is called after every chunk with
+    (chunk_number, rows, created, updated, seconds).
+    """
+    file_hash = file_hash or file_sha256(csv_file_path)
+    checkpoint = None if restart else get_checkpoint(file_hash)
+    start_row = checkpoint.rows_committed if checkpoint else 0
+
     members_created = 0
     members_updated = 0
-    
-    with open(csv_file_path, 'r', encoding='utf-8') as file:
+
+    with transaction.atomic():
+        # Base data is created for real runs and rolled back for dry runs
+        assembly = create_assembly()
+        units = create_units()
+        cells = create_cells()
+        if dry_run:
+            transaction.set_rollback(True)
+
+    if not dry_run and checkpoint is None:
+        checkpoint, _ = ImportCheckpoint.objects.update_or_create(
+            file_hash=file_hash,
+            defaults={
+                'file_name': os.path.basename(csv_file_path),
+                'rows_committed': 0,
+                'members_created': 0,
+                'members_updated': 0,
+                'completed': False,
+            },
+        )
+
+    index = build_member_index()
+
+    with open(csv_file_path, 'r', encoding='utf-8', newline='') as file:
         reader = csv.DictReader(file)
-        
-        for row in reader:
-            # Skip empty rows
-            if not row.get('Surname') and not row.get('Other Names 1'):
-                continue
-            
-            # Prepare member data
-            title = row.get('Title', '').strip()
-            surname = row.get('Surname', '').strip()
-            other_names_1 = row.get('Other Names 1', '').strip()
-            other_names_2 = row.get('Other Names 2', '').strip()
-            
-            # Create full name components
-            first_name = other_names_1 if other_names_1 else surname
-            last_name = surname
-            middle_name = other_names_2
-            
-            # Handle gender
-            gender_map = {'M': 'M', 'F': 'F'}
-            gender = gender_map.get(row.get('Gender', '').strip(), 'O')
-            
-            # Handle marital status
-            marital_status_map = {
-                'Single': 'SINGLE',
-                'Married': 'MARRIED', 
-                'Widow': 'WIDOWED',
-                'Widowed': 'WIDOWED',
-                'Seprated': 'SEPARATED',
-                'Separated': 'SEPARATED'
-            }
-            marital_status = marital_status_map.get(
-                row.get('Status', '').strip(), 
-                'SINGLE'
-            )
-            
-            # Parse date of birth
-            dob = parse_date(row.get('DOB', '').strip())
-            
-            # Handle unit assignment
-            unit_name = row.get('Main Unit', '').strip() or row.get('Sub-Unit 1', '').strip()
-            unit = units.get(unit_name) if unit_name in units else None
-            
-            # Handle cell assignment
-            cell_name = row.get('Cell', '').strip() or row.get('Assembly', '').strip()
-            cell = cells.get(cell_name) if cell_name in cells else None
-            
-            # Handle baptism
-            baptism_date = None
-            if row.get('Baptism', '').strip().lower() == 'yes':
-                baptism_year = row.get('Baptism Year', '').strip()
-                if baptism_year and baptism_year.isdigit():
-                    baptism_date = datetime(int(baptism_year), 1, 1).date()
-            
-            # Handle born again year
-            membership_date = None
-            born_again_year = row.get('born again year', '').strip()
-            if born_again_year and born_again_year.isdigit():
-                membership_date = datetime(int(born_again_year), 1, 1).date()
-            
-            # Create or update member
-            member_data = {
-                'assembly': assembly,
-                'first_name': first_name,
-                'last_name': last_name,
-                'middle_name': middle_name,
-                'date_of_birth': dob,
-                'gender': gender,
-                'marital_status': marital_status,
-                'email': row.get('Email', '').strip(),
-                'phone': row.get('Phone', '').strip(),
-                'address': row.get('Address', '') or row.get('Place of Work', '') or '',
-                'unit': unit,
-                'cell': cell,
-                'baptism_date': baptism_date,
-                'membership_date': membership_date,
-                'membership_status': 'ACTIVE'
-            }
-            
-            # Try to find existing member by name and phone/email
-            existing_member = None
-            if row.get('Phone'):
-                existing_member = Member.objects.filter(
-                    phone=row.get('Phone').strip(),
-                    first_name__icontains=first_name,
-                    last_name__icontains=last_name
-                ).first()
-            
-            if not existing_member and row.get('Email'):
-                existing_member = Member.objects.filter(
-                    email=row.get('Email').strip(),
-                    first_name__icontains=first_name,
-                    last_name__icontains=last_name
-                ).first()
-            
-            if existing_member:
-                # Update existing member
-                for key, value in member_data.items():
-                    setattr(existing_member, key, value)
-                existing_member.save()
-                members_updated += 1
-                print(f"Updated: {first_name} {last_name}")
-            else:
-                # Create new member
-                Member.objects.create(**member_data)
-                members_created += 1
-                print(f"Created: {first_name} {last_name}")
-    
-    print(f"\nImport completed!")
-    print(f"Members created: {members_created}")
-    print(f"Members updated: {members_updated}")
-    return members_created, members_updated
\ No newline at end of file
+        rows_read = start_row
+        chunks = read_chunks(itertools.islice(reader, start_row, None), chunk_size)
+
+        for chunk_number, rows in enumerate(chunks, start=1):
+            started = time.perf_counter()
+            with transaction.atomic():
+                created, updated = import_chunk(
+                    rows, index, assembly, units, cells,
+                    dry_run=dry_run, on_diff=on_diff, first_row=rows_read + 1,
+                )
+                rows_read += len(rows)
+                if not dry_run:
+                    checkpoint.rows_committed = rows_read
+                    checkpoint.members_created += created
+                    checkpoint.members_updated += updated
+                    checkpoint.save(update_fields=[
+                        'rows_committed', 'members_created',
+                        'members_updated', 'updated_at',
+                    ])
+            elapsed = time.perf_counter() - started
+
+            members_created += created
+            members_updated += updated
+            if on_chunk:
+                on_chunk(chunk_number, len(rows), created, updated, elapsed)
+
+    if not dry_run:
+        checkpoint.completed = True
+        checkpoint.save(update_fields=['completed', 'updated_at'])
+        invalidate_stats()
+
+    return members_created, members_updated
@@ -0,0 +1,234 @@
+"""
+Reproducible synthetic data for load testing.
+
+Everything is generated from one seeded ``random.Random`` and written with
+``bulk_create`` in batches, so a given seed and set of counts always yields
+the same rows. bulk_create skips ``Member.save()`` and the save signals, so
+the birthday fields are filled in here and the search index and statistics
+snapshot are refreshed once at the end.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from core import search
+from core.models import (
+    Admin,
+    Assembly,
+    Cell,
+    Committee,
+    CommitteeMembership,
+    Inventory,
+    Member,
+    Sermon,
+    Unit,
+)
+from core.lookups import invalidate_lookups
+from core.sermons import index_passages, invalidate_sermons
+from core.stats import invalidate_stats
+
+DEFAULT_BATCH_SIZE = 2000
+
+FIRST_NAMES = [
+    'Adebayo', 'Chinedu', 'Oluwaseun', 'Ngozi', 'Funmilayo', 'Emeka', 'Aisha',
+    'Tunde', 'Kemi', 'Ifeanyi', 'Bolanle', 'Yetunde', 'Segun', 'Chioma', 'Ibrahim',
+    'Blessing', 'Samuel', 'Grace', 'Daniel', 'Esther', 'Joseph', 'Ruth', 'David',
+    'Mary', 'Peter', 'Deborah', 'Femi', 'Tope', 'Uche', 'Amaka',
+]
+LAST_NAMES = [
+    'Adeyemi', 'Okafor', 'Balogun', 'Eze', 'Ogunleye', 'Nwosu', 'Bello', 'Afolabi',
+    'Okonkwo', 'Adewale', 'Ibe', 'Olawale', 'Akande', 'Obi', 'Oyelaran', 'Musa',
+    'Fashola', 'Nnamdi', 'Ajayi', 'Uzor', 'Salami', 'Ogundipe', 'Okoro', 'Lawal',
+]
+CITIES = [('Akure', 'Ondo'), ('Ibadan', 'Oyo'), ('Lagos', 'Lagos'), ('Abuja', 'FCT'),
+          ('Enugu', 'Enugu'), ('Port Harcourt', 'Rivers'), ('Ilorin', 'Kwara')]
+UNIT_NAMES = ['Choir', 'Ushering', 'Media', 'Sanctuary', 'Children', 'Youth', 'Prayer',
+              'Evangelism', 'Welfare', 'Technical', 'Drama', 'Protocol']
+ITEMS = [('Plastic chair', 'Chairs'), ('Keyboard', 'Instruments'), ('Microphone', 'Audio'),
+         ('Projector', 'Media'), ('Generator', 'Power'), ('Drum set', 'Instruments'),
+         ('Speaker', 'Audio'), ('Ceiling fan', 'Fittings'), ('Table', 'Furniture')]
+BOOKS = ['John', 'Romans', 'Psalms', 'Genesis', 'Acts', 'Matthew', 'Isaiah', 'Hebrews']
+
+
+def _batched(objects, model, batch_size):
+    """bulk_create objects from an iterable in batches, returning the saved rows"""
+    created = []
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            created.extend(model.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        created.extend(model.objects.bulk_create(batch))
+    return created
+
+
+def _random_date(rng, start, end):
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def generate(
+    members=1000,
+    assemblies=5,
+    cells=20,
+    units=10,
+    committees=10,
+    committee_size=15,
+    inventory=200,
+    sermons=100,
+    admins=3,
+    seed=0,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    """
+    Insert synthetic rows and return a dict of how many of each were created.
+
+    The first admin is a superadmin, the rest are cell admins.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+
+    with transaction.atomic():
+        def assembly(index):
+            city, state = rng.choice(CITIES)
+            return Assembly(
+                name=f'{city} Assembly {index + 1}',
+                street_address=f'{rng.randint(1, 200)} Church Road',
+                city=city,
+                state=state,
+                phone=f'080{rng.randint(10000000, 99999999)}',
+            )
+
+        assembly_rows = _batched((assembly(index) for index in range(assemblies)), Assembly, batch_size)
+        cell_rows = _batched(
+            (
+                Cell(name=f'Cell {index + 1}', created_at=_random_date(rng, date(2015, 1, 1), today))
+                for index in range(cells)
+            ),
+            Cell,
+            batch_size,
+        )
+        unit_rows = _batched(
+            (
+                Unit(name=f'{UNIT_NAMES[index % len(UNIT_NAMES)]} {index // len(UNIT_NAMES) + 1}')
+                for index in range(units)
+            ),
+            Unit,
+            batch_size,
+        )
+
+        def member(index):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            born = _random_date(rng, date(1940, 1, 1), date(2015, 12, 31)) if rng.random() < 0.9 else None
+            row = Member(
+                assembly=rng.choice(assembly_rows),
+                first_name=first,
+                last_name=last,
+                gender=rng.choice('MF'),
+                marital_status=rng.choice(Member.MARITAL_STATUS_CHOICES)[0],
+                date_of_birth=born,
+                email=f'{first}.{last}{index}@example.com'.lower() if rng.random() < 0.6 else '',
+                phone=f'0{rng.choice("789")}0{rng.randint(10000000, 99999999)}',
+                unit=rng.choice(unit_rows) if unit_rows and rng.random() < 0.7 else None,
+                cell=rng.choice(cell_rows) if cell_rows and rng.random() < 0.8 else None,
+                membership_status=rng.choices(
+                    ['ACTIVE', 'INACTIVE', 'VISITOR', 'NEW_MEMBER'], [80, 10, 5, 5]
+                )[0],
+            )
+            row.get_month_of_birth()
+            return row
+
+        member_rows = _batched((member(index) for index in range(members)), Member, batch_size)
+
+        committee_rows = _batched(
+            (
+                Committee(
+                    name=f'Committee {index + 1}',
+                    leader=rng.choice(member_rows) if member_rows else None,
+                )
+                for index in range(committees)
+            ),
+            Committee,
+            batch_size,
+        )
+        memberships = []
+        for committee in committee_rows:
+            size = min(committee_size, len(member_rows))
+            for chosen in rng.sample(member_rows, size):
+                memberships.append(CommitteeMembership(committee=committee, member=chosen))
+        membership_rows = _batched(memberships, CommitteeMembership, batch_size)
+
+        def item():
+            name, unit = rng.choice(ITEMS)
+            quantity = rng.randint(1, 50)
+            price = Decimal(rng.randint(500, 500000))
+            return Inventory(
+                name=name,
+                description=f'{unit} for general use',
+                unit=unit,
+                assembly=rng.choice(assembly_rows),
+                acquired_from='Donation' if rng.random() < 0.3 else 'Market',
+                Brand='Generic',
+                quantity=quantity,
+                price_per_unit=price,
+                total_price=price * quantity,
+                status=rng.choices(
+                    [code for code, _ in Inventory.STATUS_CHOICES], [60, 25, 5, 6, 2, 2]
+                )[0],
+                condition=rng.choice(Inventory.CONDITION_CHOICES)[0],
+                location=rng.choice(['Main Sanctuary', 'Store', 'Youth Room', 'Office']),
+            )
+
+        inventory_rows = _batched(
+            (item() for _ in range(inventory if assembly_rows else 0)), Inventory, batch_size
+        )
+
+        sermon_rows = _batched(
+            (
+                Sermon(
+                    assembly=rng.choice(assembly_rows),
+                    title=f'Sermon {index + 1}',
+                    preacher=f'Pastor {rng.choice(LAST_NAMES)}',
+                    bible_passage=f'{rng.choice(BOOKS)} {rng.randint(1, 20)}:{rng.randint(1, 30)}',
+                    sermon_date=today - timedelta(days=7 * index),
+                )
+                for index in range(sermons if assembly_rows else 0)
+            ),
+            Sermon,
+            batch_size,
+        )
+
+        # Admin.save() creates the login and moves the member into the cell
+        admin_rows = []
+        for index, chosen in enumerate(rng.sample(member_rows, min(admins, len(member_rows)))):
+            admin = Admin(
+                member=chosen,
+                assembly=chosen.assembly,
+                level='SUPERADMIN' if index == 0 else 'Cell',
+                cell=None if index == 0 or not cell_rows else rng.choice(cell_rows),
+            )
+            admin.save()
+            admin_rows.append(admin)
+
+        search.index_objects(
+            assembly_rows + unit_rows + cell_rows + member_rows + committee_rows + sermon_rows
+        )
+        index_passages(sermon_rows)
+
+    invalidate_stats()
+    invalidate_lookups()
+    invalidate_sermons()
+    return {
+        'assemblies': len(assembly_rows),
+        'cells': len(cell_rows),
+        'units': len(unit_rows),
+        'members': len(member_rows),
+        'committees': len(committee_rows),
+        'committee_memberships': len(membership_rows),
+        'inventory': len(inventory_rows),
+        'sermons': len(sermon_rows),
+        'admins': len(admin_rows),
+    }
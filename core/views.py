@@ -1,12 +1,17 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db.models import Q, Count
 from django.core.paginator import Paginator
 from django.template.loader import render_to_string
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-from .models import Assembly, Unit, Member, Cell, Admin
+from .models import Assembly, Unit, Member, Cell, Admin, CommitteeMembership
+from . import exports, jobs, lookups, metrics, search as search_index
+from .jobviews import job_payload
+from .birthdays import MAX_DAYS, upcoming_birthdays
+from .stats import get_stats, get_stats_version
+from .pagination import cached_count, keyset_paginate, parse_page_size
 from .forms import MemberForm, AssemblyForm, UnitForm, CellForm
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm
@@ -28,19 +33,8 @@ def dashboard(request):
     """Main dashboard with overview and all functionality"""
     try:
         # Statistics
-        total_members = Member.objects.count()
-        # total_families = Family.objects.count()
-        total_assemblies = Assembly.objects.count()
-        total_units = Unit.objects.count()
-        total_cells = Cell.objects.count()
-
-        # Get active members count
-        active_members = Member.objects.filter(membership_status="ACTIVE").count()
-
-        # New members today
-        new_members_today = Member.objects.filter(
-            created_at__date=timezone.now().date()
-        ).count()
+        admin_profile = request.user.admin_account
+        stats = get_stats(admin_profile)
 
         # Month Mapping
         MONTH_MAP = [
@@ -73,7 +67,6 @@ def dashboard(request):
         month_filter = request.GET.get("month", "")
 
         # Filter members based on parameters
-        admin_profile = request.user.admin_account
         if admin_profile.is_superadmin:
             members = (
                 Member.objects.all()
@@ -96,24 +89,18 @@ def dashboard(request):
         if status_filter:
             members = members.filter(membership_status=status_filter)
         if month_filter:
-            month_of_birth = members.get_month_of_birth()
-            members = members.filter(month_of_birth=month_filter)
+            members = members.filter(birth_month=month_filter)
 
         # Get all options for filters
-        assemblies = Assembly.objects.all()
-        units = Unit.objects.all()
+        assemblies = lookups.options("assembly")
+        units = lookups.options("unit")
         # families = Family.objects.all()
-        cells = Cell.objects.all()
+        cells = lookups.options("cell")
 
         context = {
             # Statistics
-            "total_members": total_members,
+            **stats,
             # 'total_families': total_families,
-            "total_assemblies": total_assemblies,
-            "total_units": total_units,
-            "total_cells": total_cells,
-            "active_members": active_members,
-            "new_members_today": new_members_today,
             # Month mapp
             "month_map": MONTH_MAP,
             # Recent data
@@ -148,36 +135,45 @@ def ajax_search(request):
         results = {}
 
         if query:
-            # Search members
-            members = Member.objects.filter(
-                Q(first_name__icontains=query)
-                | Q(last_name__icontains=query)
-                | Q(middle_name__icontains=query)
-                | Q(email__icontains=query)
-                | Q(phone__icontains=query)
-            ).select_related("assembly", "unit", "cell")[:10]
-
-            # Search families
-            # families = Family.objects.filter(
-            #     Q(family_name__icontains=query) |
-            #     Q(email__icontains=query) |
-            #     Q(phone__icontains=query)
-            # ).select_related('assembly')[:10]
-
-            # Search assemblies
-            assemblies = Assembly.objects.filter(
-                Q(name__icontains=query)
-                | Q(city__icontains=query)
-                | Q(state__icontains=query)
-            )[:10]
-
-            # Search units
-            units = Unit.objects.filter(
-                Q(name__icontains=query) | Q(description__icontains=query)
-            ).select_related("leader")[:10]
-
-            # Search cells
-            cells = Cell.objects.filter(name__icontains=query)[:10]
+            member_ids = search_index.search(query, "member", limit=10)
+            if member_ids is not None:
+                # Ranked lookups against the full-text index
+                members = search_index.ranked(
+                    Member.objects.select_related("assembly"), member_ids
+                )
+                assemblies = search_index.ranked(
+                    Assembly.objects.all(), search_index.search(query, "assembly")
+                )
+                units = search_index.ranked(
+                    Unit.objects.all(), search_index.search(query, "unit")
+                )
+                cells = search_index.ranked(
+                    Cell.objects.all(), search_index.search(query, "cell")
+                )
+            else:
+                # Search members
+                members = Member.objects.filter(
+                    Q(first_name__icontains=query)
+                    | Q(last_name__icontains=query)
+                    | Q(middle_name__icontains=query)
+                    | Q(email__icontains=query)
+                    | Q(phone__icontains=query)
+                ).select_related("assembly", "unit", "cell")[:10]
+
+                # Search assemblies
+                assemblies = Assembly.objects.filter(
+                    Q(name__icontains=query)
+                    | Q(city__icontains=query)
+                    | Q(state__icontains=query)
+                )[:10]
+
+                # Search units
+                units = Unit.objects.filter(
+                    Q(name__icontains=query) | Q(description__icontains=query)
+                ).select_related("leader")[:10]
+
+                # Search cells
+                cells = Cell.objects.filter(name__icontains=query)[:10]
 
             results = {
                 "members": [
@@ -247,21 +243,80 @@ def ajax_search(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+@login_required
+def member_autocomplete(request):
+    """
+    AJAX endpoint for member pickers (Select2 format).
+
+    ``q`` is matched by prefix against the search index, ``limit`` is capped
+    at 50, ``exclude_committee`` leaves out a committee's members and
+    ``exclude_admins`` leaves out members who already have an admin profile.
+    """
+    try:
+        query = request.GET.get("q", "").strip()
+        limit = parse_page_size(
+            request.GET.get("limit"), AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT
+        )
+
+        excluded = []
+        if request.GET.get("exclude_committee"):
+            excluded.append(
+                CommitteeMembership.objects.filter(
+                    committee_id=request.GET["exclude_committee"]
+                ).values_list("member_id", flat=True)
+            )
+        if request.GET.get("exclude_admins"):
+            excluded.append(Admin.objects.values_list("member_id", flat=True))
+
+        members = Member.objects.only(
+            "id", "first_name", "middle_name", "last_name", "email", "phone"
+        )
+        member_ids = None
+        if query:
+            member_ids = search_index.search(query, "member", limit=limit, exclude=excluded)
+        if member_ids is not None:
+            members = search_index.ranked(members, member_ids)
+        else:
+            for ids in excluded:
+                members = members.exclude(pk__in=ids)
+            for term in query.split():
+                members = members.filter(
+                    Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+                )
+            members = members.order_by("first_name", "last_name", "id")[:limit]
+
+        return JsonResponse(
+            {
+                "results": [
+                    {
+                        "id": member.id,
+                        "text": member.get_full_name(),
+                        "email": member.email,
+                        "phone": member.phone,
+                    }
+                    for member in members
+                ]
+            }
+        )
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
 def quick_stats(request):
     """AJAX endpoint for quick statistics"""
     try:
-        total_members = Member.objects.count()
-        active_members = Member.objects.filter(membership_status="ACTIVE").count()
-        new_members_today = Member.objects.filter(
-            created_at__date=timezone.now().date()
-        ).count()
-        # total_families = Family.objects.count()
+        admin_profile = getattr(request.user, "admin_account", None)
+        stats = get_stats(admin_profile)
 
         return JsonResponse(
             {
-                "total_members": total_members,
-                "active_members": active_members,
-                "new_members_today": new_members_today,
+                "total_members": stats["total_members"],
+                "active_members": stats["active_members"],
+                "new_members_today": stats["new_members_today"],
                 # 'total_families': total_families,
             }
         )
@@ -269,6 +324,65 @@ def quick_stats(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@login_required
+def request_metrics(request):
+    """Rolling per-view query and latency statistics (superadmins only)"""
+    if (
+        not hasattr(request.user, "admin_account")
+        or not request.user.admin_account.is_superadmin
+    ):
+        return JsonResponse(
+            {"error": "Only super administrators can view request metrics."}, status=403
+        )
+    try:
+        return JsonResponse(
+            {"window": metrics.registry.window, "views": metrics.registry.snapshot()}
+        )
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@login_required
+def birthday_calendar(request):
+    """AJAX endpoint: members the admin manages with a birthday in the next N days"""
+    admin_profile = getattr(request.user, "admin_account", None)
+    if admin_profile is None or not exports.can_export(admin_profile):
+        return JsonResponse({"error": "Admin access required"}, status=403)
+    try:
+        days = max(0, min(int(request.GET.get("days", 30)), MAX_DAYS))
+        cell_id = int(request.GET["cell"]) if request.GET.get("cell") else None
+        assembly_id = int(request.GET["assembly"]) if request.GET.get("assembly") else None
+    except ValueError:
+        return JsonResponse({"error": "days, cell and assembly must be numbers"}, status=400)
+
+    members = admin_profile.get_managed_members().select_related("assembly", "cell")
+    if cell_id is not None:
+        members = members.filter(cell_id=cell_id)
+    if assembly_id is not None:
+        members = members.filter(assembly_id=assembly_id)
+
+    today = timezone.localdate()
+    results = []
+    for member, birthday in upcoming_birthdays(members, days, today):
+        results.append(
+            {
+                "id": member.id,
+                "name": member.get_full_name(),
+                "birthday": birthday.isoformat(),
+                "days_until": (birthday - today).days,
+                "turning": (
+                    birthday.year - member.date_of_birth.year
+                    if member.date_of_birth
+                    else None
+                ),
+                "assembly": member.assembly.name,
+                "cell": member.cell.name if member.cell else "",
+                "phone": member.phone,
+            }
+        )
+    return JsonResponse({"days": days, "count": len(results), "results": results})
+
+
 # Member AJAX Views
 def member_detail_modal(request, pk):
     """Return member details for modal display"""
@@ -834,76 +948,86 @@ def member_list(request):
     ]
 
     admin_profile = request.user.admin_account
-    if admin_profile.is_superadmin:
-        members = (
-            Member.objects.all()
-            .select_related("assembly", "unit", "cell")
-            .order_by("first_name", "last_name")
-        )
-    if admin_profile.is_cell_admin:
-        members = Member.objects.filter(cell=admin_profile.cell).order_by(
-            "first_name", "last_name"
-        )
-
-    # Filtering
-    assembly_id = request.GET.get("assembly")
-    unit_id = request.GET.get("unit")
-    gender = request.GET.get("gender")
-    cell_id = request.GET.get("cell")
-    status = request.GET.get("status")
-    search = request.GET.get("search")
+    members = exports.filter_members(request.GET, admin_profile)
     month = request.GET.get("month")
 
-    if assembly_id:
-        members = members.filter(assembly_id=assembly_id)
-    if unit_id:
-        if unit_id == "None":
-            members = members.filter(unit__isnull=True)
-        else:
-            members = members.filter(unit_id=unit_id)
-
-    if gender:
-        if gender == "all":
-            pass
-        else:
-            members = members.filter(gender=gender)
-
-    if cell_id and admin_profile.is_superadmin:
-        if cell_id == "None":
-            members = members.filter(cell__isnull=True)
-            print(cell_id)
-        else:
-            members = members.filter(cell_id=cell_id)
-    if status:
-        members = members.filter(membership_status=status)
-    if search:
-        members = members.filter(
-            Q(first_name__icontains=search)
-            | Q(last_name__icontains=search)
-            | Q(email__icontains=search)
-            | Q(phone__icontains=search)
-        )
-    if month:
-        members = members.filter(date_of_birth__month=month).order_by(
-            "date_of_birth__day"
-        )
-
     # Pagination
-    page_size = int(request.GET.get("page_size", 25))
-    paginator = Paginator(members, page_size)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_size = parse_page_size(request.GET.get("page_size"))
+    cursor = request.GET.get("cursor")
+    keyset = (request.GET.get("paging") == "keyset" or cursor) and not month
+    if keyset:
+        # Constant cost per page: no OFFSET, total served from cache
+        page_obj = keyset_paginate(
+            members,
+            ["first_name", "last_name", "id"],
+            cursor=cursor,
+            page_size=page_size,
+            count=cached_count(members, version=get_stats_version()),
+        )
+        total_count = page_obj.count
+    else:
+        paginator = Paginator(members, page_size)
+        page_number = request.GET.get("page")
+        page_obj = paginator.get_page(page_number)
+        total_count = paginator.count
 
     context = {
         "members": page_obj,
-        "assemblies": Assembly.objects.all(),
+        "keyset": keyset,
+        "total_count": total_count,
+        "assemblies": lookups.options("assembly"),
         "month_map": MONTH_MAP,
-        "units": Unit.objects.all(),
-        "cells": Cell.objects.all(),
+        "units": lookups.options("unit"),
+        "cells": lookups.options("cell"),
     }
     return render(request, "members/member_list.html", context)
 
 
+@login_required
+def member_export(request):
+    """
+    Stream the members matching member_list's filters as CSV, or XLSX with
+    ``?format=xlsx``. Rows come from ``values_list`` in chunks and are
+    written as they arrive, so memory use does not grow with the export.
+
+    With ``?background=1`` the file is written by a background job instead
+    and the response is the job to poll.
+    """
+    if not hasattr(request.user, "admin_account"):
+        return JsonResponse({"error": "Admin access required"}, status=403)
+    if not exports.can_export(request.user.admin_account):
+        return JsonResponse({"error": "Your admin level cannot export members"}, status=403)
+    file_format = request.GET.get("format", "csv")
+    if file_format not in exports.FORMATS:
+        return JsonResponse({"error": "format must be csv or xlsx"}, status=400)
+
+    if request.GET.get("background"):
+        filters = {
+            key: value
+            for key, value in request.GET.items()
+            if key not in ("format", "background")
+        }
+        job = jobs.enqueue(
+            "export_members",
+            {
+                "admin_id": request.user.admin_account.id,
+                "filters": filters,
+                "file_format": file_format,
+            },
+            user=request.user,
+        )
+        return JsonResponse({"job": job_payload(job)}, status=202)
+
+    members = exports.filter_members(request.GET, request.user.admin_account)
+    content, content_type = exports.stream_members(
+        members, file_format, lookups.for_request(request)
+    )
+    response = StreamingHttpResponse(content, content_type=content_type)
+    filename = f"members-{timezone.localdate():%Y%m%d}.{file_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 # def family_list(request):
 #     """List all families with statistics"""
 #     families = Family.objects.annotate(
@@ -1010,32 +1134,103 @@ def member_detail(request, pk):
 #     return render(request, 'families/family_detail.html', context)
 
 
+# Detail pages and modals render at most one page of members; the rest is
+# fetched incrementally from the group_members endpoint.
+MEMBER_PAGE_SIZE = 20
+
+MEMBER_GROUPS = {
+    "unit": (Unit, ("assembly", "cell"), "dashboard/partials/unit_member_rows.html"),
+    "cell": (Cell, ("assembly", "unit"), "dashboard/partials/cell_member_cards.html"),
+    "assembly": (Assembly, ("unit", "cell"), "dashboard/partials/assembly_member_rows.html"),
+}
+
+
+def _group_members(group, obj):
+    _, related, _ = MEMBER_GROUPS[group]
+    return Member.objects.filter(**{group: obj}).select_related(*related)
+
+
+def _member_summary(members):
+    """Counts shown beside a member list, in one query"""
+    return members.order_by().aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(membership_status="ACTIVE")),
+        new=Count("id", filter=Q(membership_status="NEW_MEMBER")),
+        male=Count("id", filter=Q(gender="M")),
+        female=Count("id", filter=Q(gender="F")),
+    )
+
+
+def _member_page(members, cursor=None, page_size=MEMBER_PAGE_SIZE):
+    return keyset_paginate(
+        members, ["first_name", "last_name", "id"], cursor=cursor, page_size=page_size
+    )
+
+
+def group_members(request, group, pk):
+    """AJAX endpoint: the next page of a unit, cell or assembly's members"""
+    try:
+        model, _, row_template = MEMBER_GROUPS[group]
+        obj = get_object_or_404(model, pk=pk)
+        page = _member_page(
+            _group_members(group, obj),
+            cursor=request.GET.get("cursor"),
+            page_size=parse_page_size(request.GET.get("page_size"), MEMBER_PAGE_SIZE),
+        )
+        html = render_to_string(row_template, {"members": page}, request=request)
+        return JsonResponse(
+            {
+                "html": html,
+                "count": len(page),
+                "next_cursor": page.next_cursor,
+                "results": [
+                    {
+                        "id": member.id,
+                        "name": f"{member.first_name} {member.last_name}",
+                        "phone": member.phone,
+                        "membership_status": member.membership_status,
+                    }
+                    for member in page
+                ],
+            }
+        )
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
 def unit_detail(request, pk):
     """Unit detail page"""
     unit = get_object_or_404(Unit.objects.select_related("leader"), pk=pk)
-    unit_members = Member.objects.filter(unit=unit).select_related("assembly", "cell")
-    context = {"unit": unit, "unit_members": unit_members}
+    members = _group_members("unit", unit)
+    context = {
+        "unit": unit,
+        "unit_members": _member_page(members),
+        "member_summary": _member_summary(members),
+    }
     return render(request, "units/unit_detail.html", context)
 
 
 def cell_detail(request, pk):
     """Cell detail page"""
     cell = get_object_or_404(Cell, pk=pk)
-    cell_members = Member.objects.filter(cell=cell).select_related("assembly", "unit")
-    context = {"cell": cell, "cell_members": cell_members}
+    members = _group_members("cell", cell)
+    context = {
+        "cell": cell,
+        "cell_members": _member_page(members),
+        "member_summary": _member_summary(members),
+    }
     return render(request, "cells/cell_detail.html", context)
 
 
 def assembly_detail(request, pk):
     """Assembly detail page"""
     assembly = get_object_or_404(Assembly, pk=pk)
-    assembly_members = Member.objects.filter(assembly=assembly).select_related(
-        "unit", "cell"
-    )
+    members = _group_members("assembly", assembly)
     # assembly_families = Family.objects.filter(assembly=assembly)
     context = {
         "assembly": assembly,
-        "assembly_members": assembly_members,
+        "assembly_members": _member_page(members),
+        "member_summary": _member_summary(members),
         # 'assembly_families': assembly_families
     }
     return render(request, "assemblies/assembly_detail.html", context)
@@ -1138,15 +1333,14 @@ def unit_detail_modal(request, pk):
     """Return unit details for modal"""
     try:
         unit = get_object_or_404(Unit.objects.select_related("leader"), pk=pk)
-        unit_members = Member.objects.filter(unit=unit).select_related(
-            "assembly", "cell"
-        )
+        members = _group_members("unit", unit)
 
         html = render_to_string(
             "dashboard/partials/unit_detail_modal.html",
             {
                 "unit": unit,
-                "unit_members": unit_members,
+                "unit_members": _member_page(members),
+                "member_summary": _member_summary(members),
             },
         )
         return JsonResponse({"html": html})
@@ -1158,15 +1352,14 @@ def cell_detail_modal(request, pk):
     """Return cell details for modal"""
     try:
         cell = get_object_or_404(Cell, pk=pk)
-        cell_members = Member.objects.filter(cell=cell).select_related(
-            "assembly", "unit"
-        )
+        members = _group_members("cell", cell)
 
         html = render_to_string(
             "dashboard/partials/cell_detail_modal.html",
             {
                 "cell": cell,
-                "cell_members": cell_members,
+                "cell_members": _member_page(members),
+                "member_summary": _member_summary(members),
             },
         )
         return JsonResponse({"html": html})
@@ -1178,18 +1371,15 @@ def assembly_detail_modal(request, pk):
     """Return assembly details for modal"""
     try:
         assembly = get_object_or_404(Assembly, pk=pk)
-        assembly_members = (
-            Member.objects.filter(assembly=assembly)
-            .select_related("unit", "cell")
-            .order_by("last_name")
-        )
+        members = _group_members("assembly", assembly)
         # assembly_families = Family.objects.filter(assembly=assembly)
 
         html = render_to_string(
             "dashboard/partials/assembly_detail_modal.html",
             {
                 "assembly": assembly,
-                "assembly_members": assembly_members,
+                "assembly_members": _member_page(members),
+                "member_summary": _member_summary(members),
                 # 'assembly_families': assembly_families,
             },
         )